@@ -0,0 +1,309 @@
+"""
+Delta Deploy — content-hashed, atomic releases for static sites.
+
+Instead of `scp -r dist/` on every deploy:
+
+1. Hash every file under dist/ into a manifest {path: sha256}.
+2. Read the live release's manifest from the server.
+3. Stage the new release next to the live one: hard-link the live tree
+   (unchanged files cost nothing), delete removed/changed paths, then
+   upload only the changed files as gzip'd tar streams — several in
+   parallel over one multiplexed SSH connection.
+4. Swap the `public_html` symlink to the staged release atomically
+   (rename), keeping the old target as `previous` so rollback() is a
+   single symlink swap, not a re-upload.
+
+Remote layout (under DEPLOY_ROOT):
+    releases/<id>/        one directory per release, with .manifest.json
+    public_html → releases/<id>      live site
+    previous    → releases/<id>      last live release (rollback target)
+
+Usage:
+    from delta_deploy import DeltaDeployer
+
+    result = DeltaDeployer("s62pa").deploy(Path("dist"))
+    print(result.release, result.uploaded, result.bytes_sent)
+"""
+
+import hashlib
+import io
+import json
+import shlex
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Shared server-monitor modules (.kilocode/scripts/server-monitor)
+MONITOR_DIR = Path(__file__).resolve().parents[2] / ".kilocode" / "scripts" / "server-monitor"
+sys.path.insert(0, str(MONITOR_DIR))
+from ssh_session import get_pool
+
+
+DEPLOY_ROOT = "/var/www/marketing.tvoje.info"
+LIVE_NAME = "public_html"
+PREVIOUS_NAME = "previous"
+RELEASES_NAME = "releases"
+MANIFEST_NAME = ".manifest.json"
+UPLOAD_STREAMS = 4              # Parallel tar streams per deploy
+UPLOAD_TIMEOUT_SEC = 300
+KEEP_RELEASES = 5               # Older releases are pruned (live/previous always kept)
+HASH_CHUNK = 1 << 20
+
+
+class DeployError(RuntimeError):
+    """Raised when a remote deploy step fails (live site is left untouched)."""
+
+
+@dataclass
+class DeployResult:
+    """Outcome of one delta deploy."""
+    release: str
+    uploaded: int
+    removed: int
+    unchanged: int
+    bytes_sent: int
+    duration: float
+    previous: Optional[str]
+
+
+# ═══════════════════════════════════════════════════════════════
+# MANIFESTS
+# ═══════════════════════════════════════════════════════════════
+
+def file_digest(path: Path) -> str:
+    """sha256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_manifest(dist: Path) -> Dict[str, str]:
+    """{relative posix path: sha256} for every file under dist/."""
+    return {
+        path.relative_to(dist).as_posix(): file_digest(path)
+        for path in sorted(dist.rglob("*"))
+        if path.is_file() and path.name != MANIFEST_NAME
+    }
+
+
+def manifest_id(manifest: Dict[str, str]) -> str:
+    """Short hash identifying a manifest's content."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def diff_manifests(local: Dict[str, str], remote: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """(paths to upload, paths to delete) to turn `remote` into `local`."""
+    changed = [p for p, digest in local.items() if remote.get(p) != digest]
+    removed = [p for p in remote if p not in local]
+    return changed, removed
+
+
+def split_streams(dist: Path, paths: List[str], streams: int) -> List[List[str]]:
+    """Spread files over at most `streams` buckets of similar total size (largest first)."""
+    buckets: List[Tuple[int, List[str]]] = [(0, []) for _ in range(max(1, min(streams, len(paths))))]
+    for path in sorted(paths, key=lambda p: (dist / p).stat().st_size, reverse=True):
+        size, files = min(buckets, key=lambda b: b[0])
+        buckets.remove((size, files))
+        files.append(path)
+        buckets.append((size + (dist / path).stat().st_size, files))
+    return [files for _, files in buckets if files]
+
+
+# ═══════════════════════════════════════════════════════════════
+# DEPLOYER
+# ═══════════════════════════════════════════════════════════════
+
+class DeltaDeployer:
+    """Delta deploys and instant rollbacks for one server alias."""
+
+    def __init__(self, alias: str, root: str = DEPLOY_ROOT, streams: int = UPLOAD_STREAMS):
+        self.alias = alias
+        self.root = root.rstrip("/")
+        self.streams = streams
+        self.pool = get_pool()
+        self.live = f"{self.root}/{LIVE_NAME}"
+        self.previous = f"{self.root}/{PREVIOUS_NAME}"
+        self.releases = f"{self.root}/{RELEASES_NAME}"
+
+    def _run(self, script: str, timeout: int = 60) -> str:
+        """Run a remote shell script; DeployError on failure."""
+        try:
+            result = self.pool.run(self.alias, script, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise DeployError(f"{self.alias}: remote step timed out ({timeout}s)")
+        if result.returncode != 0:
+            raise DeployError(f"{self.alias}: remote step failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def remote_manifest(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """(live release path, its manifest) — (None, {}) on a fresh server."""
+        outputs, result = self.pool.run_batch(self.alias, {
+            "live": f"readlink -f {shlex.quote(self.live)}",
+            "manifest": f"cat {shlex.quote(self.live)}/{MANIFEST_NAME}",
+        })
+        if result.returncode == 255:
+            raise DeployError(f"{self.alias}: SSH failed: {result.stderr.strip()}")
+        try:
+            manifest = json.loads(outputs.get("manifest") or "{}")
+        except ValueError:
+            manifest = {}
+        return outputs.get("live", "").strip() or None, manifest
+
+    def _prepare_staging(self, staging: str, seed: bool) -> None:
+        """Create the staging release — a hard-linked copy of the live one if `seed`."""
+        q = shlex.quote
+        self._run(f"""set -e
+mkdir -p {q(self.releases)}
+if [ -d {q(self.live)} ] && [ ! -L {q(self.live)} ]; then
+    # One-time adoption of the pre-delta (scp) directory as a release
+    mv {q(self.live)} {q(self.releases)}/legacy
+    ln -sfn {q(self.releases)}/legacy {q(self.live)}
+fi
+rm -rf {q(staging)}
+if {"true" if seed else "false"} && [ -d {q(self.live)} ]; then
+    cp -al "$(readlink -f {q(self.live)})/." {q(staging)}
+else
+    mkdir -p {q(staging)}
+fi
+rm -f {q(staging)}/{MANIFEST_NAME}""")
+
+    def _delete(self, staging: str, paths: List[str]) -> None:
+        """Unlink paths in staging (NUL-separated over stdin, no ARG_MAX limits)."""
+        if not paths:
+            return
+        proc = self.pool.popen(
+            self.alias, f"cd {shlex.quote(staging)} && xargs -0 rm -f --",
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        _, err = proc.communicate("\0".join(paths).encode(), timeout=60)
+        if proc.returncode != 0:
+            raise DeployError(f"{self.alias}: delete failed: {err.decode(errors='replace').strip()}")
+
+    def _upload(self, staging: str, dist: Path, paths: List[str],
+                extra: Optional[Dict[str, bytes]] = None) -> int:
+        """Stream files as a gzip'd tar into staging. Returns bytes sent."""
+        with tempfile.TemporaryFile() as err:
+            proc = self.pool.popen(
+                self.alias, f"tar xzf - -C {shlex.quote(staging)}",
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=err,
+            )
+            counter = _CountingWriter(proc.stdin)
+            try:
+                with tarfile.open(fileobj=counter, mode="w|gz") as tar:
+                    for path in paths:
+                        tar.add(dist / path, arcname=path, recursive=False)
+                    for name, data in (extra or {}).items():
+                        info = tarfile.TarInfo(name)
+                        info.size = len(data)
+                        info.mtime = int(time.time())
+                        tar.addfile(info, io.BytesIO(data))
+                proc.stdin.close()
+                proc.wait(timeout=UPLOAD_TIMEOUT_SEC)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                proc.kill()
+                raise DeployError(f"{self.alias}: upload failed: {e}")
+            if proc.returncode != 0:
+                err.seek(0)
+                raise DeployError(f"{self.alias}: upload failed: "
+                                  f"{err.read().decode(errors='replace').strip()}")
+        return counter.count
+
+    def _swap(self, target: str) -> None:
+        """Point public_html at `target` atomically; the old target becomes `previous`."""
+        q = shlex.quote
+        self._run(f"""set -e
+cur=$(readlink {q(self.live)} || true)
+ln -sfn {q(target)} {q(self.live)}.next
+mv -T {q(self.live)}.next {q(self.live)}
+if [ -n "$cur" ] && [ "$cur" != {q(target)} ]; then ln -sfn "$cur" {q(self.previous)}; fi""")
+
+    def _prune(self) -> None:
+        """Drop old releases beyond KEEP_RELEASES (never live or previous)."""
+        q = shlex.quote
+        self._run(f"""keep1=$(readlink -f {q(self.live)}); keep2=$(readlink -f {q(self.previous)})
+ls -1dt {q(self.releases)}/*/ 2>/dev/null | sed 's:/$::' | tail -n +{KEEP_RELEASES + 1} |
+while read -r d; do
+    [ "$d" != "$keep1" ] && [ "$d" != "$keep2" ] && rm -rf -- "$d"
+done; true""")
+
+    def deploy(self, dist: Path) -> DeployResult:
+        """Upload what changed in dist/ as a new release and swap it live."""
+        start = time.time()
+        dist = Path(dist)
+        if not dist.is_dir():
+            raise DeployError(f"build output not found: {dist}")
+
+        local = build_manifest(dist)
+        live, remote = self.remote_manifest()
+        changed, removed = diff_manifests(local, remote)
+        if live and not changed and not removed:
+            return DeployResult(release=Path(live).name, uploaded=0, removed=0,
+                                unchanged=len(local), bytes_sent=0,
+                                duration=time.time() - start, previous=None)
+
+        release = f"{time.strftime('%Y%m%d-%H%M%S')}-{manifest_id(local)}"
+        staging = f"{self.releases}/{release}"
+        # No manifest → unknown content (e.g. the scp era): upload everything fresh
+        self._prepare_staging(staging, seed=bool(remote))
+        # Unlink before upload so hard links shared with the live release stay intact
+        self._delete(staging, removed + [p for p in changed if p in remote])
+
+        streams = split_streams(dist, changed, self.streams) or [[]]
+        manifest_bytes = json.dumps(local, indent=1, sort_keys=True).encode()
+        with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+            futures = [
+                executor.submit(self._upload, staging, dist, files,
+                                {MANIFEST_NAME: manifest_bytes} if i == 0 else None)
+                for i, files in enumerate(streams)
+            ]
+            bytes_sent = sum(f.result() for f in futures)
+
+        self._swap(staging)
+        self._prune()
+        return DeployResult(
+            release=release,
+            uploaded=len(changed),
+            removed=len(removed),
+            unchanged=len(local) - len(changed),
+            bytes_sent=bytes_sent,
+            duration=time.time() - start,
+            previous=live,
+        )
+
+    def verify(self, release: str) -> bool:
+        """True if the live symlink points at `release`."""
+        live, _ = self.remote_manifest()
+        return bool(live) and Path(live).name == release
+
+    def rollback(self) -> str:
+        """Swap the previous release back in (no upload). Returns its path."""
+        q = shlex.quote
+        target = self._run(f"readlink {q(self.previous)}").strip()
+        if not target:
+            raise DeployError(f"{self.alias}: no previous release to roll back to")
+        self._swap(target)
+        return target
+
+
+class _CountingWriter:
+    """File-like wrapper counting bytes written (compressed bytes on the wire)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.raw.write(data)
+        self.count += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
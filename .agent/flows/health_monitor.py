@@ -3,30 +3,65 @@
 Smart Server Health Monitor — LangGraph-Ready.
 
 Features:
-- Adaptive timeouts (learns from historical response times)
+- Adaptive timeouts per layer (EWMA + streaming p95/p99, regression flags)
 - Rate limiting (prevents SSH connection flooding)
-- Multi-layer checks: HTTP → TCP → SSH (cheapest first)
+- Multi-layer checks: HTTP → TCP → SSH (cheapest first; TCP via the async reachability scanner)
+- Declarative failure deduction (.agent/deduction-rules.yaml, incremental)
 - State persistence via Redis (if available) or local JSON
+- Metric history in an append-only SQLite time series (1m/1h/1d rollups)
 - Connection pooling awareness (MaxStartups protection)
+- Multiplexed SSH sessions (one handshake per alias per cycle)
+- Concurrent sweeps (servers in parallel, HTTP/TCP fan out per server)
+- Daemon mode: frequent cheap probes, infrequent SSH/evidence, jittered
+- OpenMetrics endpoint (daemon mode) served from a cached snapshot
 
 Design: Each server check is a LangGraph node.
 Flow: HTTP probe → TCP probe → SSH probe → Evidence collect → Alert
 
 This script can run standalone or as a LangGraph graph.
+
+Usage:
+    python health_monitor.py                  # all servers, 4 in parallel
+    python health_monitor.py s61              # single server
+    python health_monitor.py all -c 1         # sequential sweep
+    python health_monitor.py --group web      # inventory group only
+    python health_monitor.py --status         # show saved state
+    python health_monitor.py --daemon         # long-running, scheduled probes
+    python health_monitor.py --daemon --metrics-port 9464   # + /metrics endpoint
 """
 
+import argparse
+import copy
+import heapq
 import json
 import time
-import socket
 import subprocess
 import urllib.request
 import ssl
 import os
+import random
+import signal
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields, asdict
+
+# Shared server-monitor modules (.kilocode/scripts/server-monitor)
+MONITOR_DIR = Path(__file__).resolve().parents[2] / ".kilocode" / "scripts" / "server-monitor"
+sys.path.insert(0, str(MONITOR_DIR))
+from deduction_engine import DeductionEngine, Rule, load_rules
+from inventory import Server, load_inventory
+from latency_estimator import MIN_SAMPLES, LatencyEstimator, timeout_from_p99
+from metrics_exporter import MetricsExporter
+from metrics_store import MetricsStore
+from parsers import EvidenceSample, parse_sample
+from reachability import probe_paths
+from route_cache import get_route_cache
+from ssh_session import get_pool
+from thresholds import sample_alerts, threshold_constants
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -37,42 +72,46 @@ STATE_FILE = Path(os.environ.get(
     "HEALTH_STATE",
     Path.home() / "vscodeportable" / "servers" / "health-state.json"
 ))
+METRICS_FILE = Path(os.environ.get(
+    "HEALTH_METRICS",
+    STATE_FILE.with_name("health-metrics.db")
+))
+DEDUCTION_RULES_FILE = Path(os.environ.get(
+    "HEALTH_RULES",
+    Path(__file__).resolve().parent.parent / "deduction-rules.yaml"
+))
 
 # Rate limits (prevent SSH flooding)
 MAX_SSH_PER_MINUTE = 3          # Max SSH connections per server per minute
 MIN_CHECK_INTERVAL_SEC = 300    # Min 5 minutes between full checks
-ADAPTIVE_TIMEOUT_FACTOR = 2.0  # Multiply historical avg by this for timeout
-
-SERVERS = {
-    "s60": {
-        "name": "Hub/Backup",
-        "ssh_aliases": ["s60pa", "s60pa-pub", "s60pa-int"],
-        "http_urls": [],  # No public websites on s60
-        "tcp_checks": [
-            ("100.111.141.111", 20),
-        ],
-        "base_timeout": 5,
-    },
-    "s61": {
-        "name": "Gateway/Traefik",
-        "ssh_aliases": ["s61pa", "s61pa-pub", "s61pa-int"],
-        "http_urls": ["https://okamih.cz", "https://krtovoj.cz"],
-        "tcp_checks": [
-            ("100.111.141.112", 20),
-        ],
-        "base_timeout": 8,  # s61 is known to be slow (3.5s+ SSH)
-    },
-    "s62": {
-        "name": "Production/Web",
-        "ssh_aliases": ["s62pa", "s62pa-pub", "s62pa-int"],
-        "http_urls": ["https://portfolio.tvoje.info"],
-        "tcp_checks": [
-            ("100.91.164.109", 20),
-        ],
-        "base_timeout": 5,
-    },
+
+# Adaptive timeouts per probe layer (seconds): floor once learned, default until then
+LAYERS = ("http", "tcp", "ssh")
+TIMEOUT_FLOORS = {"http": 3, "tcp": 2, "ssh": 5}
+TIMEOUT_DEFAULTS = {"http": 10, "tcp": 5, "ssh": 10}
+TIMEOUT_HISTORY_SEC = 86400     # Stored latency window used until the estimator warms up
+DEFAULT_CONCURRENCY = 4         # Servers probed in parallel (1 = sequential)
+BATCH_EVIDENCE = True           # Send evidence commands as one framed script
+
+# Daemon mode scheduling
+FAST_CHECK_INTERVAL_SEC = 60    # HTTP/TCP probes
+STATE_FLUSH_INTERVAL_SEC = 60   # Persist in-memory state this often
+JITTER_FRACTION = 0.1           # ±10% spread on every interval
+DAEMON_RETRY_SEC = 5            # Re-queue delay when a server is still busy
+
+# Minimal evidence commands — just enough to detect problems
+QUICK_COMMANDS = {
+    "uptime": "uptime",
+    "disk": "df -h / | tail -1",
+    "memory": "free -h | grep Mem",
+    "failed": "systemctl --failed --no-pager --no-legend 2>/dev/null | head -5",
+    "load": "cat /proc/loadavg",
 }
 
+# Server inventory (.kilocode/scripts/server-monitor/inventory.yaml)
+INVENTORY = load_inventory()
+SERVERS: Dict[str, Server] = INVENTORY.servers
+
 
 # ═══════════════════════════════════════════════════════════════
 # State Management
@@ -83,7 +122,6 @@ class ServerState:
     """Persistent state for one server."""
     name: str
     last_check: str = ""
-    last_ssh_times: List[float] = field(default_factory=list)  # Last 10 SSH round trips
     ssh_count_this_minute: int = 0
     ssh_minute_start: str = ""
     status: str = "unknown"      # up, down, degraded, unknown
@@ -91,21 +129,43 @@ class ServerState:
     tcp_status: str = "unknown"
     ssh_status: str = "unknown"
     alerts: List[str] = field(default_factory=list)
-    avg_ssh_time: float = 5.0    # Adaptive timeout baseline
-
-    def adaptive_timeout(self) -> int:
-        """Calculate adaptive timeout from historical data."""
-        if self.last_ssh_times:
-            avg = sum(self.last_ssh_times) / len(self.last_ssh_times)
-            self.avg_ssh_time = avg
-            return max(5, int(avg * ADAPTIVE_TIMEOUT_FACTOR))
-        return 10
-
-    def record_ssh_time(self, duration: float) -> None:
-        """Record SSH round trip time."""
-        self.last_ssh_times.append(round(duration, 2))
-        if len(self.last_ssh_times) > 10:
-            self.last_ssh_times = self.last_ssh_times[-10:]
+    ssh_alias: str = ""          # Alias that last answered (reused for evidence)
+    latency: Dict[str, LatencyEstimator] = field(
+        default_factory=lambda: {layer: LatencyEstimator() for layer in LAYERS}
+    )
+
+    def __post_init__(self) -> None:
+        """Rebuild estimators loaded from JSON and add any missing layers."""
+        for layer in LAYERS:
+            est = self.latency.get(layer)
+            if est is None:
+                self.latency[layer] = LatencyEstimator()
+            elif isinstance(est, dict):
+                self.latency[layer] = LatencyEstimator.from_dict(est)
+
+    def adaptive_timeout(self, layer: str = "ssh") -> int:
+        """
+        Timeout for a probe layer from its p99.
+
+        Until the in-state estimator has enough samples (fresh or reset
+        state file), the p99 of the stored latency history is used instead;
+        the default applies only when there is no history either.
+        """
+        floor = TIMEOUT_FLOORS[layer]
+        if self.latency[layer].count >= MIN_SAMPLES:
+            return self.latency[layer].timeout(floor, TIMEOUT_DEFAULTS[layer])
+        p99 = get_store().percentile(self.name, f"{layer}_latency", 0.99, TIMEOUT_HISTORY_SEC)
+        if p99 is None:
+            return TIMEOUT_DEFAULTS[layer]
+        return timeout_from_p99(p99, floor)
+
+    def record_latency(self, layer: str, duration: float) -> None:
+        """Feed one round trip into the layer's estimator."""
+        self.latency[layer].update(duration)
+
+    def latency_regressed(self, layer: str) -> bool:
+        """True when the layer has stayed above its historical p95."""
+        return self.latency[layer].regressed
 
     def can_ssh(self) -> bool:
         """Rate limit check — can we SSH right now?"""
@@ -116,8 +176,14 @@ class ServerState:
             self.ssh_count_this_minute = 0
         return self.ssh_count_this_minute < MAX_SSH_PER_MINUTE
 
+    def ssh_budget_remaining(self) -> int:
+        """SSH handshakes still allowed this minute (read-only, for reporting)."""
+        if self.ssh_minute_start != datetime.now().strftime("%Y%m%d%H%M"):
+            return MAX_SSH_PER_MINUTE
+        return max(0, MAX_SSH_PER_MINUTE - self.ssh_count_this_minute)
+
     def record_ssh_attempt(self) -> None:
-        """Record an SSH attempt for rate limiting."""
+        """Record a new SSH handshake for rate limiting (reused sessions are free)."""
         self.ssh_count_this_minute += 1
 
 
@@ -127,8 +193,10 @@ def load_state() -> Dict[str, ServerState]:
     if STATE_FILE.exists():
         try:
             data = json.loads(STATE_FILE.read_text())
+            known = {f.name for f in fields(ServerState)}
             for name, d in data.items():
-                states[name] = ServerState(**d)
+                # Ignore keys from older state formats
+                states[name] = ServerState(**{k: v for k, v in d.items() if k in known})
         except (json.JSONDecodeError, TypeError):
             pass
 
@@ -146,29 +214,42 @@ def save_state(states: Dict[str, ServerState]) -> None:
     STATE_FILE.write_text(json.dumps(data, indent=2))
 
 
+_store: Optional[MetricsStore] = None
+
+
+def get_store() -> MetricsStore:
+    """Get or open the metrics history store."""
+    global _store
+    if _store is None:
+        _store = MetricsStore(METRICS_FILE)
+    return _store
+
+
 # ═══════════════════════════════════════════════════════════════
 # Check Nodes (LangGraph-ready: each is a graph node)
 # ═══════════════════════════════════════════════════════════════
 
-def check_http(server: str, config: dict) -> Tuple[str, List[str]]:
+def check_http(server: str, config: Server, timeout: int = 10) -> Tuple[str, List[str], float]:
     """
     Node 1: HTTP probe — cheapest check, no SSH needed.
-    Returns (status, alerts).
+    Returns (status, alerts, fastest response time).
     """
-    urls = config.get("http_urls", [])
+    urls = config.http_urls
     if not urls:
-        return "skip", []
+        return "skip", [], 0.0
 
     alerts = []
     any_up = False
+    latencies = []
     ctx = ssl.create_default_context()
 
     for url in urls:
         try:
             start = time.time()
             req = urllib.request.Request(url, method="HEAD")
-            r = urllib.request.urlopen(req, timeout=10, context=ctx)
+            r = urllib.request.urlopen(req, timeout=timeout, context=ctx)
             elapsed = time.time() - start
+            latencies.append(elapsed)
             if r.status == 200:
                 any_up = True
                 if elapsed > 5:
@@ -183,110 +264,147 @@ def check_http(server: str, config: dict) -> Tuple[str, List[str]]:
             alerts.append(f"🔴 {url} down: {e}")
 
     status = "up" if any_up else "down"
-    return status, alerts
+    return status, alerts, min(latencies, default=0.0)
 
 
-def check_tcp(server: str, config: dict, timeout: int = 5) -> Tuple[str, List[str]]:
+def check_tcp(server: str, config: Server, timeout: int = 5) -> Tuple[str, List[str], float]:
     """
     Node 2: TCP port probe — checks if SSH port is open.
-    Uses Python socket (cross-platform, no nc/nmap needed).
+    Uses the shared async reachability scanner (same measurement as
+    debug_network.py); all tcp_checks are dialled concurrently.
+    Returns (status, alerts, fastest connect time).
     """
     alerts = []
-    any_up = False
+    latencies = []
 
-    for host, port in config.get("tcp_checks", []):
-        try:
-            start = time.time()
-            s = socket.create_connection((host, port), timeout=timeout)
-            elapsed = time.time() - start
-            s.close()
-            any_up = True
-            if elapsed > 3:
-                alerts.append(f"⚠️ {host}:{port} slow TCP ({elapsed:.1f}s)")
-        except (socket.timeout, ConnectionRefusedError, OSError):
-            alerts.append(f"⚠️ {host}:{port} TCP unreachable (timeout={timeout}s)")
+    outcomes = probe_paths(config.tcp_checks, timeout)
+    for (host, port), (latency, error) in outcomes.items():
+        if latency is None:
+            alerts.append(f"⚠️ {host}:{port} TCP unreachable ({error}, timeout={timeout}s)")
+            continue
+        latencies.append(latency)
+        if latency > 3:
+            alerts.append(f"⚠️ {host}:{port} slow TCP ({latency:.1f}s)")
 
-    status = "up" if any_up else "down"
-    return status, alerts
+    status = "up" if latencies else "down"
+    return status, alerts, min(latencies, default=0.0)
 
 
 def check_ssh(
     server: str,
-    config: dict,
+    config: Server,
     state: ServerState,
     command: str = "echo ok"
 ) -> Tuple[str, List[str], float]:
     """
     Node 3: SSH probe — most expensive check, rate-limited.
-    Uses SSH config aliases with fallback chain.
+    Uses SSH config aliases with fallback chain, ordered by the shared
+    route cache: the last working alias is tried alone, the other routes
+    are probed in parallel only if it fails, and failing routes back off.
+    Runs over the shared session pool: only new handshakes
+    count toward MAX_SSH_PER_MINUTE.
     Returns (status, alerts, duration).
     """
-    if not state.can_ssh():
-        return "rate_limited", [f"⚠️ {server} SSH rate limited ({MAX_SSH_PER_MINUTE}/min)"], 0.0
-
     timeout = state.adaptive_timeout()
-    alerts = []
-
-    for alias in config.get("ssh_aliases", []):
+    pool = get_pool()
+    alerts: List[str] = []
+    results: Dict[str, Any] = {}
+    reused: set = set()
+    flags = {"rate_limited": False, "no_binary": False}
+    lock = threading.Lock()
+
+    def admit(alias: str) -> bool:
+        # Runs on this thread before each probe starts: the only place the budget is charged
+        if pool.is_alive(alias):
+            reused.add(alias)
+            return True
+        if not state.can_ssh():
+            flags["rate_limited"] = True
+            return False
         state.record_ssh_attempt()
-        try:
-            start = time.time()
-            result = subprocess.run(
-                ["ssh", "-o", f"ConnectTimeout={timeout}", "-o", "BatchMode=yes",
-                 alias, command],
-                capture_output=True, text=True, timeout=timeout + 5
-            )
-            elapsed = time.time() - start
-            state.record_ssh_time(elapsed)
+        return True
 
-            if result.returncode == 0 and "ok" in result.stdout:
-                if elapsed > 5:
-                    alerts.append(f"⚠️ {server} SSH slow via {alias} ({elapsed:.1f}s)")
-                return "up", alerts, elapsed
+    def probe(alias: str) -> Optional[bool]:
+        # Worker thread: never touches `state`
+        try:
+            result = pool.run(alias, command, timeout=timeout + 5, connect_timeout=timeout)
         except subprocess.TimeoutExpired:
-            alerts.append(f"⚠️ {server} SSH timeout via {alias} ({timeout}s)")
+            with lock:
+                alerts.append(f"⚠️ {server} SSH timeout via {alias} ({timeout}s)")
+            return False
         except FileNotFoundError:
-            alerts.append(f"🔴 SSH binary not found")
-            return "error", alerts, 0.0
-
+            with lock:
+                flags["no_binary"] = True
+            return None
+        with lock:
+            results[alias] = result
+        return result.returncode == 0 and "ok" in result.stdout
+
+    alias = get_route_cache().resolve(server, config.aliases, probe, admit=admit)
+    with lock:
+        # Probes still running are abandoned; anything they report later is ignored
+        alerts = list(alerts)
+        finished = dict(results)
+        no_binary = flags["no_binary"]
+
+    for name, result in finished.items():
+        if result.handshake:
+            if name in reused:
+                state.record_ssh_attempt()  # Master expired between check and run
+            state.record_latency("ssh", result.duration)
+
+    if alias:
+        state.ssh_alias = alias
+        elapsed = finished[alias].duration
+        if elapsed > 5:
+            alerts.append(f"⚠️ {server} SSH slow via {alias} ({elapsed:.1f}s)")
+        return "up", alerts, elapsed
+    if no_binary:
+        return "error", alerts + [f"🔴 SSH binary not found"], 0.0
+    if flags["rate_limited"]:
+        alerts.append(f"⚠️ {server} SSH rate limited ({MAX_SSH_PER_MINUTE}/min)")
+        return "rate_limited", alerts, 0.0
     return "down", alerts, 0.0
 
 
 def collect_quick_evidence(
     server: str,
-    config: dict,
-    state: ServerState
+    config: Server,
+    state: ServerState,
+    batched: bool = BATCH_EVIDENCE,
 ) -> Optional[Dict[str, str]]:
     """
     Node 4: Quick evidence collection — only runs if SSH is confirmed up.
     Collects minimal diagnostics to avoid overloading the server.
+    Reuses the session opened by check_ssh, so it normally costs
+    no extra handshakes. In batched mode all QUICK_COMMANDS go out
+    as one framed script — a single remote round trip.
     """
-    if state.ssh_status != "up" or not state.can_ssh():
+    alias = state.ssh_alias or config.primary.alias  # Usually Tailscale
+    pool = get_pool()
+    if state.ssh_status != "up" or (pool.needs_handshake(alias) and not state.can_ssh()):
         return None
 
-    alias = config["ssh_aliases"][0]  # Use first (usually Tailscale)
     timeout = state.adaptive_timeout()
-    evidence = {}
 
-    # Minimal commands — just enough to detect problems
-    quick_commands = {
-        "uptime": "uptime",
-        "disk": "df -h / | tail -1",
-        "memory": "free -h | grep Mem",
-        "failed": "systemctl --failed --no-pager --no-legend 2>/dev/null | head -5",
-        "load": "cat /proc/loadavg",
-    }
+    if batched:
+        if pool.needs_handshake(alias):
+            state.record_ssh_attempt()
+        try:
+            outputs, _ = pool.run_batch(alias, QUICK_COMMANDS, timeout=timeout + 5,
+                                        connect_timeout=timeout)
+        except (subprocess.TimeoutExpired, Exception):
+            outputs = {}
+        return {key: outputs.get(key, "timeout") for key in QUICK_COMMANDS}
 
-    for key, cmd in quick_commands.items():
-        if not state.can_ssh():
-            break
-        state.record_ssh_attempt()
+    evidence = {}
+    for key, cmd in QUICK_COMMANDS.items():
+        if pool.needs_handshake(alias):
+            if not state.can_ssh():
+                break
+            state.record_ssh_attempt()
         try:
-            result = subprocess.run(
-                ["ssh", "-o", f"ConnectTimeout={timeout}", "-o", "BatchMode=yes",
-                 alias, cmd],
-                capture_output=True, text=True, timeout=timeout + 5
-            )
+            result = pool.run(alias, cmd, timeout=timeout + 5, connect_timeout=timeout)
             evidence[key] = result.stdout.strip()
         except (subprocess.TimeoutExpired, Exception):
             evidence[key] = "timeout"
@@ -294,160 +412,216 @@ def collect_quick_evidence(
     return evidence
 
 
-def analyze_evidence(evidence: Optional[Dict[str, str]], server: str) -> List[str]:
-    """Node 5: Analyze evidence and generate alerts."""
-    if not evidence:
-        return []
-
-    alerts = []
-
-    # Check disk usage
-    disk = evidence.get("disk", "")
-    if "%" in disk:
-        for part in disk.split():
-            if part.endswith("%"):
-                try:
-                    usage = int(part.rstrip("%"))
-                    if usage > 90:
-                        alerts.append(f"🔴 {server} disk CRITICAL: {usage}%")
-                    elif usage > 80:
-                        alerts.append(f"⚠️ {server} disk WARNING: {usage}%")
-                except ValueError:
-                    pass
-
-    # Check load
-    load = evidence.get("load", "")
-    if load:
-        try:
-            load_1m = float(load.split()[0])
-            if load_1m > 4.0:
-                alerts.append(f"⚠️ {server} high load: {load_1m}")
-        except (ValueError, IndexError):
-            pass
+def analyze_evidence(sample: EvidenceSample, server: str) -> List[str]:
+    """Node 5: Analyze parsed evidence against thresholds.yaml and generate alerts."""
+    return sample_alerts(server, sample)
 
-    # Check failed services
-    failed = evidence.get("failed", "")
-    if failed and failed not in ("", "timeout"):
-        alerts.append(f"🔴 {server} failed services: {failed}")
 
-    return alerts
+def evidence_metrics(evidence: Optional[Dict[str, str]]) -> Dict[str, float]:
+    """Extract numeric metrics from raw quick evidence (parses it — prefer result["evidence_metrics"])."""
+    return parse_sample(evidence).metrics()
 
 
 # ═══════════════════════════════════════════════════════════════
 # Failure Deduction Engine
 # ═══════════════════════════════════════════════════════════════
 
-def deduce_failure_causes(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+_rules: Optional[List[Rule]] = None
+
+
+def get_rules() -> List[Rule]:
+    """Load and compile the deduction rules once per process."""
+    global _rules
+    if _rules is None:
+        _rules = load_rules(DEDUCTION_RULES_FILE, threshold_constants())
+    return _rules
+
+
+def deduction_snapshot(result: Dict[str, Any], metrics: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Flatten one server's result (+ probe metrics) into the fields rules read."""
+    snapshot = {key: result[key] for key in ("status", "http", "tcp", "ssh")}
+    if "evidence_metrics" in result:
+        snapshot.update(result["evidence_metrics"])
+    else:
+        snapshot.update(evidence_metrics(result.get("evidence")))
+    snapshot.update(metrics or {})
+    return snapshot
+
+
+def deduce_failure_causes(
+    results: Dict[str, Any],
+    store: Optional[MetricsStore] = None,
+    metrics: Optional[Dict[str, Dict[str, float]]] = None,
+    before: Optional[float] = None,
+) -> List[Dict[str, Any]]:
     """
     Cross-correlate results across all servers to deduce
     the most likely root cause of failures.
 
-    Logic:
+    One-shot wrapper around DeductionEngine; rules live in
+    .agent/deduction-rules.yaml. Examples of what they encode:
     - If ALL servers fail TCP → local network/firewall issue
-    - If ALL Tailscale servers fail but public works → Tailscale issue
     - If ONE server fails but others work → server-specific issue
     - If HTTP works but SSH fails → SSH-specific (daemon, fail2ban, MaxStartups)
-    - If TCP is slow but works → network congestion or DNS reverse lookup
+    - If SSH is slow in 3 of the last 5 cycles → persistent SSH slowness
+    - If disk usage keeps climbing across the day → something is filling it
+    With a metrics store, trend rules run too and each server's sliding
+    window is seeded from samples recorded before `before` (this cycle's
+    start), so history rules see earlier runs; `metrics` adds per-server
+    probe latencies to the snapshots.
     """
-    deductions = []
-    servers_checked = list(results.keys())
-    if len(servers_checked) < 2:
-        return deductions  # Need 2+ servers for cross-correlation
-
-    # Gather status vectors
-    tcp_statuses = {s: results[s]["tcp"] for s in servers_checked}
-    http_statuses = {s: results[s]["http"] for s in servers_checked}
-    ssh_statuses = {s: results[s]["ssh"] for s in servers_checked}
-
-    tcp_up = [s for s, v in tcp_statuses.items() if v == "up"]
-    tcp_down = [s for s, v in tcp_statuses.items() if v != "up"]
-    ssh_up = [s for s, v in ssh_statuses.items() if v == "up"]
-    ssh_down = [s for s, v in ssh_statuses.items() if v not in ("up", "skipped")]
-    http_up = [s for s, v in http_statuses.items() if v == "up"]
-
-    # Rule 1: All TCP down → local network issue
-    if len(tcp_down) == len(servers_checked) and len(servers_checked) >= 2:
-        deductions.append({
-            "cause": "Local network/firewall issue",
-            "confidence": 90,
-            "reasoning": f"All {len(servers_checked)} servers TCP unreachable → problem is on YOUR side",
-            "fix": "Check: local firewall, VPN connection, network interface, router",
-        })
-
-    # Rule 2: Some TCP up, some down → server-specific
-    elif tcp_up and tcp_down:
-        for s in tcp_down:
-            # Check if this server has HTTP up
-            if http_statuses.get(s) == "up":
-                deductions.append({
-                    "cause": f"{s}: SSH daemon issue (HTTP works, TCP/SSH fails)",
-                    "confidence": 85,
-                    "reasoning": f"{s} serves HTTP (web is UP) but SSH port unreachable → SSH daemon problem",
-                    "fix": f"Check on {s}: sshd_config MaxStartups, fail2ban status, sshd service status, DNS reverse lookup (UseDNS no)",
-                    "likely_causes": [
-                        ("fail2ban blocking your IP", 30),
-                        ("MaxStartups limit reached", 25),
-                        ("UseDNS yes causing slow auth", 20),
-                        ("sshd service not running on port", 15),
-                        ("Tailscale relay (DERP) instead of direct", 10),
-                    ],
-                })
-            else:
-                deductions.append({
-                    "cause": f"{s}: Server-specific network issue",
-                    "confidence": 70,
-                    "reasoning": f"{s} unreachable via TCP while {', '.join(tcp_up)} work fine",
-                    "fix": f"Check: {s} Tailscale status, firewall rules, sshd listening port",
-                })
-
-    # Rule 3: TCP up but SSH slow/down
-    for s in ssh_down:
-        if tcp_statuses.get(s) == "up":
-            deductions.append({
-                "cause": f"{s}: SSH auth/session issue (port open but SSH fails)",
-                "confidence": 75,
-                "reasoning": f"{s} TCP port is open but SSH session can't complete",
-                "fix": f"Check: authorized_keys permissions, PAM config, disk space (88%!), I/O wait",
-                "likely_causes": [
-                    ("Disk full causing slow I/O", 35),
-                    ("PAM module timeout (LDAP/DNS)", 25),
-                    ("High load / swap usage", 20),
-                    ("SSH key mismatch", 10),
-                    ("Connection rate limit in sshd_config", 10),
-                ],
-            })
-
-    # Rule 4: SSH works but very slow
-    for s in ssh_up:
-        evidence = results[s].get("evidence", {})
-        if evidence:
-            # Check if disk is high
-            disk = evidence.get("disk", "")
-            if "%" in disk:
-                for part in disk.split():
-                    if part.endswith("%"):
-                        try:
-                            usage = int(part.rstrip("%"))
-                            if usage > 80:
-                                deductions.append({
-                                    "cause": f"{s}: High disk usage ({usage}%) causing slowness",
-                                    "confidence": 60 + min(usage - 80, 30),
-                                    "reasoning": f"Disk at {usage}% can cause journal/log writes to slow, swap to increase",
-                                    "fix": f"Clean up: docker system prune, log rotation, old backups",
-                                })
-                        except ValueError:
-                            pass
-
-    # Sort by confidence
-    deductions.sort(key=lambda x: x["confidence"], reverse=True)
-    return deductions
+    engine = DeductionEngine(get_rules(), store=store)
+    for server, result in results.items():
+        engine.seed_history(server, before=before)
+        engine.update(server, deduction_snapshot(result, (metrics or {}).get(server)))
+    return engine.deductions()
 
 
 # ═══════════════════════════════════════════════════════════════
 # Main Flow (LangGraph graph equivalent)
 # ═══════════════════════════════════════════════════════════════
 
-def run_health_check(targets: Optional[List[str]] = None) -> Dict[str, Any]:
+def probe_server(
+    server: str,
+    config: Server,
+    state: ServerState,
+    full: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run the probe pipeline for one server.
+
+    HTTP and TCP fan out in parallel (neither touches SSH), then the
+    SSH → Evidence → Analyze chain runs only if the gate allows it.
+    With full=False only the cheap HTTP/TCP layers run and the SSH
+    status from the last full probe is carried over.
+    Output lines are buffered so concurrent sweeps don't interleave.
+    """
+    start = time.time()
+    ssh_est = state.latency["ssh"]
+    http_timeout = state.adaptive_timeout("http")
+    tcp_timeout = state.adaptive_timeout("tcp")
+    lines = [
+        f"\n{'='*50}",
+        f"Checking {server} ({config.purpose})",
+        f"  Adaptive timeouts: HTTP={http_timeout}s TCP={tcp_timeout}s SSH={state.adaptive_timeout('ssh')}s",
+        f"  SSH latency: ewma={ssh_est.ewma:.1f}s p95={ssh_est.p95.value:.1f}s jitter={ssh_est.jitter:.2f}s",
+        f"  SSH budget: {state.ssh_budget_remaining()}/{MAX_SSH_PER_MINUTE}",
+    ]
+    alerts = []
+
+    # Node 1 + 2: HTTP and TCP probes (independent, run side by side)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        http_future = pool.submit(check_http, server, config, http_timeout)
+        tcp_future = pool.submit(check_tcp, server, config, tcp_timeout)
+        http_status, http_alerts, http_time = http_future.result()
+        tcp_status, tcp_alerts, tcp_time = tcp_future.result()
+
+    state.http_status = http_status
+    state.tcp_status = tcp_status
+    alerts.extend(http_alerts)
+    alerts.extend(tcp_alerts)
+    metrics = {}
+    if http_time:
+        metrics["http_latency"] = http_time
+        state.record_latency("http", http_time)
+    if tcp_time:
+        metrics["tcp_latency"] = tcp_time
+        state.record_latency("tcp", tcp_time)
+    lines.append(f"  HTTP: {http_status} (timeout={http_timeout}s)")
+    lines.append(f"  TCP:  {tcp_status} (timeout={tcp_timeout}s)")
+
+    if not full:
+        if state.ssh_status == "up" and tcp_status == "up":
+            pass  # Nothing new to say — keep the status from the last full probe
+        elif http_status == "up":
+            state.status = "degraded"
+        else:
+            state.status = "down"
+        get_store().record(server, metrics)
+        state.last_check = datetime.now().isoformat()
+        duration = time.time() - start
+        lines.append(f"  Took: {duration:.1f}s (fast probe)")
+        return {
+            "result": {
+                "status": state.status,
+                "http": state.http_status,
+                "tcp": state.tcp_status,
+                "ssh": state.ssh_status,
+                "evidence": None,
+                "evidence_metrics": {},
+                "alerts": state.alerts,
+            },
+            "alerts": alerts,
+            "lines": lines,
+            "duration": duration,
+            "metrics": metrics,
+        }
+
+    # Node 3: SSH check (only if TCP shows port is open, or HTTP is down)
+    if tcp_status == "up" or http_status == "down":
+        ssh_status, ssh_alerts, ssh_time = check_ssh(server, config, state)
+        state.ssh_status = ssh_status
+        if ssh_status == "up":
+            metrics["ssh_latency"] = ssh_time
+        alerts.extend(ssh_alerts)
+        lines.append(f"  SSH:  {ssh_status} ({ssh_time:.1f}s)")
+    else:
+        state.ssh_status = "skipped"
+        lines.append(f"  SSH:  skipped (TCP unreachable, HTTP {http_status})")
+
+    for layer in LAYERS:
+        if state.latency_regressed(layer):
+            est = state.latency[layer]
+            alerts.append(f"⚠️ {server} {layer.upper()} latency regression "
+                          f"(ewma {est.ewma:.2f}s > p95 {est.p95.value:.2f}s)")
+
+    # Node 4: Quick evidence (only if SSH works)
+    evidence = None
+    if state.ssh_status == "up":
+        evidence = collect_quick_evidence(server, config, state)
+
+    # Node 5: Analyze (evidence is parsed once; alerts, metrics and rules share it)
+    sample = parse_sample(evidence)
+    evidence_alerts = analyze_evidence(sample, server)
+    alerts.extend(evidence_alerts)
+    state.alerts = evidence_alerts
+    evidence_values = sample.metrics()
+    metrics.update(evidence_values)
+    get_store().record(server, metrics)
+
+    # Determine overall status
+    if state.ssh_status == "up":
+        state.status = "up" if not evidence_alerts else "degraded"
+    elif state.http_status == "up":
+        state.status = "degraded"  # Web works but SSH doesn't
+    else:
+        state.status = "down"
+
+    state.last_check = datetime.now().isoformat()
+    duration = time.time() - start
+    lines.append(f"  Took: {duration:.1f}s")
+
+    return {
+        "result": {
+            "status": state.status,
+            "http": state.http_status,
+            "tcp": state.tcp_status,
+            "ssh": state.ssh_status,
+            "evidence": evidence,
+            "evidence_metrics": evidence_values,
+            "alerts": state.alerts,
+        },
+        "alerts": alerts,
+        "lines": lines,
+        "duration": duration,
+        "metrics": metrics,
+    }
+
+
+def run_health_check(
+    targets: Optional[List[str]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> Dict[str, Any]:
     """
     Main health check flow.
 
@@ -456,79 +630,46 @@ def run_health_check(targets: Optional[List[str]] = None) -> Dict[str, Any]:
 
     Each step is conditional — if HTTP confirms service is up,
     we can skip SSH for that check cycle (saves rate limit budget).
+
+    Servers are probed concurrently (up to `concurrency` at once).
+    Each server owns its ServerState, so the per-server SSH budget
+    holds regardless of how many servers run in parallel.
     """
     states = load_state()
     results = {}
     all_alerts = []
 
     targets = targets or list(SERVERS.keys())
+    workers = max(1, min(concurrency, len(targets)))
 
+    sweep_start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            server: pool.submit(probe_server, server, SERVERS[server], states[server])
+            for server in targets
+        }
+        probes = {server: future.result() for server, future in futures.items()}
+    sweep_time = time.time() - sweep_start
+
+    # Report in target order, not completion order
     for server in targets:
-        config = SERVERS[server]
-        state = states[server]
+        probe = probes[server]
+        print("\n".join(probe["lines"]))
+        results[server] = probe["result"]
+        all_alerts.extend(probe["alerts"])
 
-        print(f"\n{'='*50}")
-        print(f"Checking {server} ({config['name']})")
-        print(f"  Adaptive timeout: {state.adaptive_timeout()}s")
-        print(f"  Avg SSH time: {state.avg_ssh_time:.1f}s")
-        print(f"  SSH budget: {MAX_SSH_PER_MINUTE - state.ssh_count_this_minute}/{MAX_SSH_PER_MINUTE}")
-
-        # Node 1: HTTP check (cheapest)
-        http_status, http_alerts = check_http(server, config)
-        state.http_status = http_status
-        all_alerts.extend(http_alerts)
-        print(f"  HTTP: {http_status}")
-
-        # Node 2: TCP check
-        tcp_timeout = state.adaptive_timeout()
-        tcp_status, tcp_alerts = check_tcp(server, config, timeout=tcp_timeout)
-        state.tcp_status = tcp_status
-        all_alerts.extend(tcp_alerts)
-        print(f"  TCP:  {tcp_status} (timeout={tcp_timeout}s)")
-
-        # Node 3: SSH check (only if TCP shows port is open, or HTTP is down)
-        if tcp_status == "up" or http_status == "down":
-            ssh_status, ssh_alerts, ssh_time = check_ssh(server, config, state)
-            state.ssh_status = ssh_status
-            all_alerts.extend(ssh_alerts)
-            print(f"  SSH:  {ssh_status} ({ssh_time:.1f}s)")
-        else:
-            state.ssh_status = "skipped"
-            print(f"  SSH:  skipped (TCP unreachable, HTTP {http_status})")
-
-        # Node 4: Quick evidence (only if SSH works)
-        evidence = None
-        if state.ssh_status == "up":
-            evidence = collect_quick_evidence(server, config, state)
-
-        # Node 5: Analyze
-        evidence_alerts = analyze_evidence(evidence, server)
-        all_alerts.extend(evidence_alerts)
-        state.alerts = evidence_alerts
-
-        # Determine overall status
-        if state.ssh_status == "up":
-            state.status = "up" if not evidence_alerts else "degraded"
-        elif state.http_status == "up":
-            state.status = "degraded"  # Web works but SSH doesn't
-        else:
-            state.status = "down"
-
-        state.last_check = datetime.now().isoformat()
-        results[server] = {
-            "status": state.status,
-            "http": state.http_status,
-            "tcp": state.tcp_status,
-            "ssh": state.ssh_status,
-            "evidence": evidence,
-            "alerts": state.alerts,
-        }
+    serial_time = sum(p["duration"] for p in probes.values())
+    print(f"\n⏱️  Sweep: {sweep_time:.1f}s wall-clock, {serial_time:.1f}s serial "
+          f"(saved {max(serial_time - sweep_time, 0.0):.1f}s, workers={workers})")
 
     # Save state (persist adaptive timeout history)
     save_state(states)
+    get_store().prune()
 
     # Run deduction engine
-    deductions = deduce_failure_causes(results)
+    deductions = deduce_failure_causes(results, store=get_store(),
+                                       metrics={s: p["metrics"] for s, p in probes.items()},
+                                       before=sweep_start)
 
     # Print summary
     print(f"\n{'='*50}")
@@ -558,29 +699,254 @@ def run_health_check(targets: Optional[List[str]] = None) -> Dict[str, Any]:
                     bar = "█" * (pct // 5) + "░" * (6 - pct // 5)
                     print(f"        {bar} {pct}% {cause}")
 
-    return {"results": results, "alerts": all_alerts, "deductions": deductions}
+    return {
+        "results": results,
+        "alerts": all_alerts,
+        "deductions": deductions,
+        "timing": {"wall": round(sweep_time, 2), "serial": round(serial_time, 2), "workers": workers},
+    }
 
 
-def main() -> None:
-    """CLI entry point."""
-    targets = None
-    if len(sys.argv) > 1:
-        arg = sys.argv[1]
-        if arg in SERVERS:
-            targets = [arg]
-        elif arg == "all":
-            targets = None
-        elif arg == "--status":
-            # Just show saved state
-            states = load_state()
-            for name, state in states.items():
-                print(f"{name}: {state.status} (last={state.last_check}, avg_ssh={state.avg_ssh_time:.1f}s)")
+# ═══════════════════════════════════════════════════════════════
+# Daemon Mode (in-process scheduler)
+# ═══════════════════════════════════════════════════════════════
+
+class HealthDaemon:
+    """
+    Long-running monitor: state stays in memory, probes run on a schedule.
+
+    Two jobs per server:
+    - fast: HTTP + TCP only, every `fast_interval` seconds
+    - full: full pipeline incl. SSH + evidence, every `full_interval`
+      seconds (never more often than MIN_CHECK_INTERVAL_SEC)
+
+    Every run is rescheduled with ±JITTER_FRACTION jitter, and first
+    runs are spread over the first JITTER_FRACTION of each interval,
+    so servers don't all probe at the same instant. State is flushed
+    to disk every `flush_interval` seconds and on shutdown.
+
+    With an exporter, every finished probe refreshes the cached
+    OpenMetrics snapshot that /metrics serves.
+    """
+
+    def __init__(
+        self,
+        targets: Optional[List[str]] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        fast_interval: int = FAST_CHECK_INTERVAL_SEC,
+        full_interval: int = MIN_CHECK_INTERVAL_SEC,
+        flush_interval: int = STATE_FLUSH_INTERVAL_SEC,
+        exporter: Optional[MetricsExporter] = None,
+    ):
+        self.targets = targets or list(SERVERS.keys())
+        self.concurrency = max(1, concurrency)
+        self.intervals = {
+            "fast": fast_interval,
+            "full": max(full_interval, MIN_CHECK_INTERVAL_SEC),
+        }
+        self.flush_interval = flush_interval
+        self.exporter = exporter
+        self.states = load_state()
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.deductions: List[Dict[str, Any]] = []
+        self.engine = DeductionEngine(get_rules(), store=get_store())
+        started = time.time()
+        for server in self.targets:
+            self.engine.seed_history(server, before=started)
+        self._queue: List[Tuple[float, str, str]] = []
+        self._busy: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _jittered(self, interval: float) -> float:
+        """Interval with ±JITTER_FRACTION random spread."""
+        return interval * (1 + random.uniform(-JITTER_FRACTION, JITTER_FRACTION))
+
+    def _schedule(self, when: float, server: str, kind: str) -> None:
+        heapq.heappush(self._queue, (when, server, kind))
+
+    def _on_done(self, server: str, kind: str, probe: Dict[str, Any], state: ServerState) -> None:
+        """Merge a finished probe (and the state copy it updated) into the in-memory snapshot."""
+        with self._lock:
+            self._busy.discard(server)
+            self.states[server] = state
+            result = dict(probe["result"])
+            if kind == "fast" and server in self.results:
+                # Fast probes carry no evidence — keep the last full one
+                result["evidence"] = self.results[server].get("evidence")
+            self.results[server] = result
+            # Only full probes advance the rule engine's sliding window
+            self.engine.update(server, deduction_snapshot(result, probe["metrics"]),
+                               new_cycle=(kind == "full"))
+            self.deductions = self.engine.deductions()
+            if self.exporter is not None:
+                self._export(server, probe)
+
+        ts = datetime.now().strftime("%H:%M:%S")
+        print(f"[{ts}] {server} {kind}: {result['status']} "
+              f"(HTTP={result['http']} TCP={result['tcp']} SSH={result['ssh']}) "
+              f"{probe['duration']:.1f}s")
+        for alert in probe["alerts"]:
+            print(f"           {alert}")
+
+    def _export(self, server: str, probe: Dict[str, Any]) -> None:
+        """Feed one probe into the exporter and republish the snapshot (caller holds _lock)."""
+        exporter = self.exporter
+        for layer in LAYERS:
+            value = probe["metrics"].get(f"{layer}_latency")
+            if value is not None:
+                exporter.observe("health_probe_latency_seconds",
+                                 {"server": server, "layer": layer}, value)
+
+        status, layer_up, budget, timeouts, p99, evidence = [], [], [], [], [], []
+        for name, result in self.results.items():
+            state = self.states[name]
+            for value in ("up", "degraded", "down", "unknown"):
+                status.append(({"server": name, "status": value}, int(result["status"] == value)))
+            for layer in LAYERS:
+                labels = {"server": name, "layer": layer}
+                layer_up.append((labels, int(result[layer] == "up")))
+                timeouts.append((labels, state.adaptive_timeout(layer)))
+                p99.append((labels, state.latency[layer].p99.value))
+            budget.append(({"server": name}, state.ssh_budget_remaining()))
+            for metric, value in result.get("evidence_metrics", {}).items():
+                evidence.append(({"server": name, "metric": metric}, value))
+
+        exporter.set_gauges("health_server_status", "Overall server status (1 = current state)", status)
+        exporter.set_gauges("health_probe_up", "Probe layer reported up", layer_up)
+        exporter.set_gauges("health_ssh_budget_remaining", "SSH handshakes left this minute", budget)
+        exporter.set_gauges("health_adaptive_timeout_seconds", "Current adaptive timeout per layer", timeouts)
+        exporter.set_gauges("health_latency_p99_seconds", "Streaming p99 latency estimate per layer", p99)
+        exporter.set_gauges("health_evidence_value", "Latest evidence-derived value (disk %, load)", evidence)
+        exporter.set_gauges("health_deduction_confidence", "Failure deduction confidence (%)",
+                            [({"cause": d["cause"]}, d["confidence"]) for d in self.deductions])
+        exporter.publish()
+
+    def _run_job(self, server: str, kind: str) -> None:
+        # Probe a private copy so flush()/_export never see a state mid-update
+        with self._lock:
+            state = copy.deepcopy(self.states[server])
+        try:
+            probe = probe_server(server, SERVERS[server], state, full=(kind == "full"))
+        except Exception as e:
+            with self._lock:
+                self._busy.discard(server)
+                self.states[server] = state  # Keep SSH budget accounting
+            print(f"🔴 {server} {kind} probe crashed: {e}")
             return
-        else:
-            print(f"Usage: {sys.argv[0]} [s60|s61|s62|all|--status]")
-            sys.exit(1)
+        self._on_done(server, kind, probe, state)
 
-    run_health_check(targets)
+    def flush(self) -> None:
+        """Persist in-memory state (a failed flush is retried on the next interval)."""
+        try:
+            with self._lock:
+                save_state(self.states)
+            get_store().prune()
+        except Exception as e:
+            print(f"⚠️ State flush failed, retrying next interval: {e}")
+
+    def stop(self, *_: Any) -> None:
+        """Ask the scheduler loop to exit (usable as a signal handler)."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Scheduler loop — runs until stop() is called."""
+        now = time.time()
+        for server in self.targets:
+            for kind, interval in self.intervals.items():
+                self._schedule(now + random.uniform(0, interval * JITTER_FRACTION), server, kind)
+        next_flush = now + self.flush_interval
+        if self.exporter is not None:
+            self.exporter.describe_histogram("health_probe_latency_seconds",
+                                             "Probe round-trip latency per layer")
+
+        print(f"Health daemon: {', '.join(self.targets)} | fast every {self.intervals['fast']}s, "
+              f"full every {self.intervals['full']}s, workers={self.concurrency}")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while not self._stop.is_set():
+                now = time.time()
+                while self._queue and self._queue[0][0] <= now:
+                    _, server, kind = heapq.heappop(self._queue)
+                    with self._lock:
+                        busy = server in self._busy
+                        if not busy:
+                            self._busy.add(server)
+                    if busy:
+                        # Previous probe still running — retry shortly
+                        self._schedule(now + DAEMON_RETRY_SEC, server, kind)
+                        continue
+                    pool.submit(self._run_job, server, kind)
+                    self._schedule(now + self._jittered(self.intervals[kind]), server, kind)
+
+                if now >= next_flush:
+                    self.flush()
+                    next_flush = now + self.flush_interval
+
+                wake = min(self._queue[0][0] if self._queue else next_flush, next_flush)
+                self._stop.wait(max(0.0, wake - time.time()))
+
+        self.flush()
+        get_pool().close_all()
+        if self.exporter is not None:
+            self.exporter.stop()
+        print("Health daemon stopped, state flushed.")
+
+
+def main() -> None:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Smart Server Health Monitor")
+    parser.add_argument("target", nargs="?", default="all",
+                        choices=list(SERVERS.keys()) + ["all"],
+                        help="Server to check (default: all)")
+    parser.add_argument("--group", "-g", choices=sorted(INVENTORY.groups),
+                        help="Only check servers in this inventory group")
+    parser.add_argument("--status", action="store_true",
+                        help="Show saved state without probing")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Servers probed in parallel (default: {DEFAULT_CONCURRENCY}, 1 = sequential)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run continuously with an in-process scheduler")
+    parser.add_argument("--fast-interval", type=int, default=FAST_CHECK_INTERVAL_SEC,
+                        help=f"Daemon: seconds between HTTP/TCP probes (default: {FAST_CHECK_INTERVAL_SEC})")
+    parser.add_argument("--full-interval", type=int, default=MIN_CHECK_INTERVAL_SEC,
+                        help=f"Daemon: seconds between SSH/evidence probes (min/default: {MIN_CHECK_INTERVAL_SEC})")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Daemon: serve OpenMetrics on this port at /metrics (0 = off)")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Daemon: bind address for the metrics endpoint")
+    args = parser.parse_args()
+
+    if args.status:
+        # Just show saved state
+        states = load_state()
+        for name, state in states.items():
+            ssh_est = state.latency["ssh"]
+            print(f"{name}: {state.status} (last={state.last_check}, "
+                  f"ssh ewma={ssh_est.ewma:.1f}s p95={ssh_est.p95.value:.1f}s)")
+        return
+
+    names = None if args.target == "all" else [args.target]
+    targets = [s.name for s in INVENTORY.select(names, group=args.group)]
+    if not targets:
+        print(f"No servers match target={args.target} group={args.group}")
+        sys.exit(1)
+    if args.daemon:
+        exporter = None
+        if args.metrics_port:
+            exporter = MetricsExporter()
+            exporter.start(args.metrics_port, host=args.metrics_host)
+            print(f"OpenMetrics: http://{args.metrics_host}:{args.metrics_port}/metrics")
+        daemon = HealthDaemon(targets, concurrency=args.concurrency,
+                              fast_interval=args.fast_interval,
+                              full_interval=args.full_interval,
+                              exporter=exporter)
+        signal.signal(signal.SIGINT, daemon.stop)
+        signal.signal(signal.SIGTERM, daemon.stop)
+        daemon.run()
+        return
+
+    run_health_check(targets, concurrency=args.concurrency)
 
 
 if __name__ == "__main__":
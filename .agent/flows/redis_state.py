@@ -0,0 +1,337 @@
+"""
+Redis-backed state for the server_ops LangGraph flows.
+
+- RedisCheckpointSaver: LangGraph checkpointer that persists graph state
+  (and the pending writes of parallel branches) after every node, so an
+  interrupted sweep or deploy resumes at the node that failed.
+- EvidenceCache: per-server evidence with a short TTL, so repeated
+  sweeps inside the window skip SSH entirely.
+
+All keys live under the project namespace (`marketing_tvoje_info:`).
+If the `redis` package is missing or the server is unreachable, both
+fall back to in-process storage (MemorySaver / a dict) — flows still
+run, they just don't survive a restart.
+
+Usage:
+    from redis_state import get_checkpointer, get_evidence_cache
+
+    graph = builder.compile(checkpointer=get_checkpointer())
+    graph.invoke(inputs, {"configurable": {"thread_id": "evidence:s60pa"}})
+"""
+
+import base64
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+try:
+    import redis
+except ImportError:  # Optional — in-process fallback below
+    redis = None
+
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379")
+NAMESPACE = "marketing_tvoje_info"
+CHECKPOINT_TTL_SEC = 7 * 86400      # Resumable window for interrupted runs
+EVIDENCE_CACHE_TTL_SEC = 120        # Repeated sweeps inside this window reuse evidence
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data.encode("ascii"))
+
+
+def _glob_escape(text: str) -> str:
+    """Escape Redis MATCH glob characters so text only matches itself."""
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
+
+
+def _write_order(field_name: bytes) -> Tuple[str, int]:
+    """Sort key for "{task}:{idx}" write fields: task, then idx numerically."""
+    task_id, _, idx = field_name.decode().rpartition(":")
+    return task_id, int(idx)
+
+
+# ═══════════════════════════════════════════════════════════════
+# CHECKPOINTER
+# ═══════════════════════════════════════════════════════════════
+
+class RedisCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer storing each checkpoint as a Redis hash.
+
+    Keys (all expire after CHECKPOINT_TTL_SEC):
+        {ns}:checkpoint:{thread}:{cp_ns}:{id}   hash: checkpoint, metadata, parent
+        {ns}:checkpoints:{thread}:{cp_ns}       zset of ids, scored by write time
+        {ns}:writes:{thread}:{cp_ns}:{id}       hash: "{task}:{idx}" → pending write
+    """
+
+    def __init__(self, client: Any, namespace: str = NAMESPACE, ttl: int = CHECKPOINT_TTL_SEC):
+        super().__init__()
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def _key(self, kind: str, thread_id: str, checkpoint_ns: str, checkpoint_id: str = "") -> str:
+        parts = [self.namespace, kind, thread_id, checkpoint_ns]
+        if checkpoint_id:
+            parts.append(checkpoint_id)
+        return ":".join(parts)
+
+    def _dump(self, value: Any) -> str:
+        kind, data = self.serde.dumps_typed(value)
+        return json.dumps([kind, _b64(data)])
+
+    def _load(self, raw: bytes) -> Any:
+        kind, data = json.loads(raw)
+        return self.serde.loads_typed((kind, _unb64(data)))
+
+    def put(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        """Persist one checkpoint; returns the config pointing at it."""
+        conf = config["configurable"]
+        thread_id = conf["thread_id"]
+        checkpoint_ns = conf.get("checkpoint_ns", "")
+        key = self._key("checkpoint", thread_id, checkpoint_ns, checkpoint["id"])
+        index = self._key("checkpoints", thread_id, checkpoint_ns)
+
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={
+            "checkpoint": self._dump(checkpoint),
+            "metadata": self._dump(metadata),
+            "parent": conf.get("checkpoint_id") or "",
+        })
+        pipe.expire(key, self.ttl)
+        pipe.zadd(index, {checkpoint["id"]: time.time()})
+        pipe.expire(index, self.ttl)
+        pipe.execute()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        Persist a task's writes so finished parallel branches aren't redone on resume.
+
+        Special channels (errors, interrupts, ...) use LangGraph's fixed
+        negative WRITES_IDX_MAP index and overwrite; regular writes keep
+        their position and the first stored value wins, as in MemorySaver.
+        """
+        if not writes:
+            return
+        conf = config["configurable"]
+        key = self._key("writes", conf["thread_id"], conf.get("checkpoint_ns", ""),
+                        conf["checkpoint_id"])
+        pipe = self.client.pipeline()
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            field_name = f"{task_id}:{idx}"
+            payload = json.dumps([task_id, channel, self._dump(value)])
+            if idx < 0:
+                pipe.hset(key, field_name, payload)
+            else:
+                pipe.hsetnx(key, field_name, payload)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        stored = self.client.hgetall(self._key("checkpoint", thread_id, checkpoint_ns, checkpoint_id))
+        if not stored:
+            return None
+        writes = self.client.hgetall(self._key("writes", thread_id, checkpoint_ns, checkpoint_id))
+        pending = []
+        for field_name in sorted(writes, key=_write_order):
+            task_id, channel, value = json.loads(writes[field_name])
+            pending.append((task_id, channel, self._load(value)))
+
+        parent = stored[b"parent"].decode()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self._load(stored[b"checkpoint"]),
+            metadata=self._load(stored[b"metadata"]),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent,
+            }} if parent else None,
+            pending_writes=pending,
+        )
+
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        """The requested checkpoint, or the thread's latest one."""
+        conf = config["configurable"]
+        thread_id = conf["thread_id"]
+        checkpoint_ns = conf.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            latest = self.client.zrevrange(self._key("checkpoints", thread_id, checkpoint_ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = latest[0].decode()
+        return self._tuple(thread_id, checkpoint_ns, checkpoint_id)
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints of one thread, newest first."""
+        if not config:
+            return
+        conf = config["configurable"]
+        thread_id = conf["thread_id"]
+        checkpoint_ns = conf.get("checkpoint_ns", "")
+        before_id = get_checkpoint_id(before) if before else None
+
+        ids = [i.decode() for i in
+               self.client.zrevrange(self._key("checkpoints", thread_id, checkpoint_ns), 0, -1)]
+        if before_id in ids:
+            ids = ids[ids.index(before_id) + 1:]
+
+        yielded = 0
+        for checkpoint_id in ids:
+            found = self._tuple(thread_id, checkpoint_ns, checkpoint_id)
+            if found is None:
+                continue
+            if filter and any(found.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield found
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Drop every checkpoint, checkpoint index and write of a thread."""
+        keys = []
+        for kind in ("checkpoint", "checkpoints", "writes"):
+            pattern = _glob_escape(self._key(kind, thread_id, "")) + "*"
+            keys.extend(self.client.scan_iter(match=pattern))
+        if keys:
+            self.client.delete(*keys)
+
+
+# ═══════════════════════════════════════════════════════════════
+# EVIDENCE CACHE
+# ═══════════════════════════════════════════════════════════════
+
+class EvidenceCache:
+    """Per-server evidence with a TTL (Redis, or an in-process dict)."""
+
+    def __init__(self, client: Any = None, namespace: str = NAMESPACE, ttl: int = EVIDENCE_CACHE_TTL_SEC):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, server: str) -> str:
+        return f"{self.namespace}:evidence:{server}"
+
+    def get(self, server: str) -> Optional[Dict[str, str]]:
+        """Cached evidence for a server, or None if absent/expired."""
+        if self.client is not None:
+            try:
+                raw = self.client.get(self._key(server))
+                return json.loads(raw) if raw else None
+            except redis.RedisError:
+                return None
+        with self._lock:
+            hit = self._local.get(server)
+        if hit and time.time() - hit[0] < self.ttl:
+            return hit[1]
+        return None
+
+    def set(self, server: str, evidence: Dict[str, str]) -> None:
+        """Store evidence for a server (expires after the TTL)."""
+        if self.client is not None:
+            try:
+                self.client.set(self._key(server), json.dumps(evidence), ex=self.ttl)
+            except redis.RedisError:
+                pass  # Cache is an optimisation only
+            return
+        with self._lock:
+            self._local[server] = (time.time(), evidence)
+
+
+# ═══════════════════════════════════════════════════════════════
+# SHARED CONNECTION
+# ═══════════════════════════════════════════════════════════════
+
+_client: Any = None
+_client_checked = False
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_evidence_cache: Optional[EvidenceCache] = None
+
+
+def get_redis() -> Any:
+    """Shared Redis client, or None if redis is unavailable."""
+    global _client, _client_checked
+    if not _client_checked:
+        _client_checked = True
+        if redis is None:
+            print("⚠️  redis package not installed — using in-process state", file=sys.stderr)
+        else:
+            try:
+                client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=2)
+                client.ping()
+                _client = client
+            except redis.RedisError as e:
+                print(f"⚠️  Redis unavailable at {REDIS_URL} ({e}) — using in-process state",
+                      file=sys.stderr)
+    return _client
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Get or create the shared checkpointer (Redis, else in-memory)."""
+    global _checkpointer
+    if _checkpointer is None:
+        client = get_redis()
+        _checkpointer = RedisCheckpointSaver(client) if client is not None else MemorySaver()
+    return _checkpointer
+
+
+def get_evidence_cache() -> EvidenceCache:
+    """Get or create the shared evidence cache."""
+    global _evidence_cache
+    if _evidence_cache is None:
+        _evidence_cache = EvidenceCache(get_redis())
+    return _evidence_cache
@@ -4,27 +4,78 @@ LangGraph Server Operations Flow Template
 Safe, stateful flows for server evidence collection,
 deployment, and infrastructure management.
 
-Uses Redis for checkpointing (shared-redis on localhost:6379).
+run_evidence_flow/run_deploy_flow checkpoint in Redis (shared-redis on
+localhost:6379): graph state is persisted after every node under the
+`marketing_tvoje_info:` namespace, so an interrupted sweep or deploy
+resumes at the node that failed (see redis_state.py). The bare
+create_*_graph() builders compile without a checkpointer. Per-server evidence is cached for
+EVIDENCE_CACHE_TTL_SEC, so repeated sweeps inside that window skip SSH.
+
+Evidence collection fans out with LangGraph's Send: one branch per
+server, all running in the same superstep, each sending its commands
+as a single batch over a multiplexed SSH connection
+(.kilocode/scripts/server-monitor/ssh_session.py). A sweep takes as
+long as the slowest server, not the sum of all of them.
 """
 
-from typing import TypedDict, Annotated, Literal
-from langgraph.graph import StateGraph, END
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TypedDict, Annotated, Literal, Optional
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 import subprocess
 import json
+import operator
+import sys
+import time
 from datetime import datetime
 
+# Shared server-monitor modules (.kilocode/scripts/server-monitor)
+MONITOR_DIR = Path(__file__).resolve().parents[2] / ".kilocode" / "scripts" / "server-monitor"
+sys.path.insert(0, str(MONITOR_DIR))
+from parsers import parse_sample
+from ssh_session import get_pool
+from thresholds import sample_alerts
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from redis_state import get_checkpointer, get_evidence_cache
+from delta_deploy import DeltaDeployer, DeployError
+from stage_cache import get_stage_cache
+
+
+# Read-only evidence commands, sent to each server as one batch
+EVIDENCE_COMMANDS = {
+    "uptime": "uptime -p",
+    "disk": "df -h / | tail -1",
+    "memory": "free -h | grep Mem",
+    "load": "cat /proc/loadavg",
+    "docker": "docker ps --format '{{.Names}}|{{.Status}}' 2>/dev/null || echo 'no docker'",
+    "failed_services": "systemctl --failed --no-pager --no-legend 2>/dev/null || echo 'none'",
+    "listening_ports": "ss -tlnp | grep LISTEN | head -20",
+}
+
+
+def merge_evidence(current: dict, update: dict) -> dict:
+    """Reducer: merge per-server evidence from parallel branches."""
+    return {**(current or {}), **(update or {})}
+
 
 # --- State Definitions ---
 
 class ServerEvidenceState(TypedDict):
     """State for server evidence collection flow."""
     servers: list[str]  # SSH aliases: ["s60pa", "s61pa", "s62pa"]
-    evidence: dict  # {server: {data}}
+    evidence: Annotated[dict, merge_evidence]  # {server: {data}}
     errors: list[str]
     timestamp: str
     output_path: str
 
 
+class ServerTask(TypedDict):
+    """Payload sent to one fan-out branch."""
+    server: str
+
+
 class DeployState(TypedDict):
     """State for safe deployment flow."""
     project: str
@@ -34,7 +85,10 @@ class DeployState(TypedDict):
     tests_ok: bool
     deploy_ok: bool
     rollback_needed: bool
-    errors: list[str]
+    release: str  # Release id now live on target_server
+    rolled_back: str  # Release restored by rollback_step ("" if no rollback ran)
+    cached_stages: Annotated[list[str], operator.add]  # Stages skipped via the stage cache
+    errors: Annotated[list[str], operator.add]  # build and lint run in parallel
 
 
 # --- Server Evidence Collection Flow ---
@@ -49,63 +103,52 @@ def init_evidence(state: ServerEvidenceState) -> dict:
 
 
 def collect_from_server(state: ServerEvidenceState, server: str) -> dict:
-    """Collect evidence from a single server via SSH."""
-    commands = {
-        "uptime": "uptime -p",
-        "disk": "df -h / | tail -1",
-        "memory": "free -h | grep Mem",
-        "load": "cat /proc/loadavg",
-        "docker": "docker ps --format '{{.Names}}|{{.Status}}' 2>/dev/null || echo 'no docker'",
-        "failed_services": "systemctl --failed --no-pager --no-legend 2>/dev/null || echo 'none'",
-        "listening_ports": "ss -tlnp | grep LISTEN | head -20",
-    }
+    """Collect evidence from a single server via SSH (one batched round trip)."""
+    cache = get_evidence_cache()
+    cached = cache.get(server)
+    if cached is not None:
+        return {"evidence": {server: cached}}
+
+    try:
+        outputs, ssh = get_pool().run_batch(server, EVIDENCE_COMMANDS, timeout=30,
+                                            connect_timeout=10)
+        if ssh.returncode == 255:  # ssh's own failure code — connection never made
+            raise subprocess.SubprocessError(ssh.stderr.strip() or "connection failed")
+        result = {key: outputs.get(key, "").strip() for key in EVIDENCE_COMMANDS}
+        cache.set(server, result)
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError) as e:
+        result = {key: f"ERROR: {e}" for key in EVIDENCE_COMMANDS}
+
+    return {"evidence": {server: result}}
 
-    result = {}
-    for key, cmd in commands.items():
-        try:
-            output = subprocess.run(
-                ["ssh", "-o", "ConnectTimeout=10", "-o", "BatchMode=yes",
-                 server, cmd],
-                capture_output=True, text=True, timeout=30
-            )
-            result[key] = output.stdout.strip()
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-            result[key] = f"ERROR: {e}"
-
-    evidence = state.get("evidence", {})
-    evidence[server] = result
-    return {"evidence": evidence}
+
+def collect_server(task: ServerTask) -> dict:
+    """Fan-out node: evidence for the one server named in the Send payload."""
+    return collect_from_server({}, task["server"])
+
+
+def fan_out_servers(state: ServerEvidenceState) -> list:
+    """Route init → one parallel collect_server branch per server."""
+    return [Send("collect_server", {"server": server}) for server in state["servers"]]
 
 
 def collect_all_servers(state: ServerEvidenceState) -> dict:
-    """Collect evidence from all configured servers."""
-    for server in state["servers"]:
-        update = collect_from_server(state, server)
-        state["evidence"].update(update.get("evidence", {}))
-    return {"evidence": state["evidence"]}
+    """Collect evidence from all configured servers in parallel (outside a graph)."""
+    servers = state["servers"]
+    evidence = dict(state.get("evidence") or {})
+    if not servers:
+        return {"evidence": evidence}
+    with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+        for update in executor.map(lambda s: collect_from_server(state, s), servers):
+            evidence = merge_evidence(evidence, update["evidence"])
+    return {"evidence": evidence}
 
 
 def check_alerts(state: ServerEvidenceState) -> dict:
-    """Check collected evidence for alerts."""
+    """Check collected evidence against the shared thresholds (thresholds.yaml)."""
     alerts = []
     for server, data in state.get("evidence", {}).items():
-        # Check disk usage
-        disk = data.get("disk", "")
-        if disk and "%" in disk:
-            parts = disk.split()
-            for p in parts:
-                if p.endswith("%"):
-                    usage = int(p.rstrip("%"))
-                    if usage > 85:
-                        alerts.append(f"🔴 {server}: disk usage {usage}%")
-                    elif usage > 70:
-                        alerts.append(f"⚠️  {server}: disk usage {usage}%")
-
-        # Check failed services
-        failed = data.get("failed_services", "none")
-        if failed and failed != "none":
-            alerts.append(f"🔴 {server}: failed services: {failed}")
-
+        alerts.extend(sample_alerts(server, parse_sample(data)))
     return {"errors": alerts}
 
 
@@ -124,67 +167,102 @@ def save_evidence(state: ServerEvidenceState) -> dict:
 
 # --- Build the Evidence Collection Graph ---
 
-def create_evidence_graph():
-    """Create a LangGraph for server evidence collection."""
+def create_evidence_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Create a LangGraph for server evidence collection (checkpointed only if one is given)."""
     graph = StateGraph(ServerEvidenceState)
 
     graph.add_node("init", init_evidence)
-    graph.add_node("collect", collect_all_servers)
+    graph.add_node("collect_server", collect_server)
     graph.add_node("check_alerts", check_alerts)
     graph.add_node("save", save_evidence)
 
     graph.set_entry_point("init")
-    graph.add_edge("init", "collect")
-    graph.add_edge("collect", "check_alerts")
+    graph.add_conditional_edges("init", fan_out_servers, ["collect_server"])
+    graph.add_edge("collect_server", "check_alerts")
     graph.add_edge("check_alerts", "save")
     graph.add_edge("save", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
 # --- Safe Deploy Flow ---
 
-def build_step(state: DeployState) -> dict:
-    """Build the project."""
+def run_stage(state: DeployState, stage: str, command: list[str], timeout: int) -> dict:
+    """
+    Run one npm stage unless its inputs match a previous successful run.
+
+    Returns {"<stage>_ok": bool} plus cached_stages/errors updates.
+    """
+    project = state.get("project", ".")
+    cache = get_stage_cache(project)
+    key, hit = cache.lookup(stage)
+    if hit is not None:
+        return {f"{stage}_ok": True, "cached_stages": [stage]}
+
+    start = time.time()
     try:
         result = subprocess.run(
-            ["npm", "run", "build"],
-            capture_output=True, text=True, timeout=120,
-            cwd=state.get("project", ".")
+            command,
+            capture_output=True, text=True, timeout=timeout,
+            cwd=project
         )
-        return {"build_ok": result.returncode == 0}
     except Exception as e:
-        return {"build_ok": False, "errors": [f"Build failed: {e}"]}
+        return {f"{stage}_ok": False, "errors": [f"{stage.capitalize()} failed: {e}"]}
+    ok = result.returncode == 0
+    cache.record(stage, key, ok, time.time() - start)
+    return {f"{stage}_ok": ok}
+
+
+def build_step(state: DeployState) -> dict:
+    """Build the project (skipped if sources, lockfile and config are unchanged)."""
+    return run_stage(state, "build", ["npm", "run", "build"], timeout=120)
 
 
 def lint_step(state: DeployState) -> dict:
-    """Lint the project."""
-    try:
-        result = subprocess.run(
-            ["npm", "run", "lint"],
-            capture_output=True, text=True, timeout=60,
-            cwd=state.get("project", ".")
-        )
-        return {"lint_ok": result.returncode == 0}
-    except Exception as e:
-        return {"lint_ok": False, "errors": [f"Lint failed: {e}"]}
+    """Lint the project (skipped if sources and lint config are unchanged)."""
+    return run_stage(state, "lint", ["npm", "run", "lint"], timeout=60)
+
+
+def checks_done(state: DeployState) -> dict:
+    """Join point: waits for both build and lint before the deploy gate."""
+    return {}
 
 
 def deploy_step(state: DeployState) -> dict:
-    """Deploy to target server via SCP + SSH restart."""
+    """Delta-deploy dist/ to the target server (changed files only, atomic swap)."""
     if not state["build_ok"] or not state["lint_ok"]:
         return {"deploy_ok": False, "errors": ["Pre-deploy checks failed"]}
 
+    deployer = DeltaDeployer(state["target_server"])
     try:
-        # SCP dist/ to server
-        server = state["target_server"]
-        subprocess.run(
-            ["scp", "-r", "dist/", f"{server}:/var/www/marketing.tvoje.info/public_html/"],
-            timeout=120, check=True
-        )
-        return {"deploy_ok": True}
-    except Exception as e:
-        return {"deploy_ok": False, "rollback_needed": True, "errors": [f"Deploy failed: {e}"]}
+        result = deployer.deploy(Path(state.get("project", ".")) / "dist")
+    except (DeployError, OSError, subprocess.SubprocessError) as e:
+        # Failed before the swap — the live release is untouched
+        return {"deploy_ok": False, "errors": [f"Deploy failed: {e}"]}
+
+    try:
+        live = deployer.verify(result.release)
+    except (DeployError, OSError, subprocess.SubprocessError):
+        live = False
+    if not live:
+        return {"deploy_ok": False, "rollback_needed": True, "release": result.release,
+                "errors": [f"Deploy failed: {result.release} not live after swap"]}
+    return {"deploy_ok": True, "release": result.release}
+
+
+def rollback_step(state: DeployState) -> dict:
+    """Swap the previous release back in — no re-upload."""
+    try:
+        restored = DeltaDeployer(state["target_server"]).rollback()
+    except (DeployError, OSError, subprocess.SubprocessError) as e:
+        return {"errors": [f"Rollback failed: {e}"]}
+    return {"rollback_needed": False, "release": Path(restored).name,
+            "rolled_back": Path(restored).name}
+
+
+def needs_rollback(state: DeployState) -> Literal["rollback", "done"]:
+    """Gate: restore the previous release if the swap didn't take."""
+    return "rollback" if state.get("rollback_needed") else "done"
 
 
 def should_deploy(state: DeployState) -> Literal["deploy", "abort"]:
@@ -196,53 +274,94 @@ def should_deploy(state: DeployState) -> Literal["deploy", "abort"]:
 
 def abort_step(state: DeployState) -> dict:
     """Handle deployment abort."""
-    return {"deploy_ok": False, "errors": state.get("errors", []) + ["Deployment aborted"]}
+    return {"deploy_ok": False, "errors": ["Deployment aborted"]}
 
 
-def create_deploy_graph():
-    """Create a LangGraph for safe deployment."""
+def create_deploy_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Create a LangGraph for safe deployment (checkpointed only if one is given)."""
     graph = StateGraph(DeployState)
 
     graph.add_node("build", build_step)
     graph.add_node("lint", lint_step)
+    graph.add_node("checks_done", checks_done)
     graph.add_node("deploy", deploy_step)
+    graph.add_node("rollback", rollback_step)
     graph.add_node("abort", abort_step)
 
-    graph.set_entry_point("build")
-    graph.add_edge("build", "lint")
-    graph.add_conditional_edges("lint", should_deploy, {
+    # Build and lint only gate deploy — run them in parallel
+    graph.add_edge(START, "build")
+    graph.add_edge(START, "lint")
+    graph.add_edge(["build", "lint"], "checks_done")
+    graph.add_conditional_edges("checks_done", should_deploy, {
         "deploy": "deploy",
         "abort": "abort",
     })
-    graph.add_edge("deploy", END)
+    graph.add_conditional_edges("deploy", needs_rollback, {
+        "rollback": "rollback",
+        "done": END,
+    })
+    graph.add_edge("rollback", END)
     graph.add_edge("abort", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
-# --- Usage Examples ---
+# --- Resumable Runs ---
 
-if __name__ == "__main__":
-    # Example 1: Collect server evidence
-    evidence_flow = create_evidence_graph()
-    result = evidence_flow.invoke({
-        "servers": ["s60pa", "s61pa", "s62pa"],
+def invoke_resumable(graph, inputs: dict, thread_id: str) -> dict:
+    """
+    Run a checkpointed graph on one thread.
+
+    If the thread's last run was interrupted (the checkpoint still has
+    pending nodes), resume there instead of starting over. A finished
+    thread is cleared first so reducers don't merge in the old run.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    if graph.get_state(config).next:
+        return graph.invoke(None, config)
+    delete_thread = getattr(graph.checkpointer, "delete_thread", None)
+    if delete_thread is not None:
+        delete_thread(thread_id)
+    return graph.invoke(inputs, config)
+
+
+def run_evidence_flow(servers: list[str], output_path: str, thread_id: Optional[str] = None) -> dict:
+    """Collect evidence from `servers`, resuming an interrupted sweep."""
+    return invoke_resumable(create_evidence_graph(get_checkpointer()), {
+        "servers": servers,
         "evidence": {},
         "errors": [],
         "timestamp": "",
-        "output_path": "C:/Users/pavel/vscodeportable/servers/evidence-latest.json",
-    })
+        "output_path": output_path,
+    }, thread_id or f"evidence:{','.join(servers)}")
+
+
+def run_deploy_flow(project: str, target_server: str, thread_id: Optional[str] = None) -> dict:
+    """Build, lint and deploy `project`, resuming an interrupted deploy."""
+    return invoke_resumable(create_deploy_graph(get_checkpointer()), {
+        "project": project,
+        "target_server": target_server,
+        "build_ok": False,
+        "lint_ok": False,
+        "tests_ok": False,
+        "deploy_ok": False,
+        "rollback_needed": False,
+        "release": "",
+        "rolled_back": "",
+        "cached_stages": [],
+        "errors": [],
+    }, thread_id or f"deploy:{target_server}:{project}")
+
+
+# --- Usage Examples ---
+
+if __name__ == "__main__":
+    # Example 1: Collect server evidence
+    result = run_evidence_flow(
+        ["s60pa", "s61pa", "s62pa"],
+        "C:/Users/pavel/vscodeportable/servers/evidence-latest.json",
+    )
     print(f"Evidence collected. Alerts: {result.get('errors', [])}")
 
     # Example 2: Safe deploy
-    # deploy_flow = create_deploy_graph()
-    # result = deploy_flow.invoke({
-    #     "project": "C:/Users/pavel/projects/marketing.tvoje.info",
-    #     "target_server": "s62pa",
-    #     "build_ok": False,
-    #     "lint_ok": False,
-    #     "tests_ok": False,
-    #     "deploy_ok": False,
-    #     "rollback_needed": False,
-    #     "errors": [],
-    # })
+    # result = run_deploy_flow("C:/Users/pavel/projects/marketing.tvoje.info", "s62pa")
@@ -0,0 +1,169 @@
+"""
+Stage Cache — skip deploy-graph stages whose inputs haven't changed.
+
+Each stage (build, lint) declares the files it reads (including .env
+files) and the environment variables it bakes in. Their contents and
+values are hashed into one key; a stage that previously succeeded with the same key
+is skipped and its cached status (and artifacts) reused. Only successes
+are cached — a failed stage always re-runs.
+
+Hashing stays cheap on big trees: per-file digests are memoised on
+(size, mtime_ns), like git's index, so an unchanged tree is mostly stat().
+
+Build artifacts (dist/) are fingerprinted with delta_deploy's manifest id;
+a cached build only counts if dist/ still matches what that build produced.
+
+The cache lives in <project>/node_modules/.cache/deploy-stages.json
+(the usual place for tool caches — never committed, wiped with node_modules).
+
+Usage:
+    from stage_cache import get_stage_cache
+
+    cache = get_stage_cache(project)
+    key, hit = cache.lookup("build")
+    if hit is None:
+        ok = run_build()
+        cache.record("build", key, ok, duration)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from delta_deploy import build_manifest, file_digest, manifest_id
+
+
+CACHE_RELPATH = Path("node_modules") / ".cache" / "deploy-stages.json"
+CACHE_VERSION = 1
+
+# Files/directories each stage depends on (relative to the project root)
+STAGE_INPUTS: Dict[str, List[str]] = {
+    "build": [
+        "src", "public", "package.json", "package-lock.json",
+        "astro.config.mjs", "tailwind.config.mjs", "tsconfig.json", "env.d.ts",
+        # Astro/Vite bake these into dist/ (import.meta.env.PUBLIC_*)
+        ".env", ".env.local", ".env.production", ".env.production.local",
+    ],
+    "lint": [
+        "src", "package.json", "package-lock.json", "eslint.config.mjs", "tsconfig.json",
+    ],
+}
+
+# Environment variables a stage's output depends on: exact names, or
+# prefixes ending in "_" (values are hashed into the key)
+STAGE_ENV: Dict[str, List[str]] = {
+    "build": ["PUBLIC_", "NODE_ENV"],
+}
+
+# Artifact directories a stage produces (fingerprinted, must still match on a hit)
+STAGE_ARTIFACTS: Dict[str, str] = {
+    "build": "dist",
+}
+
+
+class StageCache:
+    """Input-hash → last successful result, per stage."""
+
+    def __init__(self, project: Path):
+        self.project = Path(project)
+        self.path = self.project / CACHE_RELPATH
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {"version": CACHE_VERSION, "stages": {}, "files": {}}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION:
+                self._data = data
+        except (OSError, ValueError):
+            pass
+
+    def _save(self) -> None:
+        """Atomic write (caller holds the lock)."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._data), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Cache is an optimisation only
+
+    def _digest(self, path: Path, rel: str) -> str:
+        """File digest, memoised on (size, mtime_ns)."""
+        st = path.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            memo = self._data["files"].get(rel)
+        if memo and memo[0] == stamp:
+            return memo[1]
+        digest = file_digest(path)
+        with self._lock:
+            self._data["files"][rel] = [stamp, digest]
+        return digest
+
+    def input_key(self, stage: str) -> str:
+        """Hash of every input file of a stage (paths + contents) and its STAGE_ENV values."""
+        h = hashlib.sha256(stage.encode())
+        for entry in STAGE_INPUTS[stage]:
+            root = self.project / entry
+            if root.is_file():
+                files = [root]
+            elif root.is_dir():
+                files = sorted(p for p in root.rglob("*") if p.is_file())
+            else:
+                h.update(f"missing:{entry}\n".encode())
+                continue
+            for path in files:
+                rel = path.relative_to(self.project).as_posix()
+                h.update(f"{rel}\0{self._digest(path, rel)}\n".encode())
+        patterns = STAGE_ENV.get(stage, [])
+        for name in sorted(os.environ):
+            if any(name.startswith(p) if p.endswith("_") else name == p for p in patterns):
+                h.update(f"env:{name}\0{os.environ[name]}\n".encode())
+        return h.hexdigest()
+
+    def _artifact_id(self, stage: str) -> Optional[str]:
+        directory = STAGE_ARTIFACTS.get(stage)
+        if directory is None:
+            return None
+        path = self.project / directory
+        return manifest_id(build_manifest(path)) if path.is_dir() else "missing"
+
+    def lookup(self, stage: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(input key, cached successful entry or None)."""
+        key = self.input_key(stage)
+        with self._lock:
+            entry = self._data["stages"].get(stage)
+        if not entry or entry.get("key") != key or not entry.get("ok"):
+            return key, None
+        if entry.get("artifact") is not None and entry["artifact"] != self._artifact_id(stage):
+            return key, None  # dist/ was changed or removed since that build
+        return key, entry
+
+    def record(self, stage: str, key: str, ok: bool, duration: float) -> None:
+        """Remember a stage result (only successes are ever reused)."""
+        entry = {
+            "key": key,
+            "ok": ok,
+            "at": time.time(),
+            "duration": round(duration, 1),
+            "artifact": self._artifact_id(stage) if ok else None,
+        }
+        with self._lock:
+            self._data["stages"][stage] = entry
+            self._save()
+
+
+_caches: Dict[Path, StageCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_stage_cache(project: Path) -> StageCache:
+    """Get or load the stage cache for a project."""
+    project = Path(project).resolve()
+    with _caches_lock:
+        if project not in _caches:
+            _caches[project] = StageCache(project)
+        return _caches[project]
@@ -3,41 +3,37 @@
 Server Evidence Collection Script — Cross-Platform.
 
 Uses SSH config aliases from ~/.ssh/config for connection.
-Automatically tries Tailscale → Public → Internal routes.
+Automatically tries Tailscale → Public → Internal routes, starting with
+the alias that worked last time (shared route cache, see route_cache.py).
 All commands are read-only for safe evidence gathering.
+
+Output is streamed straight into a content-addressed store
+(evidence_store.py): identical outputs across runs are kept once, each
+is capped at MAX_OUTPUT_BYTES, and a run only adds a small manifest
+under evidence/runs/.
 """
 
+import argparse
 import os
 import sys
-import socket
 import subprocess
-import json
+import tempfile
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
-
-
-# Server configuration — matches ~/.ssh/config aliases
-SERVERS: Dict[str, Dict[str, Any]] = {
-    "s60": {
-        "aliases": ["s60pa", "s60pa-pub", "s60pa-int"],
-        "purpose": "Hub/Backup",
-        "tailscale_ip": "100.111.141.111",
-        "ssh_port": 20,
-    },
-    "s61": {
-        "aliases": ["s61pa", "s61pa-pub", "s61pa-int"],
-        "purpose": "Gateway/Traefik",
-        "tailscale_ip": "100.111.141.112",
-        "ssh_port": 20,
-    },
-    "s62": {
-        "aliases": ["s62pa", "s62pa-pub", "s62pa-int"],
-        "purpose": "Production/Web",
-        "tailscale_ip": "100.91.164.109",
-        "ssh_port": 20,
-    },
-}
+from typing import Any, Dict, List, Optional, Tuple
+
+from evidence_store import MAX_OUTPUT_BYTES, EvidenceStore, ObjectWriter, object_entry
+from inventory import load_inventory
+from parsers import parse_sample
+from route_cache import get_route_cache
+from ssh_session import get_pool
+from thresholds import sample_alerts
+
+
+# Server inventory — aliases match ~/.ssh/config (see inventory.yaml)
+INVENTORY = load_inventory()
 
 # Evidence commands (all read-only)
 EVIDENCE_COMMANDS: Dict[str, str] = {
@@ -60,6 +56,8 @@ EVIDENCE_DIR = Path(os.environ.get(
     "EVIDENCE_DIR",
     Path(__file__).resolve().parent.parent.parent.parent / "evidence"
 ))
+READ_CHUNK = 64 * 1024
+STDERR_CAP = 64 * 1024
 
 
 def log(message: str) -> None:
@@ -68,145 +66,157 @@ def log(message: str) -> None:
     print(f"[{ts}] {message}")
 
 
-def find_working_alias(server: str) -> Optional[str]:
-    """Try SSH aliases in order until one works. Returns working alias or None."""
-    info = SERVERS[server]
-    for alias in info["aliases"]:
-        try:
-            result = subprocess.run(
-                ["ssh", "-o", "ConnectTimeout=5", "-o", "BatchMode=yes",
-                 alias, "echo ok"],
-                capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0 and "ok" in result.stdout:
-                return alias
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            continue
-    return None
-
-
-def ssh_exec(alias: str, command: str, timeout: int = 30) -> Tuple[int, str]:
-    """Execute command via SSH using config alias."""
+def probe_alias(alias: str) -> Optional[bool]:
+    """True if `ssh alias echo ok` works, None if ssh itself is missing."""
     try:
         result = subprocess.run(
-            ["ssh", "-o", "ConnectTimeout=10", "-o", "BatchMode=yes",
-             alias, command],
-            capture_output=True, text=True, timeout=timeout
+            ["ssh", "-o", "ConnectTimeout=5", "-o", "BatchMode=yes",
+             alias, "echo ok"],
+            capture_output=True, text=True, timeout=10
         )
-        output = result.stdout
-        if result.stderr and result.returncode != 0:
-            output += f"\n[STDERR]: {result.stderr}"
-        return result.returncode, output
+        return result.returncode == 0 and "ok" in result.stdout
     except subprocess.TimeoutExpired:
-        return 1, "TIMEOUT"
-    except Exception as e:
-        return 1, f"ERROR: {e}"
+        return False
+    except FileNotFoundError:
+        return None
+
+
+def find_working_alias(server: str) -> Optional[str]:
+    """Cached alias first, then the other routes in parallel. Returns working alias or None."""
+    return get_route_cache().resolve(server, INVENTORY[server].aliases, probe_alias)
+
+
+def ssh_exec(alias: str, command: str, writer: ObjectWriter, timeout: int = 30) -> int:
+    """
+    Execute command via SSH using config alias, streaming stdout into `writer`.
+
+    Output past the writer's cap is dropped (the remote command is killed).
+    On failure stderr is appended as "[STDERR]: ...". Returns the exit code.
+    """
+    timed_out = threading.Event()
+    try:
+        with tempfile.TemporaryFile() as err:
+            proc = get_pool().popen(
+                alias, command,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=err,
+            )
 
+            def kill() -> None:
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(timeout, kill)
+            timer.start()
+            try:
+                for chunk in iter(lambda: proc.stdout.read1(READ_CHUNK), b""):
+                    if not writer.write(chunk):
+                        proc.kill()
+                        break
+                code = proc.wait()
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+
+            if timed_out.is_set():
+                writer.write(b"TIMEOUT")
+                return 1
+            if writer.truncated:
+                return 0  # Killed by us at the cap, not a failure
+            if code != 0:
+                err.seek(0)
+                stderr = err.read(STDERR_CAP)
+                if stderr:
+                    writer.write(b"\n[STDERR]: " + stderr)
+            return code
+    except Exception as e:
+        writer.write(f"ERROR: {e}".encode())
+        return 1
 
-def collect_server_evidence(server: str, alias: str, output_dir: Path) -> bool:
-    """Collect evidence from a single server."""
-    log(f"=== {server} ({SERVERS[server]['purpose']}) via {alias} ===")
 
-    server_dir = output_dir / server
-    server_dir.mkdir(parents=True, exist_ok=True)
+def collect_server_evidence(
+    server: str,
+    alias: str,
+    store: EvidenceStore,
+) -> Tuple[bool, Dict[str, Any]]:
+    """Collect evidence from a single server. Returns (any succeeded, manifest files)."""
+    log(f"=== {server} ({INVENTORY[server].purpose}) via {alias} ===")
 
+    files: Dict[str, Any] = {}
     success_count = 0
     for filename, cmd in EVIDENCE_COMMANDS.items():
-        code, output = ssh_exec(alias, cmd)
-        filepath = server_dir / filename
-        filepath.write_text(output, encoding="utf-8")
+        start = time.time()
+        writer = store.writer(MAX_OUTPUT_BYTES)
+        code = ssh_exec(alias, cmd, writer)
+        obj = writer.finish()
+        files[filename] = object_entry(obj, returncode=code,
+                                       duration=round(time.time() - start, 2))
         status = "✓" if code == 0 else "⚠"
-        log(f"  {status} {filename}")
+        note = " (truncated)" if obj.truncated else ""
+        log(f"  {status} {filename}{note}")
         if code == 0:
             success_count += 1
 
     log(f"  → {success_count}/{len(EVIDENCE_COMMANDS)} commands succeeded")
-    return success_count > 0
+    return success_count > 0, files
 
 
-def check_alerts(output_dir: Path) -> list:
-    """Check collected evidence for alerts."""
+def check_alerts(store: EvidenceStore, manifest: Dict[str, Any]) -> List[str]:
+    """Check a run's evidence against the shared thresholds (thresholds.yaml)."""
     alerts = []
-    for server_dir in output_dir.iterdir():
-        if not server_dir.is_dir():
-            continue
-        server = server_dir.name
-
-        # Check disk usage
-        disk_file = server_dir / "disk-usage.txt"
-        if disk_file.exists():
-            for line in disk_file.read_text().split("\n"):
-                if "%" in line and ("/" in line):
-                    for part in line.split():
-                        if part.endswith("%"):
-                            try:
-                                usage = int(part.rstrip("%"))
-                                if usage > 85:
-                                    alerts.append(f"🔴 {server}: disk {usage}%")
-                                elif usage > 70:
-                                    alerts.append(f"⚠️  {server}: disk {usage}%")
-                            except ValueError:
-                                pass
-
-        # Check failed services
-        failed_file = server_dir / "failed.txt"
-        if failed_file.exists():
-            content = failed_file.read_text().strip()
-            if content and content != "none" and "0 loaded" not in content:
-                alerts.append(f"🔴 {server}: failed services detected")
-
+    for server, info in manifest.get("servers", {}).items():
+        files = info.get("files", {})
+        evidence = {name: store.read_text(files[name]["sha256"])
+                    for name in ("disk-usage.txt", "failed.txt", "docker.txt") if name in files}
+        alerts.extend(sample_alerts(server, parse_sample(evidence)))
     return alerts
 
 
 def main() -> None:
     """Main entry point."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = EVIDENCE_DIR / timestamp
-
-    # Allow targeting specific server
-    targets = list(SERVERS.keys())
-    if len(sys.argv) > 1:
-        target = sys.argv[1]
-        if target in SERVERS:
-            targets = [target]
-        elif target == "all":
-            pass
-        else:
-            print(f"Unknown target: {target}")
-            print(f"Usage: {sys.argv[0]} [s60|s61|s62|all]")
-            sys.exit(1)
+
+    # Allow targeting a specific server or inventory group
+    parser = argparse.ArgumentParser(description="Server Evidence Collection")
+    parser.add_argument("target", nargs="?", default="all",
+                        choices=INVENTORY.names() + ["all"],
+                        help="Server to collect from (default: all)")
+    parser.add_argument("--group", "-g", choices=sorted(INVENTORY.groups),
+                        help="Only collect from servers in this inventory group")
+    args = parser.parse_args()
+
+    names = None if args.target == "all" else [args.target]
+    targets = [s.name for s in INVENTORY.select(names, group=args.group)]
+    if not targets:
+        print(f"No servers match target={args.target} group={args.group}")
+        sys.exit(1)
 
     print(f"Server Evidence Collection — {timestamp}")
     print(f"Targets: {', '.join(targets)}")
     print("=" * 50)
 
+    store = EvidenceStore(EVIDENCE_DIR)
+    manifest: Dict[str, Any] = {"collected_at": timestamp, "servers": {}}
     results = {}
     for server in targets:
         log(f"Finding route to {server}...")
         alias = find_working_alias(server)
         if alias:
             log(f"  Connected via: {alias}")
-            results[server] = collect_server_evidence(server, alias, output_dir)
+            ok, files = collect_server_evidence(server, alias, store)
+            manifest["servers"][server] = {"alias": alias, "files": files}
+            results[server] = ok
         else:
             log(f"  ✗ {server}: ALL routes failed (Tailscale, Public, Internal)")
             results[server] = False
 
     # Check alerts
-    if output_dir.exists():
-        alerts = check_alerts(output_dir)
-    else:
-        alerts = []
-
-    # Save summary
-    summary = {
-        "collected_at": timestamp,
-        "results": {s: "success" if ok else "failed" for s, ok in results.items()},
-        "alerts": alerts,
-    }
+    alerts = check_alerts(store, manifest)
 
-    if output_dir.exists():
-        summary_file = output_dir / "summary.json"
-        summary_file.write_text(json.dumps(summary, indent=2))
+    # Save run manifest (the summary lives in it)
+    manifest["results"] = {s: "success" if ok else "failed" for s, ok in results.items()}
+    manifest["alerts"] = alerts
+    run_file = store.save_run(timestamp, manifest)
+    removed = store.prune()
 
     # Print summary
     print("\n" + "=" * 50)
@@ -222,8 +232,9 @@ def main() -> None:
     else:
         print("\n✅ No alerts")
 
-    if output_dir.exists():
-        print(f"\nEvidence: {output_dir}")
+    print(f"\nEvidence: {run_file} "
+          f"({store.new_objects} new objects, {store.new_bytes / 1024:.1f} KiB stored"
+          f"{f', {removed} expired objects removed' if removed else ''})")
 
 
 if __name__ == "__main__":
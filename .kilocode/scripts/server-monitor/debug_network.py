@@ -4,68 +4,39 @@ Network Debugging Script — Cross-Platform (Windows + Linux).
 
 Checks network connectivity using SSH config aliases.
 Uses Python's socket module instead of nc/ping for portability.
+All server × route paths are dialled concurrently (reachability.py),
+so the report waits for the slowest path, not the sum of timeouts,
+and shows connect latency per path as a matrix.
+Unreachable routes are fed into the shared route cache (route_cache.py)
+so the SSH tools back off them instead of waiting on ConnectTimeout.
+
+Usage:
+    python debug_network.py                 # all servers
+    python debug_network.py --group web --timeout 1.5
 """
 
+import argparse
 import socket
 import subprocess
 import json
 import sys
 import os
 from datetime import datetime
-from typing import Dict, Any, Optional
-
-
-# Server inventory — uses SSH config aliases from ~/.ssh/config
-SERVERS = {
-    "s60": {
-        "aliases": {
-            "tailscale": "s60pa",
-            "public": "s60pa-pub",
-            "internal": "s60pa-int",
-        },
-        "tailscale_ip": "100.111.141.111",
-        "public_ip": "89.203.173.196",
-        "internal_ip": "192.168.1.60",
-        "ssh_port_tailscale": 20,
-        "ssh_port_public": 2260,
-        "purpose": "Hub/Backup",
-    },
-    "s61": {
-        "aliases": {
-            "tailscale": "s61pa",
-            "public": "s61pa-pub",
-            "internal": "s61pa-int",
-        },
-        "tailscale_ip": "100.111.141.112",
-        "public_ip": "89.203.173.196",
-        "internal_ip": "192.168.1.61",
-        "ssh_port_tailscale": 20,
-        "ssh_port_public": 2261,
-        "purpose": "Gateway/Traefik",
-    },
-    "s62": {
-        "aliases": {
-            "tailscale": "s62pa",
-            "public": "s62pa-pub",
-            "internal": "s62pa-int",
-        },
-        "tailscale_ip": "100.91.164.109",
-        "public_ip": "89.203.173.196",
-        "internal_ip": "192.168.1.62",
-        "ssh_port_tailscale": 20,
-        "ssh_port_public": 2262,
-        "purpose": "Production/Web",
-    },
-}
-
-
-def check_port(host: str, port: int, timeout: int = 3) -> bool:
-    """Check if a TCP port is reachable using Python socket (cross-platform)."""
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except (socket.timeout, ConnectionRefusedError, OSError):
-        return False
+from typing import Dict, Any, List, Optional
+
+from inventory import Server, load_inventory
+from reachability import DEFAULT_TIMEOUT_SEC, probe_paths, scan_servers
+from route_cache import get_route_cache
+
+
+# Server inventory — aliases match ~/.ssh/config (see inventory.yaml)
+INVENTORY = load_inventory()
+
+
+def check_port(host: str, port: int, timeout: float = DEFAULT_TIMEOUT_SEC) -> bool:
+    """Check if a single TCP port is reachable (cross-platform)."""
+    latency, _ = probe_paths([(host, port)], timeout)[(host, port)]
+    return latency is not None
 
 
 def check_tailscale() -> Dict[str, Any]:
@@ -129,50 +100,58 @@ def detect_best_route() -> str:
     return "public"
 
 
-def generate_report() -> Dict[str, Any]:
+def generate_report(
+    servers: Optional[List[Server]] = None,
+    timeout: float = DEFAULT_TIMEOUT_SEC,
+) -> Dict[str, Any]:
     """Generate full network debug report."""
     local_ip = get_local_ip()
     tailscale = check_tailscale()
     best_route = detect_best_route()
+    on_internal = local_ip.startswith("192.168.1.")
+    routes = get_route_cache()
+    servers = servers or list(INVENTORY)
+
+    # Check all servers via all methods in one concurrent pass.
+    # Internal path only makes sense if we're on the internal network.
+    route_names = {r.name for s in servers for r in s.routes}
+    if not on_internal:
+        route_names.discard("internal")
+    matrix = scan_servers(servers, timeout=timeout, route_names=route_names)
 
-    # Check all servers via all methods
     server_results = {}
-    for name, info in SERVERS.items():
-        srv = {"purpose": info["purpose"], "methods": {}}
-
-        # Check Tailscale path
-        srv["methods"]["tailscale"] = {
-            "host": info["tailscale_ip"],
-            "port": info["ssh_port_tailscale"],
-            "reachable": check_port(info["tailscale_ip"], info["ssh_port_tailscale"]),
-            "alias": info["aliases"]["tailscale"],
-        }
-
-        # Check public path
-        srv["methods"]["public"] = {
-            "host": info["public_ip"],
-            "port": info["ssh_port_public"],
-            "reachable": check_port(info["public_ip"], info["ssh_port_public"]),
-            "alias": info["aliases"]["public"],
-        }
-
-        # Check internal path (only if we're on internal network)
-        if local_ip.startswith("192.168.1."):
-            srv["methods"]["internal"] = {
-                "host": info["internal_ip"],
-                "port": info["ssh_port_tailscale"],
-                "reachable": check_port(info["internal_ip"], info["ssh_port_tailscale"]),
-                "alias": info["aliases"]["internal"],
+    for server in servers:
+        srv = {"purpose": server.purpose, "methods": {}}
+
+        for route in server.routes:
+            path = matrix.get(server.name, route.name)
+            if path is None:
+                continue
+            srv["methods"][route.name] = {
+                "host": route.host,
+                "port": route.port,
+                "reachable": path.reachable,
+                "latency_ms": path.latency_ms,
+                "error": path.error,
+                "alias": route.alias,
             }
+            if not path.reachable:
+                routes.record_failure(server.name, route.alias)
 
-        # Find best working method
+        # Find best working method — a route SSH recently succeeded on wins,
+        # then the detected network, then the lowest connect latency
         srv["best_alias"] = None
-        for method in [best_route, "tailscale", "public", "internal"]:
+        srv["cached_alias"] = routes.best(server.name)
+        fastest = matrix.fastest(server.name)
+        srv["fastest_alias"] = fastest.alias if fastest else None
+        cached = [r.name for r in server.routes if r.alias == srv["cached_alias"]]
+        by_latency = [fastest.route] if fastest else []
+        for method in cached + [best_route] + by_latency:
             if method in srv["methods"] and srv["methods"][method]["reachable"]:
-                srv["best_alias"] = info["aliases"][method]
+                srv["best_alias"] = srv["methods"][method]["alias"]
                 break
 
-        server_results[name] = srv
+        server_results[server.name] = srv
 
     return {
         "timestamp": datetime.now().isoformat(),
@@ -181,12 +160,21 @@ def generate_report() -> Dict[str, Any]:
         "detected_route": best_route,
         "tailscale": tailscale,
         "servers": server_results,
+        "matrix": matrix.to_dict(),
+        "matrix_table": matrix.format_table(),
     }
 
 
 def main() -> None:
     """Main entry point."""
-    report = generate_report()
+    parser = argparse.ArgumentParser(description="Network Debug Report")
+    parser.add_argument("--group", "-g", choices=sorted(INVENTORY.groups),
+                        help="Only check servers in this inventory group")
+    parser.add_argument("--timeout", "-t", type=float, default=DEFAULT_TIMEOUT_SEC,
+                        help=f"TCP connect timeout per path in seconds (default: {DEFAULT_TIMEOUT_SEC})")
+    args = parser.parse_args()
+
+    report = generate_report(INVENTORY.select(group=args.group), timeout=args.timeout)
 
     print("=== Network Debug Report ===")
     print(f"Platform: {report['platform']}")
@@ -201,10 +189,15 @@ def main() -> None:
     for name, srv in report["servers"].items():
         best = srv["best_alias"] or "UNREACHABLE"
         icon = "✓" if srv["best_alias"] else "✗"
-        print(f"  {icon} {name} ({srv['purpose']}): best={best}")
+        cached = f" (cached: {srv['cached_alias']})" if srv["cached_alias"] else ""
+        print(f"  {icon} {name} ({srv['purpose']}): best={best}{cached}")
         for method, info in srv["methods"].items():
             status = "✓" if info["reachable"] else "✗"
-            print(f"      {status} {method}: {info['host']}:{info['port']} ({info['alias']})")
+            detail = f"{info['latency_ms']} ms" if info["reachable"] else info["error"]
+            print(f"      {status} {method}: {info['host']}:{info['port']} ({info['alias']}) {detail}")
+
+    print(f"\nConnect latency matrix (scanned in {report['matrix']['duration']:.2f}s):")
+    print(report["matrix_table"])
 
     # Save JSON report
     output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "evidence")
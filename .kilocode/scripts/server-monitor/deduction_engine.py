@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Incremental Failure Deduction Engine — declarative, rule-indexed.
+
+Rules are data (see .agent/deduction-rules.yaml). They are compiled once
+into predicates plus an index {field: [rules that read it]}. Feeding a
+server snapshot with update() re-evaluates only the rules that depend on
+fields whose value actually changed (plus that server's sliding-window
+rules), so the cost per update stays flat as the server list grows.
+
+Each server keeps a sliding window of its recent cycles, so rules can
+say "SSH slow in 3 of the last 5 cycles"; seed_history() fills it from
+the metrics store (metrics_store.MetricsStore) for one-shot runs. Trend
+rules read the store too when one is supplied.
+
+Usage:
+    from deduction_engine import DeductionEngine, load_rules
+
+    engine = DeductionEngine(load_rules(Path(".agent/deduction-rules.yaml")))
+    engine.update("s61", {"status": "degraded", "http": "up", "tcp": "down", "ssh": "skipped"})
+    engine.update("s62", {"status": "up", "http": "up", "tcp": "up", "ssh": "up"})
+    for d in engine.deductions():
+        print(d["confidence"], d["cause"])
+"""
+
+import operator
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+
+Snapshot = Dict[str, Any]
+Predicate = Callable[[Snapshot], bool]
+
+_PLACEHOLDER_RE = re.compile(r"\$\{([\w.]+)\}")
+
+_NUMERIC_OPS = (
+    (">=", operator.ge), ("<=", operator.le),
+    (">", operator.gt), ("<", operator.lt),
+)
+
+
+class RuleError(ValueError):
+    """Raised when a rule definition cannot be compiled."""
+
+
+def compile_condition(field: str, spec: Any) -> Predicate:
+    """Compile one `field: spec` condition into a predicate over a snapshot."""
+    if isinstance(spec, list):
+        allowed = frozenset(spec)
+        return lambda snap: snap.get(field) in allowed
+
+    if isinstance(spec, dict) and set(spec) == {"not"}:
+        excluded = frozenset(spec["not"] if isinstance(spec["not"], list) else [spec["not"]])
+        return lambda snap: snap.get(field) not in excluded
+
+    if isinstance(spec, str):
+        for symbol, op in _NUMERIC_OPS:
+            if spec.startswith(symbol):
+                try:
+                    bound = float(spec[len(symbol):])
+                except ValueError:
+                    raise RuleError(f"bad numeric condition for {field}: {spec!r}")
+
+                def numeric(snap: Snapshot, op=op, bound=bound) -> bool:
+                    value = snap.get(field)
+                    return isinstance(value, (int, float)) and op(value, bound)
+                return numeric
+        if spec.startswith("!"):
+            excluded = spec[1:]
+            return lambda snap: snap.get(field) != excluded
+
+    return lambda snap: snap.get(field) == spec
+
+
+def compile_match(spec: Optional[Dict[str, Any]]) -> Tuple[Set[str], Optional[Predicate]]:
+    """Compile a {field: spec, ...} block into (fields read, combined predicate)."""
+    if not spec:
+        return set(), None
+    predicates = [compile_condition(f, s) for f, s in spec.items()]
+    return set(spec), lambda snap: all(p(snap) for p in predicates)
+
+
+class Rule:
+    """One compiled deduction rule."""
+
+    __slots__ = (
+        "id", "order", "scope", "when", "all", "others_any", "history", "history_count",
+        "history_of", "trend", "min_servers", "confidence", "scale", "cause",
+        "reasoning", "fix", "likely_causes", "fields", "cross_server",
+    )
+
+    def __init__(self, spec: Dict[str, Any], order: int):
+        try:
+            self.id = spec["id"]
+            self.cause = spec["cause"]
+        except KeyError as e:
+            raise RuleError(f"rule #{order} missing {e}")
+        self.order = order
+        self.scope = spec.get("scope", "server")
+        if self.scope not in ("server", "fleet"):
+            raise RuleError(f"{self.id}: unknown scope {self.scope!r}")
+
+        when_fields, self.when = compile_match(spec.get("when"))
+        all_fields, self.all = compile_match(spec.get("all"))
+        others_fields, self.others_any = compile_match(spec.get("others_any"))
+
+        history = spec.get("history") or {}
+        history_fields, self.history = compile_match(history.get("match"))
+        self.history_count = int(history.get("count", 1))
+        self.history_of = int(history.get("of", self.history_count))
+
+        self.trend = spec.get("trend")
+        trend_fields = {self.trend["metric"]} if self.trend else set()
+
+        self.min_servers = int(spec.get("min_servers", 1))
+        self.confidence = int(spec.get("confidence", 50))
+        self.scale = spec.get("confidence_scale")
+        self.reasoning = spec.get("reasoning", "")
+        self.fix = spec.get("fix", "")
+        self.likely_causes = [tuple(c) for c in spec.get("likely_causes", [])]
+
+        self.fields = when_fields | all_fields | others_fields | history_fields | trend_fields
+        # min_servers only changes with the server count, which re-runs everything anyway
+        self.cross_server = (
+            self.scope == "fleet" or self.all is not None or self.others_any is not None
+        )
+
+
+def substitute(value: Any, constants: Dict[str, Any]) -> Any:
+    """Replace ${name} placeholders (e.g. '>${disk_pct.warning}') throughout a rule spec."""
+    if isinstance(value, dict):
+        return {k: substitute(v, constants) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, constants) for v in value]
+    if not isinstance(value, str) or "${" not in value:
+        return value
+
+    def lookup(match: "re.Match") -> str:
+        if match.group(1) not in constants:
+            raise RuleError(f"unknown placeholder ${{{match.group(1)}}}")
+        return str(constants[match.group(1)])
+
+    whole = _PLACEHOLDER_RE.fullmatch(value)
+    if whole:
+        lookup(whole)
+        return constants[whole.group(1)]  # Keep numbers numeric (e.g. confidence_scale.from)
+    return _PLACEHOLDER_RE.sub(lookup, value)
+
+
+def load_rules(path: Path, constants: Optional[Dict[str, Any]] = None) -> List[Rule]:
+    """Parse and compile a rules YAML file (${name} placeholders filled from `constants`)."""
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    specs = substitute(data.get("rules", []), constants or {})
+    rules = [Rule(spec, i) for i, spec in enumerate(specs)]
+    ids = [r.id for r in rules]
+    duplicates = {i for i in ids if ids.count(i) > 1}
+    if duplicates:
+        raise RuleError(f"duplicate rule ids: {', '.join(sorted(duplicates))}")
+    return rules
+
+
+def _render(template: str, context: Dict[str, Any]) -> str:
+    """Fill {placeholders}; leave the template as-is if a value is missing."""
+    try:
+        return template.format(**context)
+    except (KeyError, ValueError, IndexError):
+        return template
+
+
+class DeductionEngine:
+    """Keeps the latest snapshot per server and the deductions they imply."""
+
+    def __init__(self, rules: List[Rule], store: Any = None):
+        self.rules = rules
+        self.store = store
+        self.index: Dict[str, List[Rule]] = {}
+        for rule in rules:
+            for field in rule.fields:
+                self.index.setdefault(field, []).append(rule)
+        self.history_rules = [r for r in rules if r.history is not None]
+        self.trend_rules = [r for r in rules if r.trend]
+        window = max((r.history_of for r in self.history_rules), default=1)
+        self.history_fields = sorted({f for r in self.history_rules for f in r.fields})
+
+        self.snapshots: Dict[str, Snapshot] = {}
+        self.windows: Dict[str, Deque[Snapshot]] = {}
+        self._window_size = window
+        self._active: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def seed_history(self, server: str, before: Optional[float] = None) -> int:
+        """
+        Pre-fill a server's sliding window from the metrics store.
+
+        Each earlier record() of the fields history rules read counts as
+        one past cycle, so "3 of the last 5" works for one-shot runs too.
+        `before` excludes samples of the cycle about to be fed. Returns
+        the number of cycles loaded.
+        """
+        if self.store is None or not self.history_rules or server in self.windows:
+            return 0
+        past = self.store.recent(server, self.history_fields, self._window_size - 1, before)
+        self.windows[server] = deque(past, maxlen=self._window_size)
+        return len(past)
+
+    def update(self, server: str, snapshot: Snapshot, new_cycle: bool = True) -> None:
+        """
+        Feed the latest snapshot for one server and re-run affected rules.
+
+        new_cycle=False updates fields without advancing the server's
+        sliding window (e.g. a cheap probe between full cycles).
+        """
+        previous = self.snapshots.get(server)
+        self.snapshots[server] = dict(snapshot)
+        if new_cycle:
+            window = self.windows.setdefault(server, deque(maxlen=self._window_size))
+            window.append(self.snapshots[server])
+
+        if previous is None:
+            # Server count changed — min_servers and cross-server rules all shift
+            affected = list(self.rules)
+        else:
+            changed = {k for k in snapshot.keys() | previous.keys()
+                       if snapshot.get(k) != previous.get(k)}
+            seen: Set[str] = set()
+            affected = []
+            for field in changed:
+                for rule in self.index.get(field, ()):
+                    if rule.id not in seen:
+                        seen.add(rule.id)
+                        affected.append(rule)
+            if new_cycle:
+                for rule in self.history_rules + self.trend_rules:
+                    if rule.id not in seen:
+                        seen.add(rule.id)
+                        affected.append(rule)
+
+        for rule in affected:
+            if rule.scope == "fleet":
+                self._evaluate_fleet(rule)
+            elif rule.cross_server or previous is None:
+                for name in self.snapshots:
+                    self._evaluate(rule, name)
+            else:
+                self._evaluate(rule, server)
+
+    def _set(self, rule: Rule, key: str, deduction: Optional[Dict[str, Any]]) -> None:
+        if deduction is None:
+            self._active.pop((rule.id, key), None)
+        else:
+            self._active[(rule.id, key)] = deduction
+
+    def _evaluate_fleet(self, rule: Rule) -> None:
+        snaps = self.snapshots
+        hit = (
+            len(snaps) >= rule.min_servers
+            and (rule.all is None or all(rule.all(s) for s in snaps.values()))
+        )
+        context = {"server": "fleet", "total": len(snaps), "others": ", ".join(snaps)}
+        self._set(rule, "*", self._build(rule, context) if hit else None)
+
+    def _evaluate(self, rule: Rule, server: str) -> None:
+        snap = self.snapshots[server]
+        if len(self.snapshots) < rule.min_servers or (rule.when and not rule.when(snap)):
+            self._set(rule, server, None)
+            return
+
+        context: Dict[str, Any] = {**snap, "server": server, "total": len(self.snapshots)}
+
+        if rule.others_any is not None:
+            others = [n for n, s in self.snapshots.items() if n != server and rule.others_any(s)]
+            if not others:
+                self._set(rule, server, None)
+                return
+            context["others"] = ", ".join(others)
+
+        if rule.history is not None:
+            window = list(self.windows.get(server, ()))[-rule.history_of:]
+            if sum(1 for s in window if rule.history(s)) < rule.history_count:
+                self._set(rule, server, None)
+                return
+
+        if rule.trend:
+            trend = self._trend(rule, server)
+            if trend is None:
+                self._set(rule, server, None)
+                return
+            context.update(trend)
+
+        self._set(rule, server, self._build(rule, context))
+
+    def _trend(self, rule: Rule, server: str) -> Optional[Dict[str, float]]:
+        """Growth of a metric over the rule's window, from hourly rollups."""
+        if self.store is None:
+            return None
+        window = rule.trend.get("window_sec", 86400)
+        hourly = self.store.series(server, rule.trend["metric"], resolution=3600, since_sec=window)
+        if len(hourly) < 2:
+            return None
+        growth = hourly[-1]["max"] - hourly[0]["min"]
+        if growth < rule.trend.get("min_growth", 0):
+            return None
+        return {"growth": growth, "trend_from": hourly[0]["min"], "trend_to": hourly[-1]["max"]}
+
+    def _build(self, rule: Rule, context: Dict[str, Any]) -> Dict[str, Any]:
+        confidence = rule.confidence
+        if rule.scale:
+            value = context.get(rule.scale["field"])
+            if isinstance(value, (int, float)):
+                bonus = (value - rule.scale.get("from", 0)) * rule.scale.get("per", 1)
+                confidence += int(min(max(bonus, 0), rule.scale.get("max", 100)))
+        deduction = {
+            "rule": rule.id,
+            "cause": _render(rule.cause, context),
+            "confidence": confidence,
+            "reasoning": _render(rule.reasoning, context),
+            "fix": _render(rule.fix, context),
+        }
+        if rule.likely_causes:
+            deduction["likely_causes"] = rule.likely_causes
+        return deduction
+
+    def deductions(self) -> List[Dict[str, Any]]:
+        """Active deductions, highest confidence first (rule order breaks ties)."""
+        order = {name: i for i, name in enumerate(self.snapshots)}
+        rule_order = {r.id: r.order for r in self.rules}
+        ranked = sorted(
+            self._active.items(),
+            key=lambda kv: (-kv[1]["confidence"], rule_order[kv[0][0]], order.get(kv[0][1], -1)),
+        )
+        return [d for _, d in ranked]
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Evidence Diff — what changed between two collection runs.
+
+Each evidence file is parsed into keyed records (package → version,
+listening socket → process, unit → state, cron line, ...) and two runs
+are compared as record sets: added / removed keys and per-field changes.
+No line diffs, so reordered or re-timed output doesn't show up as noise.
+
+Stays fast with hundreds of runs retained:
+- files whose content hash is identical in both runs are skipped unparsed
+  (the evidence store is content-addressed, so that's a string compare);
+- parsed records are cached per content hash under evidence/parsed/, so
+  each distinct output is parsed once, ever.
+
+Usage:
+    python evidence_diff.py                     # last two runs
+    python evidence_diff.py 20260101_120000 20260102_120000
+    python evidence_diff.py --history 24        # change timeline, last 24 runs
+    python evidence_diff.py --server s62 --json --write
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from evidence_store import EvidenceStore
+from parsers import parse_docker_ps, parse_units
+
+
+EVIDENCE_DIR = Path(os.environ.get(
+    "EVIDENCE_DIR",
+    Path(__file__).resolve().parent.parent.parent.parent / "evidence"
+))
+PARSER_VERSION = 2               # Bump to invalidate cached parses
+
+Records = Dict[str, Dict[str, Any]]   # key → fields ({} for pure set membership)
+Parser = Callable[[str], Records]
+
+
+# ═══════════════════════════════════════════════════════════════
+# RECORD PARSERS — one per evidence file
+# ═══════════════════════════════════════════════════════════════
+
+_SS_PROC_RE = re.compile(r'\(\("([^"]+)"')
+_IP_IFACE_RE = re.compile(r"^\d+:\s+([^:@]+)[@:]")
+
+
+def parse_packages(text: str) -> Records:
+    """dpkg -l → {package: {version, arch, status}}."""
+    records: Records = {}
+    for line in text.splitlines():
+        parts = line.split(None, 4)
+        if len(parts) >= 4 and len(parts[0]) in (2, 3) and parts[0][0] in "uirhp":
+            name = parts[1].split(":")[0]
+            records[name] = {"version": parts[2], "arch": parts[3], "status": parts[0]}
+    return records
+
+
+def parse_unit_records(text: str) -> Records:
+    """systemctl list-units / --failed → {unit: {load, active, sub}}."""
+    return {u.unit: {"load": u.load, "active": u.active, "sub": u.sub} for u in parse_units(text)}
+
+
+def parse_timers(text: str) -> Records:
+    """systemctl list-timers → {timer: {activates}} (next/last run times are noise)."""
+    records: Records = {}
+    for line in text.splitlines():
+        tokens = line.split()
+        for i, token in enumerate(tokens):
+            if token.endswith(".timer"):
+                records[token] = {"activates": tokens[i + 1] if i + 1 < len(tokens) else ""}
+                break
+    return records
+
+
+def parse_network(text: str) -> Records:
+    """ip addr + ip route + ss -tulpn → addr:/route:/listen: records."""
+    records: Records = {}
+    iface = None
+    for line in text.splitlines():
+        m = _IP_IFACE_RE.match(line)
+        if m:
+            iface = m.group(1)
+            continue
+        stripped = line.strip()
+        tokens = stripped.split()
+        if not tokens:
+            continue
+        if tokens[0] in ("inet", "inet6") and iface and len(tokens) > 1:
+            records[f"addr:{iface}:{tokens[1]}"] = {}
+        elif tokens[0] in ("tcp", "udp") and len(tokens) >= 5:
+            # Netid State Recv-Q Send-Q Local:Port Peer:Port [Process]
+            local = tokens[4] if tokens[1] in ("LISTEN", "UNCONN") else None
+            if local:
+                proc = _SS_PROC_RE.search(stripped)
+                records[f"listen:{tokens[0]}:{local}"] = {"process": proc.group(1) if proc else ""}
+        elif (tokens[0] == "default" or "/" in tokens[0] or tokens[0][0].isdigit()) and "dev" in tokens:
+            fields = {k: tokens[i + 1] for i, k in enumerate(tokens[:-1]) if k in ("via", "dev")}
+            records[f"route:{tokens[0]}"] = fields
+    return records
+
+
+def parse_users(text: str) -> Records:
+    """/etc/passwd lines → {user: {uid, gid, home, shell}}."""
+    records: Records = {}
+    for line in text.splitlines():
+        parts = line.split(":")
+        if len(parts) == 7:
+            records[parts[0]] = {"uid": parts[2], "gid": parts[3], "home": parts[5], "shell": parts[6]}
+    return records
+
+
+def parse_crontab(text: str) -> Records:
+    """crontab -l + per-user sections → {"user: entry": {}}."""
+    records: Records = {}
+    user = "(invoking user)"
+    for line in text.splitlines():
+        stripped = line.strip()
+        m = re.match(r"^--- (\S+) ---$", stripped)
+        if m:
+            user = m.group(1)
+        elif stripped and not stripped.startswith("#") and not stripped.startswith("no crontab"):
+            records[f"{user}: {' '.join(stripped.split())}"] = {}
+    return records
+
+
+def parse_docker(text: str) -> Records:
+    """docker ps -a → {container: {state, health, ports}} (uptimes are noise)."""
+    return {
+        c.name: {"state": c.state, "health": c.health or "", "ports": c.ports}
+        for c in parse_docker_ps(text)
+    }
+
+
+def parse_disk_usage(text: str) -> Records:
+    """df -h + du -sh → mount:{size, use} and du:{size} records."""
+    records: Records = {}
+    for line in text.splitlines():
+        tokens = line.split()
+        if len(tokens) >= 6 and tokens[4].endswith("%") and tokens[5].startswith("/"):
+            records[f"mount:{tokens[5]}"] = {"size": tokens[1], "use": tokens[4]}
+        elif len(tokens) == 2 and tokens[1].startswith("/"):
+            records[f"du:{tokens[1].rstrip('/')}"] = {"size": tokens[0]}
+    return records
+
+
+def parse_system_info(text: str) -> Records:
+    """hostname / uname / os-release → host, kernel and os:* records."""
+    records: Records = {}
+    lines = text.splitlines()
+    if lines:
+        records["host"] = {"name": lines[0].strip()}
+    for line in lines:
+        if line.startswith("Linux "):
+            tokens = line.split()
+            if len(tokens) > 2:
+                records["kernel"] = {"release": tokens[2]}
+        elif re.match(r"^[A-Z_]+=", line):
+            key, _, value = line.partition("=")
+            records[f"os:{key}"] = {"value": value.strip('"')}
+    return records
+
+
+def parse_nginx(text: str) -> Records:
+    """sites-enabled listing + nginx -T → site:/server_name:/listen: records."""
+    records: Records = {}
+    for line in text.splitlines():
+        stripped = line.strip()
+        tokens = stripped.split()
+        if stripped.startswith(("-", "l")) and len(tokens) >= 9 and tokens[-1] not in (".", ".."):
+            name = tokens[8]
+            records[f"site:{name}"] = {"target": tokens[-1] if "->" in tokens else ""}
+        elif stripped.startswith(("server_name ", "listen ")) and stripped.endswith(";"):
+            records[f"{tokens[0]}:{' '.join(tokens[1:]).rstrip(';')}"] = {}
+    return records
+
+
+PARSERS: Dict[str, Parser] = {
+    "packages.txt": parse_packages,
+    "services.txt": parse_unit_records,
+    "failed.txt": parse_unit_records,
+    "timers.txt": parse_timers,
+    "network.txt": parse_network,
+    "users.txt": parse_users,
+    "crontab.txt": parse_crontab,
+    "docker.txt": parse_docker,
+    "disk-usage.txt": parse_disk_usage,
+    "system-info.txt": parse_system_info,
+    "nginx.txt": parse_nginx,
+    # processes.txt is too volatile for record diffs — reported as changed/unchanged only
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+# DIFF ENGINE
+# ═══════════════════════════════════════════════════════════════
+
+class EvidenceDiffer:
+    """Parses (with a per-hash cache) and diffs evidence runs."""
+
+    def __init__(self, store: EvidenceStore):
+        self.store = store
+        self.cache_dir = store.root / "parsed"
+        self._memo: Dict[str, Records] = {}
+
+    def records(self, filename: str, digest: str) -> Optional[Records]:
+        """Parsed records for one stored object (None if the file has no parser)."""
+        parser = PARSERS.get(filename)
+        if parser is None:
+            return None
+        memo_key = f"{parser.__name__}:{digest}"
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        cache_file = self.cache_dir / digest[:2] / f"{digest[2:]}.{parser.__name__}.json"
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))
+            if cached.get("version") == PARSER_VERSION:
+                self._memo[memo_key] = cached["records"]
+                return cached["records"]
+        except (OSError, ValueError):
+            pass
+
+        records = parser(self.store.read_text(digest))
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(json.dumps({"version": PARSER_VERSION, "records": records}),
+                                  encoding="utf-8")
+        except OSError:
+            pass  # Cache is an optimisation only
+        self._memo[memo_key] = records
+        return records
+
+    @staticmethod
+    def diff_records(old: Records, new: Records) -> Dict[str, Any]:
+        """Set/field diff of two record maps."""
+        added = sorted(new.keys() - old.keys())
+        removed = sorted(old.keys() - new.keys())
+        changed = {}
+        for key in sorted(old.keys() & new.keys()):
+            a, b = old[key], new[key]
+            if a != b:
+                changed[key] = {f: [a.get(f), b.get(f)] for f in sorted(a.keys() | b.keys())
+                                if a.get(f) != b.get(f)}
+        result: Dict[str, Any] = {}
+        if added:
+            result["added"] = {k: new[k] for k in added}
+        if removed:
+            result["removed"] = {k: old[k] for k in removed}
+        if changed:
+            result["changed"] = changed
+        return result
+
+    def diff_runs(self, old_run: str, new_run: str, server: Optional[str] = None) -> Dict[str, Any]:
+        """Compact change report between two runs."""
+        old_manifest = self.store.load_run(old_run)
+        new_manifest = self.store.load_run(new_run)
+        old_servers = old_manifest.get("servers", {})
+        new_servers = new_manifest.get("servers", {})
+
+        report: Dict[str, Any] = {"from": old_run, "to": new_run, "servers": {}}
+        for name in sorted(old_servers.keys() | new_servers.keys()):
+            if server and name != server:
+                continue
+            if name not in old_servers or name not in new_servers:
+                report["servers"][name] = {"status": "added" if name in new_servers else "missing"}
+                continue
+            old_files = old_servers[name].get("files", {})
+            new_files = new_servers[name].get("files", {})
+            changes: Dict[str, Any] = {}
+            for filename in sorted(old_files.keys() | new_files.keys()):
+                a, b = old_files.get(filename), new_files.get(filename)
+                if a and b and a["sha256"] == b["sha256"]:
+                    continue  # Identical content — no parsing needed
+                if not a or not b:
+                    changes[filename] = {"status": "added" if b else "missing"}
+                    continue
+                old_records = self.records(filename, a["sha256"])
+                if old_records is None:
+                    changes[filename] = {"status": "changed"}
+                    continue
+                delta = self.diff_records(old_records, self.records(filename, b["sha256"]))
+                if delta:
+                    changes[filename] = delta
+            if changes:
+                report["servers"][name] = changes
+        return report
+
+    def history(self, runs: List[str], server: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Reports for each consecutive pair of runs that has changes."""
+        reports = []
+        for old_run, new_run in zip(runs, runs[1:]):
+            report = self.diff_runs(old_run, new_run, server)
+            if report["servers"]:
+                reports.append(report)
+        return reports
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable change report."""
+    lines = [f"Δ {report['from']} → {report['to']}"]
+    if not report["servers"]:
+        lines.append("  (no changes)")
+    for server, files in report["servers"].items():
+        if "status" in files:
+            lines.append(f"  {server}: {files['status']}")
+            continue
+        lines.append(f"  {server}:")
+        for filename, delta in files.items():
+            if "status" in delta:
+                lines.append(f"    {filename}: {delta['status']}")
+                continue
+            lines.append(f"    {filename}:")
+            for key, fields in delta.get("added", {}).items():
+                detail = " ".join(f"{k}={v}" for k, v in fields.items() if v)
+                lines.append(f"      + {key}{'  ' + detail if detail else ''}")
+            for key in delta.get("removed", {}):
+                lines.append(f"      - {key}")
+            for key, fields in delta.get("changed", {}).items():
+                detail = ", ".join(f"{f}: {a} → {b}" for f, (a, b) in fields.items())
+                lines.append(f"      ~ {key}  {detail}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Diff evidence collection runs")
+    parser.add_argument("runs", nargs="*", help="OLD NEW run names (default: last two)")
+    parser.add_argument("--server", "-s", help="Only report this server")
+    parser.add_argument("--history", type=int, metavar="N",
+                        help="Change timeline across the last N runs")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    parser.add_argument("--write", action="store_true",
+                        help="Save the report under evidence/reports/")
+    args = parser.parse_args()
+
+    store = EvidenceStore(EVIDENCE_DIR)
+    differ = EvidenceDiffer(store)
+    available = store.runs()
+
+    if args.history:
+        reports = differ.history(available[-args.history:], args.server)
+    else:
+        pair = args.runs or available[-2:]
+        if len(pair) != 2:
+            print(f"Need two runs to compare (found {len(available)} in {store.runs_dir})")
+            sys.exit(1)
+        reports = [differ.diff_runs(pair[0], pair[1], args.server)]
+
+    if args.json:
+        print(json.dumps(reports if args.history else reports[0], indent=2))
+    else:
+        print("\n\n".join(format_report(r) for r in reports) or "No changes")
+
+    if args.write and reports:
+        out_dir = store.root / "reports"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_file = out_dir / f"{reports[0]['from']}..{reports[-1]['to']}.json"
+        out_file.write_text(json.dumps(reports if args.history else reports[0], indent=2),
+                            encoding="utf-8")
+        print(f"\nReport: {out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Evidence Store — content-addressed, deduplicated command output.
+
+Command output is streamed straight to disk (never held in memory),
+hashed on the way and stored once per distinct content:
+
+    evidence/
+      objects/ab/cdef….gz     gzip'd output, named by sha256 of the raw bytes
+      runs/20260101_120000.json   per-run manifest: server → file → object
+
+An hourly collection whose `dpkg -l` didn't change adds only a manifest
+line pointing at the existing object, so `evidence/` grows with the
+amount of *change*, not the number of runs. Each output is capped at
+MAX_OUTPUT_BYTES; anything beyond is dropped and the object is marked
+truncated.
+
+Usage:
+    from evidence_store import EvidenceStore
+
+    store = EvidenceStore(Path("evidence"))
+    writer = store.writer()
+    for chunk in stream:
+        if not writer.write(chunk):
+            break                      # cap reached
+    obj = writer.finish()              # EvidenceObject(sha256, size, truncated)
+    text = store.read_text(obj.sha256)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set
+
+
+MAX_OUTPUT_BYTES = 2 * 1024 * 1024   # Per-command cap
+TRUNCATION_MARKER = b"\n[TRUNCATED: output exceeded %d bytes]\n"
+KEEP_RUNS = 500                      # Older run manifests are pruned (objects GC'd)
+
+
+@dataclass
+class EvidenceObject:
+    """One stored output, as referenced from a run manifest."""
+    sha256: str
+    size: int           # Raw (uncompressed) bytes stored
+    truncated: bool
+
+
+class ObjectWriter:
+    """Streams bytes into a temp file, hashing and gzip'ing as it goes."""
+
+    def __init__(self, store: "EvidenceStore", cap: int = MAX_OUTPUT_BYTES):
+        self.store = store
+        self.cap = cap
+        self.size = 0
+        self.truncated = False
+        self._hash = hashlib.sha256()
+        fd, self._tmp = tempfile.mkstemp(dir=store.objects_dir, suffix=".tmp")
+        self._raw = os.fdopen(fd, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0)
+
+    def _put(self, data: bytes) -> None:
+        self._hash.update(data)
+        self._gz.write(data)
+        self.size += len(data)
+
+    def write(self, data: bytes) -> bool:
+        """Append a chunk. Returns False once the cap is reached (caller should stop)."""
+        if self.truncated:
+            return False
+        room = self.cap - self.size
+        if len(data) > room:
+            self._put(data[:room])
+            self._put(TRUNCATION_MARKER % self.cap)
+            self.truncated = True
+            return False
+        self._put(data)
+        return True
+
+    def finish(self) -> EvidenceObject:
+        """Close the temp file and move it into place (or drop it if already stored)."""
+        self._gz.close()
+        self._raw.close()
+        digest = self._hash.hexdigest()
+        target = self.store.object_path(digest)
+        if target.exists():
+            os.unlink(self._tmp)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp, target)
+            self.store.new_objects += 1
+            self.store.new_bytes += target.stat().st_size
+        return EvidenceObject(sha256=digest, size=self.size, truncated=self.truncated)
+
+    def abort(self) -> None:
+        """Discard a partially written object."""
+        self._gz.close()
+        self._raw.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
+
+class EvidenceStore:
+    """Content-addressed objects plus per-run manifests under one directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.runs_dir = self.root / "runs"
+        self.new_objects = 0        # Objects actually written by this instance
+        self.new_bytes = 0          # Their compressed size on disk
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+
+    # ─── Objects ───
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}.gz"
+
+    def writer(self, cap: int = MAX_OUTPUT_BYTES) -> ObjectWriter:
+        """Start streaming a new object."""
+        return ObjectWriter(self, cap)
+
+    def put(self, data: bytes, cap: int = MAX_OUTPUT_BYTES) -> EvidenceObject:
+        """Store an in-memory blob (small outputs)."""
+        writer = self.writer(cap)
+        writer.write(data)
+        return writer.finish()
+
+    def read_bytes(self, digest: str) -> bytes:
+        with gzip.open(self.object_path(digest), "rb") as f:
+            return f.read()
+
+    def read_text(self, digest: str) -> str:
+        return self.read_bytes(digest).decode("utf-8", errors="replace")
+
+    # ─── Runs ───
+
+    def save_run(self, name: str, manifest: Dict[str, Any]) -> Path:
+        """Write a run manifest atomically."""
+        path = self.runs_dir / f"{name}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def runs(self) -> List[str]:
+        """Run names, oldest first (names are sortable timestamps)."""
+        return sorted(p.stem for p in self.runs_dir.glob("*.json"))
+
+    def load_run(self, name: str) -> Dict[str, Any]:
+        return json.loads((self.runs_dir / f"{name}.json").read_text(encoding="utf-8"))
+
+    def iter_files(self, manifest: Dict[str, Any]) -> Iterator[tuple]:
+        """(server, filename, EvidenceObject) for every output in a run."""
+        for server, info in manifest.get("servers", {}).items():
+            for filename, obj in info.get("files", {}).items():
+                yield server, filename, EvidenceObject(
+                    sha256=obj["sha256"], size=obj["size"], truncated=obj["truncated"])
+
+    # ─── Retention ───
+
+    def prune(self, keep: int = KEEP_RUNS) -> int:
+        """Drop the oldest run manifests beyond `keep`, then GC objects. Returns objects removed."""
+        expired = self.runs()[:-keep] if keep else []
+        for name in expired:
+            (self.runs_dir / f"{name}.json").unlink()
+        return self.gc() if expired else 0
+
+    def gc(self) -> int:
+        """Delete objects no run manifest references."""
+        live: Set[str] = set()
+        for name in self.runs():
+            try:
+                live.update(obj.sha256 for _, _, obj in self.iter_files(self.load_run(name)))
+            except (OSError, ValueError):
+                return 0  # Unreadable manifest — don't risk deleting its objects
+        removed = 0
+        for path in self.objects_dir.glob("??/*.gz"):
+            if path.parent.name + path.name[:-3] not in live:
+                path.unlink()
+                removed += 1
+        # Parse caches (evidence_diff.py) are keyed by object hash too
+        for path in (self.root / "parsed").glob("??/*.json"):
+            if path.parent.name + path.name.split(".", 1)[0] not in live:
+                path.unlink()
+        return removed
+
+
+def object_entry(obj: EvidenceObject, **extra: Any) -> Dict[str, Any]:
+    """Manifest entry for an object (plus command metadata)."""
+    return {**asdict(obj), **extra}
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Server Inventory — one validated source of truth for all monitor tools.
+
+Parses inventory.yaml into __slots__ objects (Server, Route). The parsed
+inventory is kept in-process, keyed on the YAML file's path, size and
+mtime, so repeated loads in one run are free and PyYAML is only imported
+on the first load. Aliases and hosts end up in ssh argv, so values that
+would parse as options (leading "-") are rejected.
+
+Usage:
+    from inventory import load_inventory
+
+    inv = load_inventory()
+    for server in inv.select(group="web"):
+        print(server.name, server.purpose, server.aliases)
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+INVENTORY_FILE = Path(os.environ.get(
+    "SERVER_INVENTORY",
+    Path(__file__).resolve().parent / "inventory.yaml"
+))
+
+
+class InventoryError(ValueError):
+    """Raised when the inventory file is missing or malformed."""
+
+
+class Route:
+    """One network path to a server (SSH alias + the host:port behind it)."""
+
+    __slots__ = ("name", "alias", "host", "port")
+
+    def __init__(self, name: str, alias: str, host: str, port: int):
+        self.name = name
+        self.alias = alias
+        self.host = host
+        self.port = port
+
+    def __repr__(self) -> str:
+        return f"Route({self.name}: {self.alias} → {self.host}:{self.port})"
+
+
+class Server:
+    """One monitored host."""
+
+    __slots__ = ("name", "purpose", "routes", "http_urls", "base_timeout", "tags", "groups")
+
+    def __init__(
+        self,
+        name: str,
+        purpose: str,
+        routes: List[Route],
+        http_urls: List[str],
+        base_timeout: int,
+        tags: Tuple[str, ...],
+        groups: Tuple[str, ...],
+    ):
+        self.name = name
+        self.purpose = purpose
+        self.routes = routes
+        self.http_urls = http_urls
+        self.base_timeout = base_timeout
+        self.tags = tags
+        self.groups = groups
+
+    @property
+    def aliases(self) -> List[str]:
+        """SSH aliases in fallback order."""
+        return [r.alias for r in self.routes]
+
+    @property
+    def primary(self) -> Route:
+        """First (preferred) route — usually Tailscale."""
+        return self.routes[0]
+
+    @property
+    def tcp_checks(self) -> List[Tuple[str, int]]:
+        """host:port pairs for the SSH-port probe (primary route)."""
+        return [(self.primary.host, self.primary.port)]
+
+    def route(self, name: str) -> Optional[Route]:
+        """Route by name (tailscale, public, internal), or None."""
+        for r in self.routes:
+            if r.name == name:
+                return r
+        return None
+
+    def __repr__(self) -> str:
+        return f"Server({self.name}: {self.purpose})"
+
+
+class Inventory:
+    """All servers plus group membership."""
+
+    __slots__ = ("servers", "groups")
+
+    def __init__(self, servers: Dict[str, Server]):
+        self.servers = servers
+        self.groups: Dict[str, List[str]] = {}
+        for server in servers.values():
+            for group in server.groups:
+                self.groups.setdefault(group, []).append(server.name)
+
+    def __iter__(self) -> Iterator[Server]:
+        return iter(self.servers.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.servers
+
+    def __getitem__(self, name: str) -> Server:
+        return self.servers[name]
+
+    def names(self) -> List[str]:
+        """Server names in file order."""
+        return list(self.servers)
+
+    def select(
+        self,
+        names: Optional[List[str]] = None,
+        group: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Server]:
+        """Servers matching all given filters (no filters → everything)."""
+        if group is not None and group not in self.groups:
+            raise InventoryError(f"unknown group {group!r} (known: {', '.join(sorted(self.groups))})")
+        unknown = [n for n in names or [] if n not in self.servers]
+        if unknown:
+            raise InventoryError(f"unknown server(s): {', '.join(unknown)}")
+
+        selected = []
+        for server in self.servers.values():
+            if names and server.name not in names:
+                continue
+            if group is not None and group not in server.groups:
+                continue
+            if tag is not None and tag not in server.tags:
+                continue
+            selected.append(server)
+        return selected
+
+
+def _validate(data: Any, source: Path) -> Dict[str, Dict[str, Any]]:
+    """Check structure and normalise types; returns the plain-dict form."""
+    if not isinstance(data, dict) or not isinstance(data.get("servers"), dict):
+        raise InventoryError(f"{source}: expected a top-level 'servers' mapping")
+
+    servers = {}
+    for name, spec in data["servers"].items():
+        where = f"{source}: server {name!r}"
+        if not isinstance(spec, dict):
+            raise InventoryError(f"{where}: expected a mapping")
+        routes = spec.get("routes") or []
+        if not routes:
+            raise InventoryError(f"{where}: needs at least one route")
+
+        seen = set()
+        clean_routes = []
+        for route in routes:
+            try:
+                r = {
+                    "name": str(route["name"]),
+                    "alias": str(route["alias"]),
+                    "host": str(route["host"]),
+                    "port": int(route["port"]),
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                raise InventoryError(f"{where}: bad route {route!r} ({e})")
+            for field in ("alias", "host"):
+                if not r[field] or r[field].startswith("-"):
+                    raise InventoryError(f"{where}: route {r['name']} has an invalid {field} {r[field]!r}")
+            if not 0 < r["port"] < 65536:
+                raise InventoryError(f"{where}: route {r['name']} port out of range")
+            if r["name"] in seen:
+                raise InventoryError(f"{where}: duplicate route {r['name']!r}")
+            seen.add(r["name"])
+            clean_routes.append(r)
+
+        servers[str(name)] = {
+            "purpose": str(spec.get("purpose", "")),
+            "routes": clean_routes,
+            "http_urls": [str(u) for u in spec.get("http_urls") or []],
+            "base_timeout": int(spec.get("base_timeout", 5)),
+            "tags": [str(t) for t in spec.get("tags") or []],
+            "groups": [str(g) for g in spec.get("groups") or []],
+        }
+    return servers
+
+
+def _build(servers: Dict[str, Dict[str, Any]]) -> Inventory:
+    return Inventory({
+        name: Server(
+            name=name,
+            purpose=spec["purpose"],
+            routes=[Route(**r) for r in spec["routes"]],
+            http_urls=spec["http_urls"],
+            base_timeout=spec["base_timeout"],
+            tags=tuple(spec["tags"]),
+            groups=tuple(spec["groups"]),
+        )
+        for name, spec in servers.items()
+    })
+
+
+_loaded: Dict[Path, Tuple[Tuple[int, int], Inventory]] = {}
+
+
+def load_inventory(path: Path = INVENTORY_FILE) -> Inventory:
+    """Load the inventory (in-process cache, else parse and validate the YAML)."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError as e:
+        raise InventoryError(f"inventory not found: {path} ({e})")
+    key = (st.st_mtime_ns, st.st_size)
+
+    hit = _loaded.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+
+    import yaml  # Only paid on the first load of a process
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    except yaml.YAMLError as e:
+        raise InventoryError(f"{path}: invalid YAML ({e})")
+    servers = _validate(data, path)
+
+    inventory = _build(servers)
+    _loaded[path] = (key, inventory)
+    return inventory
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Streaming Latency Estimator — EWMA + P² quantiles, O(1) memory.
+
+Tracks a smoothed latency (EWMA), jitter (EWMA of absolute deviation,
+like TCP's RTTVAR) and p95/p99 via the P² algorithm (Jain & Chlamtac),
+which keeps five markers per quantile instead of the raw samples.
+
+Timeouts are derived from p99, so a single slow outlier barely moves
+them, while a host that is consistently slow still gets a generous
+one. A regression is flagged when REGRESSION_STREAK consecutive
+samples land above the historical p95.
+
+Everything is plain data, so estimators round-trip through JSON via
+dataclasses.asdict() / from_dict().
+
+Usage:
+    from latency_estimator import LatencyEstimator
+
+    est = LatencyEstimator()
+    for rtt in (0.8, 0.9, 0.7, 1.1, 0.8, 0.9):
+        est.update(rtt)
+    est.timeout(floor=5, default=10)   # → 5
+    est.regressed                      # → False
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+EWMA_ALPHA = 0.2            # Weight of the newest sample
+JITTER_BETA = 0.25          # Weight for the jitter (mean deviation) EWMA
+MIN_SAMPLES = 5             # Below this, timeout() returns the default
+TIMEOUT_HEADROOM = 1.5      # timeout = p99 * headroom
+TIMEOUT_CEILING = 30        # Never wait longer than this
+REGRESSION_STREAK = 3       # Consecutive samples above p95 to flag a regression
+
+
+def timeout_from_p99(p99: float, floor: int, ceiling: int = TIMEOUT_CEILING) -> int:
+    """Timeout in whole seconds for a p99 latency: headroom, clamped to [floor, ceiling]."""
+    return max(floor, min(ceiling, math.ceil(p99 * TIMEOUT_HEADROOM)))
+
+
+@dataclass
+class P2Quantile:
+    """P² streaming estimate of one quantile (five markers)."""
+    p: float
+    heights: List[float] = field(default_factory=list)
+    positions: List[float] = field(default_factory=list)
+    desired: List[float] = field(default_factory=list)
+
+    def update(self, x: float) -> None:
+        """Add one observation."""
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            if len(q) == 5:
+                p = self.p
+                self.positions = [0.0, 1.0, 2.0, 3.0, 4.0]
+                self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+            return
+
+        # Find the cell k with q[k] <= x < q[k+1], extending the extremes
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        increments = (0.0, self.p / 2, self.p, (1 + self.p) / 2, 1.0)
+        for i in range(5):
+            self.desired[i] += increments[i]
+
+        # Nudge the three middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1.0 if d > 0 else -1.0
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = self._linear(i, d)
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i: int, d: float) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: float) -> float:
+        q, n = self.heights, self.positions
+        j = i + int(d)
+        return q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+
+    @property
+    def value(self) -> float:
+        """Current estimate (exact while fewer than five samples)."""
+        q = self.heights
+        if not q:
+            return 0.0
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(math.ceil(self.p * len(q))) - 1)]
+        return q[2]
+
+
+@dataclass
+class LatencyEstimator:
+    """EWMA, jitter and p95/p99 for one latency stream."""
+    count: int = 0
+    ewma: float = 0.0
+    jitter: float = 0.0
+    streak: int = 0             # Consecutive samples above p95
+    p95: P2Quantile = field(default_factory=lambda: P2Quantile(0.95))
+    p99: P2Quantile = field(default_factory=lambda: P2Quantile(0.99))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyEstimator":
+        """Rebuild from the dict produced by dataclasses.asdict()."""
+        data = dict(data)
+        data["p95"] = P2Quantile(**data.get("p95", {"p": 0.95}))
+        data["p99"] = P2Quantile(**data.get("p99", {"p": 0.99}))
+        return cls(**data)
+
+    def update(self, x: float) -> None:
+        """Add one latency sample (seconds)."""
+        if self.count == 0:
+            self.ewma = x
+            self.jitter = x / 2
+        else:
+            self.jitter = (1 - JITTER_BETA) * self.jitter + JITTER_BETA * abs(x - self.ewma)
+            self.ewma = (1 - EWMA_ALPHA) * self.ewma + EWMA_ALPHA * x
+
+        # Compare against history *before* this sample moves the quantile
+        if self.count >= MIN_SAMPLES and x > self.p95.value:
+            self.streak += 1
+        else:
+            self.streak = 0
+
+        self.p95.update(x)
+        self.p99.update(x)
+        self.count += 1
+
+    @property
+    def regressed(self) -> bool:
+        """True when latency has stayed above the historical p95."""
+        return self.streak >= REGRESSION_STREAK
+
+    def timeout(self, floor: int, default: int, ceiling: int = TIMEOUT_CEILING) -> int:
+        """Timeout in whole seconds: p99 with headroom, clamped to [floor, ceiling]."""
+        if self.count < MIN_SAMPLES:
+            return default
+        return timeout_from_p99(self.p99.value, floor, ceiling)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+OpenMetrics Exporter — stdlib HTTP endpoint serving a cached snapshot.
+
+The monitor pushes observations (histograms) and gauge families into the
+exporter after each probe and calls publish(); publish() renders the
+OpenMetrics text once and caches it. GET /metrics only returns the cached
+bytes, so a scrape never triggers a probe or an SSH connection.
+
+Usage:
+    from metrics_exporter import MetricsExporter
+
+    exporter = MetricsExporter()
+    exporter.start(port=9464)
+    exporter.observe("health_probe_latency_seconds", {"server": "s62", "layer": "ssh"}, 0.84)
+    exporter.set_gauges("health_ssh_budget_remaining", "SSH handshakes left this minute",
+                        [({"server": "s62"}, 2)])
+    exporter.publish()
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Dict[str, str]
+
+
+def format_labels(labels: Labels) -> str:
+    """Render {k="v",...} with OpenMetrics escaping ("" for no labels)."""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def format_value(value: float) -> str:
+    """Integers without a trailing .0, everything else as repr."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Cumulative histogram for one label set."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one observation."""
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str, labels: Labels) -> List[str]:
+        """Sample lines for this label set."""
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': format_value(bound)})} {count}")
+        lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {self.total}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.total}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(self.sum)}")
+        return lines
+
+
+class MetricsExporter:
+    """Holds metric families and serves their last published rendering."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._histogram_help: Dict[str, str] = {}
+        self._gauges: Dict[str, Tuple[str, List[Tuple[Labels, float]]]] = {}
+        self._cached = b"# EOF\n"
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe_histogram(self, name: str, help_text: str) -> None:
+        """Set the HELP text for a histogram family."""
+        self._histogram_help[name] = help_text
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Record one observation into a histogram family."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._histograms.setdefault(name, {})
+            family.setdefault(key, Histogram()).observe(value)
+
+    def set_gauges(self, name: str, help_text: str, samples: List[Tuple[Labels, float]]) -> None:
+        """Replace all samples of a gauge family."""
+        with self._lock:
+            self._gauges[name] = (help_text, samples)
+
+    def render(self) -> str:
+        """Render every family as OpenMetrics text."""
+        lines = []
+        with self._lock:
+            for name, family in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                if name in self._histogram_help:
+                    lines.append(f"# HELP {name} {self._histogram_help[name]}")
+                for key, hist in sorted(family.items()):
+                    lines.extend(hist.render(name, dict(key)))
+            for name, (help_text, samples) in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"# HELP {name} {help_text}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def publish(self) -> None:
+        """Render once and cache the bytes scrapes will receive."""
+        text = self.render().encode("utf-8")
+        with self._lock:
+            self._cached = text
+
+    def snapshot(self) -> bytes:
+        """Last published rendering."""
+        with self._lock:
+            return self._cached
+
+    def start(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve GET /metrics from a background thread."""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.snapshot()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # Scrapes every few seconds would flood stdout
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Shut the HTTP endpoint down."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
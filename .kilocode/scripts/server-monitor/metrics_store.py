@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Health Metrics Store — append-only time series in SQLite (WAL mode).
+
+Every probe latency and evidence metric is appended as a raw sample.
+On insert, the sample is also folded into 1m / 1h / 1d rollup buckets
+(count, sum, min, max), so long-range trends stay queryable after the
+raw samples have been pruned.
+
+Retention:
+- raw samples: RAW_RETENTION_SEC (7 days) — used for percentiles
+- rollups: ROLLUP_RETENTION_SEC per resolution (1m: 30d, 1h: 1y, 1d: forever)
+
+Usage:
+    from metrics_store import MetricsStore
+
+    store = MetricsStore(Path("health-metrics.db"))
+    store.record("s62", {"ssh_latency": 0.84, "disk_pct": 71})
+    p95 = store.percentile("s62", "ssh_latency", 0.95, window_sec=86400)
+    hourly = store.series("s62", "disk_pct", resolution=3600, since_sec=7 * 86400)
+    last5 = store.recent("s62", ["ssh_latency"], limit=5)   # [{"ssh_latency": 0.84}, ...]
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+RESOLUTIONS = (60, 3600, 86400)                    # 1m, 1h, 1d buckets
+RAW_RETENTION_SEC = 7 * 86400
+ROLLUP_RETENTION_SEC = {60: 30 * 86400, 3600: 365 * 86400, 86400: None}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    server TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts     REAL NOT NULL,
+    value  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_lookup ON samples (server, metric, ts);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    server     TEXT NOT NULL,
+    metric     TEXT NOT NULL,
+    count      INTEGER NOT NULL,
+    sum        REAL NOT NULL,
+    min        REAL NOT NULL,
+    max        REAL NOT NULL,
+    PRIMARY KEY (server, metric, resolution, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (resolution, bucket, server, metric, count, sum, min, max)
+VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (server, metric, resolution, bucket) DO UPDATE SET
+    count = count + 1,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+def quantile(values: Sequence[float], q: float) -> Optional[float]:
+    """Linear-interpolated quantile of a sorted sequence (None if empty)."""
+    if not values:
+        return None
+    pos = (len(values) - 1) * q
+    lo, hi = math.floor(pos), math.ceil(pos)
+    if lo == hi:
+        return values[lo]
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+class MetricsStore:
+    """Append-only per-server metric history with rollups."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, server: str, metrics: Dict[str, float], ts: Optional[float] = None) -> None:
+        """Append one sample per metric and fold it into every rollup resolution."""
+        ts = time.time() if ts is None else ts
+        rows = [(server, m, ts, float(v)) for m, v in metrics.items() if v is not None]
+        if not rows:
+            return
+        rollups = [
+            (res, int(ts // res) * res, server, m, v, v, v)
+            for server, m, _, v in rows
+            for res in RESOLUTIONS
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany(UPSERT_ROLLUP, rollups)
+
+    def values(self, server: str, metric: str, window_sec: float) -> List[float]:
+        """Raw sample values within the window, sorted ascending."""
+        since = time.time() - window_sec
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM samples WHERE server = ? AND metric = ? AND ts >= ? "
+                "ORDER BY value",
+                (server, metric, since),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def percentiles(
+        self,
+        server: str,
+        metric: str,
+        qs: Sequence[float] = (0.5, 0.95, 0.99),
+        window_sec: float = 86400,
+    ) -> Dict[float, Optional[float]]:
+        """Several quantiles from one scan of the raw samples."""
+        values = self.values(server, metric, window_sec)
+        return {q: quantile(values, q) for q in qs}
+
+    def percentile(
+        self,
+        server: str,
+        metric: str,
+        q: float,
+        window_sec: float = 86400,
+    ) -> Optional[float]:
+        """Single quantile (0..1) of a metric over the window, None if no samples."""
+        return self.percentiles(server, metric, (q,), window_sec)[q]
+
+    def latest(self, server: str, metric: str) -> Optional[Tuple[float, float]]:
+        """Most recent (ts, value) for a metric."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts, value FROM samples WHERE server = ? AND metric = ? "
+                "ORDER BY ts DESC LIMIT 1",
+                (server, metric),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def recent(
+        self,
+        server: str,
+        metrics: Sequence[str],
+        limit: int,
+        before: Optional[float] = None,
+    ) -> List[Dict[str, float]]:
+        """Last `limit` samples of the given metrics, grouped per record() call, oldest first."""
+        if not metrics or limit <= 0:
+            return []
+        before = time.time() if before is None else before
+        marks = ", ".join("?" for _ in metrics)
+        with self._lock:
+            stamps = [r[0] for r in self._conn.execute(
+                f"SELECT DISTINCT ts FROM samples WHERE server = ? AND metric IN ({marks}) "
+                "AND ts < ? ORDER BY ts DESC LIMIT ?",
+                (server, *metrics, before, limit),
+            ).fetchall()]
+            if not stamps:
+                return []
+            rows = self._conn.execute(
+                f"SELECT ts, metric, value FROM samples WHERE server = ? AND metric IN ({marks}) "
+                "AND ts >= ? AND ts < ? ORDER BY ts",
+                (server, *metrics, min(stamps), before),
+            ).fetchall()
+        grouped: Dict[float, Dict[str, float]] = {}
+        for ts, metric, value in rows:
+            grouped.setdefault(ts, {})[metric] = value
+        return list(grouped.values())
+
+    def series(
+        self,
+        server: str,
+        metric: str,
+        resolution: int = 3600,
+        since_sec: float = 86400,
+    ) -> List[Dict[str, float]]:
+        """Downsampled series: [{bucket, count, avg, min, max}, ...] oldest first."""
+        since = int(time.time() - since_sec)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, count, sum, min, max FROM rollups "
+                "WHERE server = ? AND metric = ? AND resolution = ? AND bucket >= ? "
+                "ORDER BY bucket",
+                (server, metric, resolution, since - since % resolution),
+            ).fetchall()
+        return [
+            {"bucket": b, "count": c, "avg": s / c, "min": lo, "max": hi}
+            for b, c, s, lo, hi in rows
+        ]
+
+    def prune(self) -> None:
+        """Drop raw samples and rollups past their retention."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM samples WHERE ts < ?", (now - RAW_RETENTION_SEC,))
+            for res, keep in ROLLUP_RETENTION_SEC.items():
+                if keep is not None:
+                    self._conn.execute(
+                        "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                        (res, int(now - keep)),
+                    )
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Evidence Parsers — typed records from common command output.
+
+One place that understands `df`, `free`, `/proc/loadavg`,
+`systemctl --failed`, `ss -tlnp` and `docker ps`, with precompiled
+patterns. parse_sample() turns a whole evidence dict into an
+EvidenceSample once; alerting (thresholds.py), metrics and deduction
+all read that instead of re-splitting strings.
+
+Usage:
+    from parsers import parse_sample
+
+    sample = parse_sample({"disk": "/dev/sda1 50G 44G 3.9G 92% /", "load": "0.5 0.6 0.7 1/200 42"})
+    print(sample.root_disk.use_pct, sample.load.load_1m, sample.metrics())
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+_DF_RE = re.compile(r"^(?P<fs>\S+)\s+(?P<size>\S+)\s+(?P<used>\S+)\s+(?P<avail>\S+)\s+"
+                    r"(?P<pct>\d+)%\s+(?P<mount>/.*)$")
+_SIZE_RE = re.compile(r"^(?P<num>[\d.]+)(?P<unit>[KMGTPE]?)(?:i?B?)$", re.IGNORECASE)
+_LOADAVG_RE = re.compile(r"^\s*([\d.]+)\s+([\d.]+)\s+([\d.]+)(?:\s+(\d+)/(\d+))?(?:\s+(\d+))?")
+_UNIT_RE = re.compile(r"^[●*×\s]*(?P<unit>\S+\.[a-z]+)\s+(?P<load>\S+)\s+(?P<active>\S+)\s+"
+                      r"(?P<sub>\S+)\s*(?P<desc>.*)$")
+_SS_PROC_RE = re.compile(r'\(\("(?P<name>[^"]+)",pid=(?P<pid>\d+)')
+_HEALTH_RE = re.compile(r"\((healthy|unhealthy|health: starting)\)")
+
+_UNIT_FACTORS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4,
+                 "P": 1024 ** 5, "E": 1024 ** 6}
+_NO_DATA = ("", "none", "timeout")
+
+
+def parse_size(text: str) -> Optional[float]:
+    """'4.4Gi' / '3.9G' / '512M' / '0B' / '1024' → bytes (binary units, as -h prints)."""
+    m = _SIZE_RE.match(text.strip())
+    if not m:
+        return None
+    return float(m.group("num")) * _UNIT_FACTORS[m.group("unit").upper()]
+
+
+# ═══════════════════════════════════════════════════════════════
+# RECORDS
+# ═══════════════════════════════════════════════════════════════
+
+@dataclass
+class DiskUsage:
+    """One `df` row."""
+    filesystem: str
+    size: str
+    used: str
+    avail: str
+    use_pct: float
+    mount: str
+
+
+@dataclass
+class Memory:
+    """`free` Mem: row, in bytes."""
+    total: float
+    used: float
+    free: float
+    available: float
+
+    @property
+    def used_pct(self) -> float:
+        """Share of memory not available to new processes."""
+        return (self.total - self.available) / self.total * 100 if self.total else 0.0
+
+
+@dataclass
+class LoadAvg:
+    """/proc/loadavg."""
+    load_1m: float
+    load_5m: float
+    load_15m: float
+    running: Optional[int] = None
+    total: Optional[int] = None
+
+
+@dataclass
+class UnitStatus:
+    """One `systemctl list-units` / `systemctl --failed` row."""
+    unit: str
+    load: str
+    active: str
+    sub: str
+    description: str = ""
+
+
+@dataclass
+class ListeningSocket:
+    """One `ss -tlnp` row."""
+    proto: str
+    address: str
+    port: int
+    process: str = ""
+    pid: Optional[int] = None
+
+
+@dataclass
+class Container:
+    """One `docker ps` row."""
+    name: str
+    status: str
+    state: str                  # up | exited | restarting | created | paused | ...
+    health: Optional[str] = None
+    ports: str = ""
+
+
+# ═══════════════════════════════════════════════════════════════
+# PARSERS
+# ═══════════════════════════════════════════════════════════════
+
+def parse_df(text: str) -> List[DiskUsage]:
+    """`df -h` / `df -h / | tail -1` → rows (handles wrapped long device names)."""
+    rows = []
+    pending = ""
+    for line in text.splitlines():
+        line = f"{pending} {line.strip()}".strip() if pending else line.strip()
+        pending = ""
+        m = _DF_RE.match(line)
+        if m:
+            rows.append(DiskUsage(m["fs"], m["size"], m["used"], m["avail"],
+                                  float(m["pct"]), m["mount"]))
+        elif line and len(line.split()) == 1 and not line.startswith("Filesystem"):
+            pending = line  # df wraps a long filesystem name onto its own line
+    return rows
+
+
+def parse_free(text: str) -> Optional[Memory]:
+    """`free` / `free -h` (full output or just the Mem: line)."""
+    for line in text.splitlines():
+        if line.startswith("Mem:"):
+            values = [parse_size(v) for v in line.split()[1:]]
+            if len(values) >= 3 and None not in values[:3]:
+                total, used, free = values[:3]
+                available = values[5] if len(values) > 5 and values[5] is not None else free
+                return Memory(total=total, used=used, free=free, available=available)
+    return None
+
+
+def parse_loadavg(text: str) -> Optional[LoadAvg]:
+    """`cat /proc/loadavg` → LoadAvg."""
+    m = _LOADAVG_RE.match(text)
+    if not m:
+        return None
+    return LoadAvg(
+        load_1m=float(m.group(1)),
+        load_5m=float(m.group(2)),
+        load_15m=float(m.group(3)),
+        running=int(m.group(4)) if m.group(4) else None,
+        total=int(m.group(5)) if m.group(5) else None,
+    )
+
+
+def parse_units(text: str) -> List[UnitStatus]:
+    """`systemctl list-units` / `--failed` (with or without legend) → unit rows."""
+    if text.strip().lower() in _NO_DATA:
+        return []
+    units = []
+    for line in text.splitlines():
+        m = _UNIT_RE.match(line)
+        if m and m["unit"] != "UNIT":
+            units.append(UnitStatus(m["unit"], m["load"], m["active"], m["sub"], m["desc"].strip()))
+    return units
+
+
+def parse_ss(text: str) -> List[ListeningSocket]:
+    """`ss -tlnp` / `ss -tulpn` → listening sockets."""
+    sockets = []
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens:
+            continue
+        proto = "tcp"
+        if tokens[0] in ("tcp", "udp", "raw", "u_str", "u_dgr"):
+            proto = tokens.pop(0)
+        if len(tokens) < 4 or tokens[0] not in ("LISTEN", "UNCONN"):
+            continue
+        address, _, port = tokens[3].rpartition(":")
+        if not port.isdigit():
+            continue
+        proc = _SS_PROC_RE.search(line)
+        sockets.append(ListeningSocket(
+            proto=proto,
+            address=address.strip("[]").split("%")[0],
+            port=int(port),
+            process=proc["name"] if proc else "",
+            pid=int(proc["pid"]) if proc else None,
+        ))
+    return sockets
+
+
+def parse_docker_ps(text: str) -> List[Container]:
+    """`docker ps` with `{{.Names}}|{{.Status}}` or tab-separated table formats."""
+    containers = []
+    for line in text.splitlines():
+        sep = "|" if "|" in line else "\t"
+        parts = [p.strip() for p in line.split(sep)]
+        if len(parts) < 2 or parts[0] in ("NAMES", "no docker") or not parts[0]:
+            continue
+        status = parts[1]
+        health = _HEALTH_RE.search(status)
+        containers.append(Container(
+            name=parts[0],
+            status=status,
+            state=status.split(" ", 1)[0].lower() if status else "unknown",
+            health=health.group(1) if health else None,
+            ports=parts[2] if len(parts) > 2 else "",
+        ))
+    return containers
+
+
+# ═══════════════════════════════════════════════════════════════
+# SAMPLE — one evidence dict, parsed once
+# ═══════════════════════════════════════════════════════════════
+
+@dataclass
+class EvidenceSample:
+    """Typed view of one evidence collection."""
+    disks: List[DiskUsage] = field(default_factory=list)
+    memory: Optional[Memory] = None
+    load: Optional[LoadAvg] = None
+    failed: List[UnitStatus] = field(default_factory=list)
+    sockets: List[ListeningSocket] = field(default_factory=list)
+    containers: List[Container] = field(default_factory=list)
+
+    @property
+    def root_disk(self) -> Optional[DiskUsage]:
+        """The `/` filesystem (or the first row if `/` wasn't listed)."""
+        for disk in self.disks:
+            if disk.mount == "/":
+                return disk
+        return self.disks[0] if self.disks else None
+
+    def metrics(self) -> Dict[str, float]:
+        """Numeric fields for the metrics store, exporter and deduction rules."""
+        metrics: Dict[str, float] = {}
+        if self.root_disk:
+            metrics["disk_pct"] = self.root_disk.use_pct
+        if self.memory:
+            metrics["memory_pct"] = round(self.memory.used_pct, 1)
+        if self.load:
+            metrics["load_1m"] = self.load.load_1m
+            metrics["load_5m"] = self.load.load_5m
+            metrics["load_15m"] = self.load.load_15m
+        return metrics
+
+
+# Evidence keys each parser reads (health_monitor, server_ops and collect_evidence names)
+SAMPLE_KEYS = {
+    "disks": ("disk", "disk-usage.txt"),
+    "memory": ("memory",),
+    "load": ("load",),
+    "failed": ("failed", "failed_services", "failed.txt"),
+    "sockets": ("listening_ports",),
+    "containers": ("docker", "docker.txt"),
+}
+
+
+def parse_sample(evidence: Optional[Dict[str, str]]) -> EvidenceSample:
+    """Parse every known key of an evidence dict once."""
+    sample = EvidenceSample()
+    if not evidence:
+        return sample
+
+    def first(name: str) -> str:
+        for key in SAMPLE_KEYS[name]:
+            if evidence.get(key):
+                return evidence[key]
+        return ""
+
+    sample.disks = parse_df(first("disks"))
+    sample.memory = parse_free(first("memory"))
+    sample.load = parse_loadavg(first("load"))
+    sample.failed = parse_units(first("failed"))
+    sample.sockets = parse_ss(first("sockets"))
+    sample.containers = parse_docker_ps(first("containers"))
+    return sample
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Reachability Scanner — every server × route TCP connect, all at once.
+
+Opens every host:port with asyncio instead of one blocking
+socket.create_connection() after another, so a sweep takes as long as
+the slowest path (≤ timeout), not the sum of all timeouts. Each path
+records its connect latency, and identical host:port pairs shared by
+several routes are only dialled once.
+
+debug_network.py renders the full matrix; health_monitor.py uses
+probe_paths() for its TCP layer, so both report the same measurement.
+
+Usage:
+    from reachability import scan_servers
+
+    matrix = scan_servers(load_inventory(), timeout=3.0)
+    print(matrix.format_table())
+    matrix.latency("s60", "tailscale")      # seconds, or None if unreachable
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from inventory import Server
+
+
+DEFAULT_TIMEOUT_SEC = 3.0
+MAX_CONCURRENT_CONNECTS = 64    # Keeps big inventories under the local fd limit
+
+
+@dataclass
+class PathResult:
+    """One measured server × route path."""
+    server: str
+    route: str
+    alias: str
+    host: str
+    port: int
+    reachable: bool
+    latency: Optional[float] = None     # Connect time in seconds
+    error: Optional[str] = None         # timeout | refused | OSError text
+
+    @property
+    def latency_ms(self) -> Optional[float]:
+        return round(self.latency * 1000, 1) if self.latency is not None else None
+
+
+# ═══════════════════════════════════════════════════════════════
+# CONNECT PROBES
+# ═══════════════════════════════════════════════════════════════
+
+async def _connect(host: str, port: int, timeout: float,
+                   limit: asyncio.Semaphore) -> Tuple[Optional[float], Optional[str]]:
+    """(latency, None) on success, (None, reason) on failure."""
+    async with limit:
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except asyncio.TimeoutError:
+            return None, "timeout"
+        except ConnectionRefusedError:
+            return None, "refused"
+        except OSError as e:
+            return None, e.strerror or str(e)
+        latency = time.perf_counter() - start
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return latency, None
+
+
+async def probe_paths_async(
+    pairs: Iterable[Tuple[str, int]],
+    timeout: float = DEFAULT_TIMEOUT_SEC,
+    concurrency: int = MAX_CONCURRENT_CONNECTS,
+) -> Dict[Tuple[str, int], Tuple[Optional[float], Optional[str]]]:
+    """Connect to every distinct host:port concurrently."""
+    unique = list(dict.fromkeys(pairs))
+    limit = asyncio.Semaphore(concurrency)
+    outcomes = await asyncio.gather(*(_connect(h, p, timeout, limit) for h, p in unique))
+    return dict(zip(unique, outcomes))
+
+
+def probe_paths(
+    pairs: Iterable[Tuple[str, int]],
+    timeout: float = DEFAULT_TIMEOUT_SEC,
+    concurrency: int = MAX_CONCURRENT_CONNECTS,
+) -> Dict[Tuple[str, int], Tuple[Optional[float], Optional[str]]]:
+    """Blocking wrapper around probe_paths_async (safe to call from worker threads)."""
+    return asyncio.run(probe_paths_async(pairs, timeout, concurrency))
+
+
+# ═══════════════════════════════════════════════════════════════
+# MATRIX
+# ═══════════════════════════════════════════════════════════════
+
+class ReachabilityMatrix:
+    """Results of one scan, addressable by (server, route name)."""
+
+    def __init__(self, results: List[PathResult], duration: float, timeout: float):
+        self.results = results
+        self.duration = duration
+        self.timeout = timeout
+        self._index = {(r.server, r.route): r for r in results}
+
+    def get(self, server: str, route: str) -> Optional[PathResult]:
+        return self._index.get((server, route))
+
+    def latency(self, server: str, route: str) -> Optional[float]:
+        result = self.get(server, route)
+        return result.latency if result else None
+
+    def servers(self) -> List[str]:
+        return list(dict.fromkeys(r.server for r in self.results))
+
+    def routes(self) -> List[str]:
+        return list(dict.fromkeys(r.route for r in self.results))
+
+    def fastest(self, server: str) -> Optional[PathResult]:
+        """Lowest-latency reachable path of a server."""
+        paths = [r for r in self.results if r.server == server and r.reachable]
+        return min(paths, key=lambda r: r.latency, default=None)
+
+    def format_table(self) -> str:
+        """Servers × routes, connect latency in ms ('✗ timeout', '—' = not scanned)."""
+        routes = self.routes()
+        width = max([len(s) for s in self.servers()] + [6])
+        lines = [f"{'server':<{width}}  " + "  ".join(f"{r:>12}" for r in routes)]
+        for server in self.servers():
+            cells = []
+            for route in routes:
+                result = self.get(server, route)
+                if result is None:
+                    cell = "—"
+                elif result.reachable:
+                    cell = f"{result.latency_ms:.1f} ms"
+                else:
+                    cell = f"✗ {result.error}"[:12]
+                cells.append(f"{cell:>12}")
+            lines.append(f"{server:<{width}}  " + "  ".join(cells))
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """{server: {route: result}} plus scan timing (for JSON reports)."""
+        matrix: Dict[str, Dict[str, Any]] = {}
+        for r in self.results:
+            entry = asdict(r)
+            entry["latency_ms"] = r.latency_ms
+            del entry["server"], entry["route"]
+            matrix.setdefault(r.server, {})[r.route] = entry
+        return {"duration": round(self.duration, 3), "timeout": self.timeout, "paths": matrix}
+
+
+def scan_servers(
+    servers: Iterable[Server],
+    timeout: float = DEFAULT_TIMEOUT_SEC,
+    route_names: Optional[Iterable[str]] = None,
+    concurrency: int = MAX_CONCURRENT_CONNECTS,
+) -> ReachabilityMatrix:
+    """Probe every route of every server in one concurrent pass."""
+    wanted = set(route_names) if route_names is not None else None
+    paths = [(s, r) for s in servers for r in s.routes if wanted is None or r.name in wanted]
+
+    start = time.perf_counter()
+    outcomes = probe_paths(((r.host, r.port) for _, r in paths), timeout, concurrency)
+    duration = time.perf_counter() - start
+
+    results = []
+    for server, route in paths:
+        latency, error = outcomes[(route.host, route.port)]
+        results.append(PathResult(
+            server=server.name, route=route.name, alias=route.alias,
+            host=route.host, port=route.port,
+            reachable=latency is not None, latency=latency, error=error,
+        ))
+    return ReachabilityMatrix(results, duration, timeout)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Route Discovery Cache — remembers which SSH alias works for each server.
+
+Shared by health_monitor.py, collect_evidence.py and debug_network.py
+through one JSON file. Resolving a route:
+
+1. The alias that last worked (if younger than ROUTE_TTL_SEC) is tried alone.
+2. Only if it fails are the remaining routes probed — in parallel, first
+   success wins.
+3. Routes that keep failing back off exponentially (BACKOFF_BASE_SEC,
+   doubling up to BACKOFF_MAX_SEC) and are only tried as a last resort.
+
+So a host whose Tailscale path is down costs one ConnectTimeout once,
+not on every sweep.
+
+Every update re-reads the file and applies the change to what is on
+disk, under an flock on a sidecar .lock file, before the atomic replace,
+so concurrent processes (daemon, collect_evidence, debug_network) merge
+their route updates instead of overwriting each other.
+
+Usage:
+    from route_cache import get_route_cache
+
+    cache = get_route_cache()
+    alias = cache.resolve("s62", ["s62pa", "s62pa-pub", "s62pa-int"], probe=my_ssh_check)
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows — in-process lock only
+    fcntl = None
+
+
+ROUTE_CACHE_FILE = Path(os.environ.get(
+    "ROUTE_CACHE",
+    Path.home() / "vscodeportable" / "servers" / "route-cache.json"
+))
+ROUTE_TTL_SEC = 3600            # Trust a cached best route for this long
+BACKOFF_BASE_SEC = 60           # First backoff after a failure
+BACKOFF_MAX_SEC = 3600          # Backoff cap
+
+# probe(alias) → True (works), False (failed), None (not attempted, e.g. rate limited)
+Probe = Callable[[str], Optional[bool]]
+# admit(alias) → False to skip a route; runs on the caller's thread before its probe starts
+Admit = Callable[[str], bool]
+
+
+class RouteCache:
+    """Persisted per-server route preferences and failure backoff."""
+
+    def __init__(self, path: Path = ROUTE_CACHE_FILE):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(".lock")
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._reload()
+
+    def _reload(self) -> None:
+        """Replace the in-memory view with the file (kept as is if unreadable)."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            self._data = data
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive flock on the sidecar lock file (no-op if unavailable)."""
+        handle = None
+        if fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                handle = open(self.lock_path, "a")
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            except OSError:
+                if handle is not None:
+                    handle.close()
+                handle = None
+        try:
+            yield
+        finally:
+            if handle is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+
+    @contextmanager
+    def _updating(self) -> Iterator[None]:
+        """Re-read, let the caller modify, write back — atomically across processes."""
+        with self._lock, self._file_lock():
+            self._reload()
+            yield
+            self._save()
+
+    def _save(self) -> None:
+        """Atomic write (caller holds both locks)."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Cache is an optimisation only
+
+    def _route(self, server: str, alias: str) -> Dict[str, Any]:
+        entry = self._data.setdefault(server, {"best": None, "best_at": 0, "routes": {}})
+        return entry["routes"].setdefault(alias, {"fail_streak": 0, "last_fail": 0, "last_ok": 0})
+
+    def best(self, server: str) -> Optional[str]:
+        """Cached working alias, if still within the TTL."""
+        entry = self._data.get(server)
+        if entry and entry.get("best") and time.time() - entry.get("best_at", 0) < ROUTE_TTL_SEC:
+            return entry["best"]
+        return None
+
+    def backed_off(self, server: str, alias: str) -> bool:
+        """True if the route failed recently enough to be skipped."""
+        route = self._data.get(server, {}).get("routes", {}).get(alias)
+        if not route or not route["fail_streak"]:
+            return False
+        delay = min(BACKOFF_BASE_SEC * 2 ** (route["fail_streak"] - 1), BACKOFF_MAX_SEC)
+        return time.time() - route["last_fail"] < delay
+
+    def ordered(self, server: str, aliases: List[str]) -> List[str]:
+        """Aliases in try order: cached best, healthy routes, backed-off routes last."""
+        with self._lock:
+            self._reload()  # Pick up other processes' updates
+            best = self.best(server)
+            rest = [a for a in aliases if a != best]
+            healthy = [a for a in rest if not self.backed_off(server, a)]
+            backed = [a for a in rest if self.backed_off(server, a)]
+        return ([best] if best in aliases else []) + healthy + backed
+
+    def record_success(
+        self,
+        server: str,
+        alias: str,
+        latency: Optional[float] = None,
+        prefer: bool = True,
+    ) -> None:
+        """Mark a route as working; prefer=True also makes it the best route."""
+        with self._updating():
+            route = self._route(server, alias)
+            route.update(fail_streak=0, last_ok=time.time())
+            if latency is not None:
+                route["latency"] = round(latency, 3)
+            if prefer:
+                self._data[server].update(best=alias, best_at=time.time())
+
+    def record_failure(self, server: str, alias: str) -> None:
+        """Mark a route as failed (extends its backoff)."""
+        with self._updating():
+            route = self._route(server, alias)
+            route["fail_streak"] += 1
+            route["last_fail"] = time.time()
+            if self._data[server].get("best") == alias:
+                self._data[server]["best"] = None
+
+    def _record(self, server: str, alias: str, outcome: Optional[bool], prefer: bool = True) -> None:
+        if outcome is True:
+            self.record_success(server, alias, prefer=prefer)
+        elif outcome is False:
+            self.record_failure(server, alias)
+
+    def resolve(
+        self,
+        server: str,
+        aliases: List[str],
+        probe: Probe,
+        max_probes: Optional[int] = None,
+        admit: Optional[Admit] = None,
+    ) -> Optional[str]:
+        """
+        Find a working alias: cached best first, then the rest in parallel.
+
+        `max_probes` caps how many routes may be tried in total (e.g. the
+        remaining SSH budget). `admit` is asked, on the calling thread,
+        before each probe is launched, so budget accounting never happens
+        in probe threads. Probes still running once a route has won are
+        abandoned and their results ignored. Returns the alias that
+        worked, or None.
+        """
+        order = self.ordered(server, aliases)
+        if max_probes is not None:
+            order = order[:max(max_probes, 0)]
+        if not order:
+            return None
+
+        if self.best(server) == order[0]:
+            if admit is None or admit(order[0]):
+                outcome = probe(order[0])
+                self._record(server, order[0], outcome)
+                if outcome:
+                    return order[0]
+            order = order[1:]
+
+        healthy = [a for a in order if not self.backed_off(server, a)]
+        backed = [a for a in order if a not in healthy]
+        for batch in (healthy, backed):
+            if admit is not None:
+                batch = [a for a in batch if admit(a)]
+            alias = self._probe_parallel(server, batch, probe)
+            if alias:
+                return alias
+        return None
+
+    def _probe_parallel(self, server: str, aliases: List[str], probe: Probe) -> Optional[str]:
+        """Probe routes concurrently; first success wins, stragglers are abandoned."""
+        if not aliases:
+            return None
+        executor = ThreadPoolExecutor(max_workers=len(aliases))
+        futures = {executor.submit(probe, alias): alias for alias in aliases}
+        winner = None
+        pending = set(futures)
+        try:
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    alias = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception:
+                        outcome = False
+                    self._record(server, alias, outcome, prefer=winner is None)
+                    if outcome and winner is None:
+                        winner = alias
+        finally:
+            # Late results are ignored; probes that haven't started never will
+            executor.shutdown(wait=False, cancel_futures=True)
+        return winner
+
+
+# Global cache instance
+_cache: Optional[RouteCache] = None
+
+
+def get_route_cache() -> RouteCache:
+    """Get or load the shared route cache."""
+    global _cache
+    if _cache is None:
+        _cache = RouteCache()
+    return _cache
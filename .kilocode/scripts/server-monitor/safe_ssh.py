@@ -4,27 +4,544 @@ Safe SSH Wrapper Module.
 
 This module provides safe SSH command execution with command validation
 to prevent destructive operations.
+
+Commands are validated by a small policy engine rather than substring
+regexes: the command line is tokenized with shlex (so quoting tricks like
+r''m don't slip through, and "rm" inside an echo'd string isn't flagged),
+split into simple commands across pipelines, && / || chains, subshells,
+$(...) / backtick substitutions and `sh -c` / watch scripts, and each argv
+must be on an allowlist of read-only programs (READ_ONLY_COMMANDS,
+OPTION_ALLOWLIST, SUBCOMMANDS, ALLOW_RULES). Anything unknown is denied,
+as are wrapper options the policy doesn't recognise, shells without an
+inspectable -c script, input piped into a shell or awk, and output
+redirection other than to /dev/null. Results are memoised per command
+string.
+
+With paramiko, connections are cached per (host, port, user): an LRU of
+at most CONNECTION_CACHE_SIZE transports with keepalives, closed after
+IDLE_TIMEOUT_SEC unused. Every command gets its own channel, so several
+can run concurrently over one transport (safe_ssh_exec_many) and a loop
+of safe_ssh_exec calls pays the handshake once. A client is only closed
+once no command is running on it, and a command is only retried on a
+fresh connection if the old one failed before its channel opened. Host
+keys must already be known (system known_hosts) on both paths.
+
+Usage:
+    from safe_ssh import validate_command, safe_ssh_exec, safe_ssh_exec_many
+
+    validate_command("df -h / | tail -1")        # (True, "OK")
+    validate_command("echo ok && r''m -rf /tmp")  # (False, "Command not in read-only allowlist: rm -rf /tmp")
+    code, out, err = safe_ssh_exec("192.168.1.60", 2260, "admin", "uptime")
+    results = safe_ssh_exec_many("192.168.1.60", 2260, "admin", ["uptime", "df -h"])
 """
 
+import atexit
+import os
 import re
+import shlex
 import sys
-from typing import Tuple, Optional, List
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import paramiko
+except ImportError:  # Optional — falls back to the ssh binary
+    paramiko = None
+
+
+CONNECTION_CACHE_SIZE = 8       # Cached transports (LRU beyond this)
+IDLE_TIMEOUT_SEC = 300          # Unused connections are closed after this
+KEEPALIVE_SEC = 30              # Transport keepalive interval
+CONNECT_TIMEOUT_SEC = 30
+COMMAND_TIMEOUT_SEC = 30
+MAX_PARALLEL_CHANNELS = 4       # Below sshd's default MaxSessions (10)
 
 
-# Forbidden patterns for destructive operations
-FORBIDDEN_PATTERNS: List[str] = [
-    r'\brm\b', r'\brmdir\b', r'\bmkfs\b', r'\bdd\b',
-    r'\bchmod\b.*7\d{2}', r'\bchown\b', r'\breboot\b',
-    r'\bshutdown\b', r'\bhalt\b', r'\bpkill\b', r'\bkillall\b',
-    r'\bsudo\b.*-E?', r'\bnano\b', r'\bvi\b', r'\bnvim\b',
-    r'\bdocker\b.*rm\b', r'\bdocker\b.*rmi\b',
-    r'\bsystemctl\b.*stop\b', r'\bsystemctl\b.*disable\b',
+# ═══════════════════════════════════════════════════════════════
+# COMMAND POLICY
+# ═══════════════════════════════════════════════════════════════
+
+# The policy is an allowlist: every simple command must be a read-only
+# program below (or a wrapper / `sh -c` whose inner command is), otherwise
+# it is rejected. Programs that take a command string of their own (ssh,
+# flock -c, script -c, sed's `e`, tar --to-command, ...) are deliberately
+# absent, except watch, whose string is validated like an `sh -c` script.
+
+# Exact forms allowed for programs that are otherwise denied. Each
+# pattern must match the whole command, rendered as shlex.join(argv) with
+# argv[0] reduced to its basename.
+ALLOW_RULES: List[Tuple[str, str]] = [
+    ("crontab-list", r"crontab (?:-u [^\s-]\S* )?-l"),
+    ("sudo-crontab-list", r"sudo (?:-n )?crontab -u [^\s-]\S* -l"),
 ]
 
+# Read-only programs, with the options that would make them write files,
+# run commands or change system state (rejected)
+READ_ONLY_COMMANDS: Dict[str, frozenset] = {
+    name: frozenset() for name in (
+        "uptime", "free", "df", "du", "ls", "cat", "zcat", "head", "tail", "wc", "cut", "tr",
+        "grep", "egrep", "fgrep", "zgrep", "echo", "printf", "uname", "id", "whoami", "who",
+        "w", "last", "ps", "pgrep", "netstat", "lsblk", "lscpu", "nproc", "vmstat", "iostat",
+        "readlink", "stat", "basename", "dirname", "which", "getent", "test", "[", "true",
+        "false", "md5sum", "sha256sum", "uniq",
+    )
+}
+READ_ONLY_COMMANDS.update({
+    "sort": frozenset({"-o", "--output", "--compress-program"}),
+    "date": frozenset({"-s", "--set"}),
+    "ss": frozenset({"-K", "--kill"}),
+    "dmesg": frozenset({"-c", "-C", "-D", "-E", "-n", "--clear", "--read-clear",
+                        "--console-off", "--console-on", "--console-level"}),
+    "journalctl": frozenset({"--vacuum-size", "--vacuum-time", "--vacuum-files", "--rotate",
+                             "--flush", "--sync", "--relinquish-var", "--setup-keys",
+                             "--update-catalog"}),
+    "find": frozenset({"-delete", "-fprint", "-fprint0", "-fprintf", "-fls", "-ok", "-okdir"}),
+    "awk": frozenset({"-f", "--file", "-i", "--include", "-l", "--load", "-E", "--exec"}),
+})
+for _awk in ("gawk", "mawk", "nawk"):
+    READ_ONLY_COMMANDS[_awk] = READ_ONLY_COMMANDS["awk"]
+
+# Programs allowed only with these options
+OPTION_ALLOWLIST: Dict[str, frozenset] = {
+    "hostname": frozenset({"-f", "-s", "-d", "-i", "-I", "-A", "--fqdn", "--long", "--short",
+                           "--domain", "--ip-address", "--all-ip-addresses", "--all-fqdns"}),
+    "nginx": frozenset({"-T", "-t", "-v", "-V", "-q"}),
+    "dpkg": frozenset({"-l", "-L", "-s", "-S", "-p", "--list", "--listfiles", "--status",
+                       "--search", "--print-avail", "--get-selections", "--print-architecture"}),
+}
+# Upper bound on operands (anything not starting with "-")
+MAX_OPERANDS: Dict[str, int] = {"hostname": 0, "nginx": 0, "uniq": 1}
+
+# Programs allowed only with these subcommands. None = no subcommand; a set
+# value lists what may follow the subcommand (None there = nothing).
+_DOCKER_READ = {"ls", "ps", "list", "inspect", "logs", "stats", "top", "port", "history", "df", "info"}
+_IP_READ = {None, "show", "sh", "s", "list", "ls", "lst", "l", "get"}
+SUBCOMMANDS: Dict[str, Dict[Optional[str], Optional[frozenset]]] = {
+    "systemctl": {verb: None for verb in (
+        None, "status", "show", "cat", "list-units", "list-unit-files", "list-timers",
+        "list-sockets", "list-dependencies", "list-jobs", "is-active", "is-enabled",
+        "is-failed", "is-system-running")},
+    "docker": {
+        **{verb: None for verb in ("ps", "images", "logs", "inspect", "stats", "version",
+                                   "info", "top", "port", "history")},
+        **{group: frozenset(_DOCKER_READ | {None}) for group in (
+            "container", "image", "system", "network", "volume")},
+    },
+    "ip": {obj: frozenset(_IP_READ) for obj in (
+        "addr", "address", "a", "route", "r", "ro", "link", "l", "neigh", "neighbour", "n",
+        "rule", "ru", "maddress", "mroute", "tunnel", "netns")},
+}
+
+# Output redirection is only allowed to discard output
+ALLOWED_WRITE_TARGETS = {"/dev/null"}
+
+# Commands that run another command from their arguments:
+# name -> (options without a value, options taking a value). Any other
+# option is rejected, so a wrapper can't hide the command it runs.
+WRAPPER_OPTIONS: Dict[str, Tuple[frozenset, frozenset]] = {
+    "env": (frozenset({"-", "-i", "--ignore-environment", "-0", "--null", "-v", "--debug"}),
+            frozenset({"-u", "--unset", "-C", "--chdir", "-S", "--split-string"})),
+    "nice": (frozenset(), frozenset({"-n", "--adjustment"})),
+    "nohup": (frozenset(), frozenset()),
+    "timeout": (frozenset({"--foreground", "--preserve-status", "-v", "--verbose"}),
+                frozenset({"-k", "--kill-after", "-s", "--signal"})),
+    "stdbuf": (frozenset(), frozenset({"-i", "-o", "-e", "--input", "--output", "--error"})),
+    "ionice": (frozenset({"-t", "--ignore"}), frozenset({"-c", "--class", "-n", "--classdata"})),
+    "time": (frozenset({"-p", "--portability", "-v", "--verbose", "-q", "--quiet"}),
+             frozenset({"-f", "--format"})),
+    "command": (frozenset({"-p", "-v", "-V"}), frozenset()),
+    "exec": (frozenset({"-c", "-l"}), frozenset({"-a"})),
+    "setsid": (frozenset({"-f", "--fork", "-w", "--wait", "-c", "--ctty"}), frozenset()),
+    "xargs": (frozenset({"-0", "--null", "-r", "--no-run-if-empty", "-t", "--verbose",
+                         "-p", "--interactive", "-x", "--exit", "-o", "--open-tty"}),
+              frozenset({"-n", "--max-args", "-L", "--max-lines", "-P", "--max-procs",
+                         "-s", "--max-chars", "-d", "--delimiter", "-a", "--arg-file",
+                         "-E", "--eof", "-I", "--replace"})),
+}
+# docker global options (before the subcommand)
+DOCKER_OPTIONS = (frozenset({"-D", "--debug", "--tls", "--tlsverify"}),
+                  frozenset({"-H", "--host", "-c", "--context", "--config", "-l", "--log-level",
+                             "--tlscacert", "--tlscert", "--tlskey"}))
+
+# watch runs its arguments, joined with spaces, through `sh -c`
+WATCH_OPTIONS = (frozenset({"-d", "--differences", "-t", "--no-title", "-b", "--beep",
+                            "-e", "--errexit", "-g", "--chgexit", "-p", "--precise",
+                            "-c", "--color", "-w", "--no-linewrap", "-x", "--exec"}),
+                 frozenset({"-n", "--interval"}))
+
+# Programs that execute code from stdin or their arguments. Only `sh -c
+# SCRIPT` is inspectable (the script is validated recursively), and awk
+# programs may not call system(), read commands or redirect output.
+SHELLS = {"sh", "bash", "dash", "zsh", "ksh", "mksh", "ash", "fish"}
+AWKS = {"awk", "gawk", "mawk", "nawk"}
+MULTIPLEXERS = {"busybox", "toybox"}
+AWK_EXEC_RE = re.compile(r"\bsystem\b|\bgetline\b|\bfflush\b|\||\bprintf?\b[^;}]*>|@load|@include")
+SHELL_VALUE_OPTS = {"-o", "+o", "-O", "+O", "--rcfile", "--init-file"}
+
+KEYWORDS = {"if", "then", "else", "elif", "fi", "do", "done", "while", "until", "!", "{", "}"}
+SEPARATORS = ("&&", "||", ";;", "|&", ";", "|", "&", "(", ")", "\n")
+REDIRECTS = (">>", ">&", "&>", "<<<", "<<", "<&", ">|", "<>", ">", "<")
+PIPES = ("|", "|&")
+MAX_DEPTH = 8                   # Nested substitutions / sh -c scripts
+SUBST_PLACEHOLDER = "$SUBST"
+
+_OPERATOR_RE = re.compile("|".join(re.escape(op) for op in sorted(
+    SEPARATORS + REDIRECTS, key=len, reverse=True)))
+_ALLOW_RE = re.compile("|".join(f"(?:{p})" for _, p in ALLOW_RULES))
+
+
+def _allowed_form(argv: List[str]) -> bool:
+    """True if argv is exactly one of the ALLOW_RULES forms."""
+    rendered = shlex.join([os.path.basename(argv[0]) or argv[0]] + argv[1:])
+    return _ALLOW_RE.fullmatch(rendered) is not None
+
+
+def _extract_substitutions(command: str) -> Tuple[str, List[str]]:
+    """Replace $(...), $((...)) and `...` outside single quotes with a placeholder."""
+    out: List[str] = []
+    inner: List[str] = []
+    i, n = 0, len(command)
+    quote = None
+    while i < n:
+        c = command[i]
+        if c == "\\" and quote != "'":
+            out.append(command[i:i + 2])
+            i += 2
+            continue
+        if quote == "'":
+            quote = None if c == "'" else quote
+        elif c in "'\"" and quote is None:
+            quote = c
+        elif c == '"' and quote == '"':
+            quote = None
+        elif c == "$" and command.startswith("$(", i):
+            depth, j = 1, i + 2
+            while j < n and depth:
+                depth += {"(": 1, ")": -1}.get(command[j], 0)
+                j += 1
+            inner.append(command[i + 2:j - 1])
+            out.append(SUBST_PLACEHOLDER)
+            i = j
+            continue
+        elif c == "`":
+            j = command.find("`", i + 1)
+            j = n if j < 0 else j
+            inner.append(command[i + 1:j])
+            out.append(SUBST_PLACEHOLDER)
+            i = j + 1
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out), inner
+
+
+def _tokens(command: str) -> List[str]:
+    """shlex tokens with operator runs split into individual shell operators."""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars="();<>|&\n")
+    lexer.whitespace_split = True
+    lexer.whitespace = " \t\r"
+    tokens = []
+    for token in lexer:
+        if token and all(c in "();<>|&\n" for c in token):
+            tokens.extend(_OPERATOR_RE.findall(token))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def _simple_commands(tokens: List[str]) -> Iterator[Tuple[List[str], List[str], bool]]:
+    """
+    (argv, write targets, fed) per simple command; keywords and fd numbers
+    dropped. `fed` is True when the command's stdin comes from a pipe,
+    here-document, here-string or input redirection.
+    """
+    argv: List[str] = []
+    writes: List[str] = []
+    fed = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in SEPARATORS:
+            if argv or writes:
+                yield argv, writes, fed
+            argv, writes = [], []
+            fed = token in PIPES
+        elif token in REDIRECTS:
+            if argv and argv[-1].isdigit():
+                argv.pop()  # 2>/dev/null — the fd, not an argument
+            target = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if ">" in token and not (token.endswith("&") and (target.isdigit() or target == "-")):
+                writes.append(target)
+            elif token.startswith("<") and token != "<&":
+                fed = True
+            i += 1
+        elif not argv and token in KEYWORDS:
+            pass
+        else:
+            argv.append(token)
+        i += 1
+    if argv or writes:
+        yield argv, writes, fed
+
+
+def _parse_options(
+    args: List[str],
+    flags: frozenset,
+    valued: frozenset,
+) -> Optional[Tuple[List[Tuple[str, str]], List[str]]]:
+    """
+    Split leading options off args: ([(option, value)], operands).
+    Handles --long=value, --long value, -abc clusters and -ovalue.
+    None if an option is not in flags/valued.
+    """
+    options: List[Tuple[str, str]] = []
+    while args:
+        arg = args[0]
+        if arg == "--":
+            return options, args[1:]
+        if not arg.startswith("-") or (arg == "-" and "-" not in flags):
+            break
+        if arg == "-" or arg.startswith("--"):
+            opt, eq, value = arg.partition("=")
+            if opt in flags and not eq:
+                options.append((opt, ""))
+                args = args[1:]
+            elif opt in valued and eq:
+                options.append((opt, value))
+                args = args[1:]
+            elif opt in valued and len(args) > 1:
+                options.append((opt, args[1]))
+                args = args[2:]
+            else:
+                return None
+            continue
+        consumed = 1
+        for i, c in enumerate(arg[1:], start=1):
+            opt = "-" + c
+            if opt in flags:
+                options.append((opt, ""))
+            elif opt in valued:
+                value = arg[i + 1:]
+                if not value:
+                    if len(args) < 2:
+                        return None
+                    value, consumed = args[1], 2
+                options.append((opt, value))
+                break
+            else:
+                return None
+        args = args[consumed:]
+    return options, args
+
+
+def _unwrap(argv: List[str]) -> Optional[List[str]]:
+    """argv of the command a wrapper (env, timeout, xargs, ...) would run; None if unparseable."""
+    name = os.path.basename(argv[0])
+    flags, valued = WRAPPER_OPTIONS[name]
+    rest = argv[1:]
+    if name == "nice" and rest and re.match(r"^-\d+$", rest[0]):
+        rest = rest[1:]  # nice -10 cmd
+    prefix: List[str] = []
+    while True:
+        parsed = _parse_options(rest, flags, valued)
+        if parsed is None:
+            return None
+        options, rest = parsed
+        for opt, value in options:
+            if opt in ("-S", "--split-string"):
+                try:
+                    prefix += shlex.split(value)
+                except ValueError:
+                    return None
+            elif name == "command" and opt in ("-v", "-V"):
+                return []  # Lookup only, runs nothing
+        if name == "env" and rest and re.match(r"^[A-Za-z_]\w*=", rest[0]):
+            rest = rest[1:]  # env FOO=bar [-opts] cmd
+            continue
+        break
+    rest = prefix + rest
+    if name == "timeout" and rest:
+        rest = rest[1:]  # duration
+    return rest
+
+
+def _shell_script(argv: List[str]) -> Optional[str]:
+    """SCRIPT of `sh [-opts] -c SCRIPT ...` (c may sit in any cluster, e.g. -lc), else None."""
+    args = argv[1:]
+    has_c = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            i += 1
+            break
+        if arg in SHELL_VALUE_OPTS:
+            i += 2
+            continue
+        if arg.startswith("--"):
+            i += 1  # --login, --norc, ...
+            continue
+        if len(arg) > 1 and arg[0] in "-+":
+            has_c = has_c or (arg[0] == "-" and "c" in arg[1:])
+            i += 1
+            continue
+        break
+    if has_c and i < len(args):
+        return args[i]
+    return None
+
+
+def _find_exec(argv: List[str]) -> List[List[str]]:
+    """Commands a `find ... -exec cmd {} ;` would run."""
+    commands = []
+    for i, arg in enumerate(argv):
+        if arg in ("-exec", "-execdir", "-ok", "-okdir"):
+            cmd = []
+            for token in argv[i + 1:]:
+                if token in (";", "+"):
+                    break
+                cmd.append(token)
+            if cmd:
+                commands.append(cmd)
+    return commands
+
+
+def _options(args: List[str]) -> Iterator[str]:
+    """Every option named in args: --long (without =value) and each letter of -abc."""
+    for arg in args:
+        if arg == "--":
+            return
+        if arg.startswith("--"):
+            yield arg.partition("=")[0]
+        elif arg.startswith("-") and len(arg) > 1:
+            for c in arg[1:]:
+                yield "-" + c
+
+
+def _check_program(name: str, argv: List[str]) -> Optional[str]:
+    """Reason a non-wrapper program invocation isn't on the allowlist, or None."""
+    rendered = shlex.join(argv)
+    args = argv[1:]
+    if name in READ_ONLY_COMMANDS:
+        if name == "find":
+            # -exec/-execdir targets are validated separately; only `find` options here
+            args = [a for a in args if a.startswith("-") and not a.startswith("--")]
+            bad = [a for a in args if a in READ_ONLY_COMMANDS["find"]]
+        else:
+            bad = [o for o in _options(args) if o in READ_ONLY_COMMANDS[name]]
+        if bad:
+            return f"Option {bad[0]} not allowed for {name}: {rendered}"
+    elif name in OPTION_ALLOWLIST:
+        bad = [o for o in _options(args) if o not in OPTION_ALLOWLIST[name]]
+        if bad:
+            return f"Option {bad[0]} not allowed for {name}: {rendered}"
+    elif name in SUBCOMMANDS:
+        if name == "docker":
+            parsed = _parse_options(args, *DOCKER_OPTIONS)
+            if parsed is None:
+                return f"Unrecognised docker option: {rendered}"
+            args = parsed[1]
+        operands = [a for a in args if not a.startswith("-")]
+        verb = operands[0] if operands else None
+        table = SUBCOMMANDS[name]
+        if verb not in table:
+            return f"{name} subcommand not allowed: {rendered}"
+        follow = table[verb]
+        if follow is not None:
+            after = operands[1] if len(operands) > 1 else None
+            if after not in follow:
+                return f"{name} {verb} subcommand not allowed: {rendered}"
+    else:
+        return f"Command not in read-only allowlist: {rendered}"
+
+    limit = MAX_OPERANDS.get(name)
+    if limit is not None and len([a for a in args if not a.startswith("-")]) > limit:
+        return f"Too many operands for {name}: {rendered}"
+    return None
+
+
+def _check_argv(argv: List[str], depth: int, fed: bool = False) -> Optional[str]:
+    """Reason argv is not allowed, or None. `fed`: stdin comes from a pipe or here-string."""
+    while argv and re.match(r"^[A-Za-z_]\w*=", argv[0]):
+        argv = argv[1:]  # FOO=bar cmd
+    if not argv or argv[0] == "for":
+        return None  # `for x in words` runs nothing itself
+    name = os.path.basename(argv[0])
+    rendered = shlex.join(argv)
+
+    if _allowed_form(argv):
+        return None
+
+    if name in WRAPPER_OPTIONS:
+        inner = _unwrap(argv)
+        if inner is None:
+            return f"Unrecognised {name} option: {rendered}"
+        return _check_argv(inner, depth, fed)
+
+    if name in MULTIPLEXERS:
+        if len(argv) < 2 or argv[1].startswith("-"):
+            return f"Unrecognised {name} invocation: {rendered}"
+        return _check_argv(argv[1:], depth, fed)  # busybox rm ... == rm ...
+
+    if name == "watch":
+        parsed = _parse_options(argv[1:], *WATCH_OPTIONS)
+        if parsed is None or not parsed[1]:
+            return f"Unrecognised watch invocation: {rendered}"
+        return _check(" ".join(parsed[1]), depth + 1)
+
+    if fed and (name in SHELLS or name in AWKS):
+        return f"Input piped into interpreter: {rendered}"
+    if name in SHELLS:
+        script = _shell_script(argv)
+        if script is None:
+            return f"Shell without an inspectable -c script: {rendered}"
+        return _check(script, depth + 1)
+    if name in AWKS and any(AWK_EXEC_RE.search(arg) for arg in argv[1:]):
+        return f"awk program runs commands or writes files: {rendered}"
+
+    reason = _check_program(name, argv)
+    if reason:
+        return reason
+    if name == "find":
+        for cmd in _find_exec(argv):
+            reason = _check_argv(cmd, depth)
+            if reason:
+                return reason
+    return None
+
+
+def _check(command: str, depth: int = 0) -> Optional[str]:
+    """Reason a command line is not allowed, or None."""
+    if depth > MAX_DEPTH:
+        return "Command nesting too deep to validate"
+    outer, substitutions = _extract_substitutions(command)
+    for inner in substitutions:
+        reason = _check(inner, depth + 1)
+        if reason:
+            return reason
+    try:
+        tokens = _tokens(outer)
+    except ValueError as e:
+        return f"Command cannot be parsed: {e}"
+    for argv, writes, fed in _simple_commands(tokens):
+        for target in writes:
+            if target not in ALLOWED_WRITE_TARGETS:
+                return f"Output redirection not allowed: {target}"
+        reason = _check_argv(argv, depth, fed)
+        if reason:
+            return reason
+    return None
+
 
+@lru_cache(maxsize=1024)
 def validate_command(command: str) -> Tuple[bool, str]:
     """
-    Validate command doesn't contain forbidden patterns.
+    Validate command only runs allowlisted read-only programs.
 
     Args:
         command: The command to validate.
@@ -32,15 +549,9 @@ def validate_command(command: str) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_valid, message).
     """
-    for pattern in FORBIDDEN_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return False, f"Command contains forbidden pattern: {pattern}"
-
-    # Check for write operations to sensitive directories
-    write_pattern = r'> /etc/|> /var/|> /root/'
-    if re.search(write_pattern, command, re.IGNORECASE):
-        return False, "Write operation detected to sensitive directory"
-
+    reason = _check(command)
+    if reason:
+        return False, reason
     return True, "OK"
 
 
@@ -62,6 +573,241 @@ def log_action(
             pass
 
 
+# ═══════════════════════════════════════════════════════════════
+# CONNECTION CACHE (paramiko)
+# ═══════════════════════════════════════════════════════════════
+
+ConnectionKey = Tuple[str, int, str]
+
+
+class _Entry:
+    """A cached client plus how many callers are using it right now."""
+
+    __slots__ = ("client", "last_used", "leases", "retired")
+
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.leases = 0
+        self.retired = False    # Out of the cache; closed when the last lease ends
+
+
+class ConnectionCache:
+    """
+    LRU of connected paramiko clients keyed by (host, port, user).
+
+    Callers hold a lease while a channel is open; idle/LRU eviction only
+    closes clients nobody is using (busy ones are retired and closed when
+    their last lease ends), and last-use is stamped when a command finishes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CONNECTION_CACHE_SIZE,
+        idle_timeout: float = IDLE_TIMEOUT_SEC,
+        keepalive: int = KEEPALIVE_SEC,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.handshakes = 0
+        self._clients: "OrderedDict[ConnectionKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connecting: Dict[ConnectionKey, threading.Lock] = {}
+
+    def _connect_lock(self, key: ConnectionKey) -> threading.Lock:
+        """Per-key lock so concurrent callers don't open two transports to one host."""
+        with self._lock:
+            return self._connecting.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _active(client) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _retire(entry: _Entry, closing: List[object]) -> None:
+        """Take an entry out of service (caller holds the lock and removed it from _clients)."""
+        entry.retired = True
+        if entry.leases == 0:
+            closing.append(entry.client)
+
+    def _pop_expired(self) -> List[object]:
+        """Remove idle or dead clients (caller holds the lock); returns those to close now."""
+        now = time.monotonic()
+        expired = [key for key, entry in self._clients.items()
+                   if (entry.leases == 0 and now - entry.last_used > self.idle_timeout)
+                   or not self._active(entry.client)]
+        closing: List[object] = []
+        for key in expired:
+            self._retire(self._clients.pop(key), closing)
+        return closing
+
+    def _acquire(self, host: str, port: int, username: str) -> _Entry:
+        """Leased entry for (host, port, user), connecting if needed."""
+        key = (host, port, username)
+        with self._lock:
+            closing = self._pop_expired()
+            entry = self._clients.get(key)
+            if entry:
+                entry.leases += 1
+                self._clients.move_to_end(key)
+        for client in closing:
+            client.close()
+        if entry:
+            return entry
+
+        with self._connect_lock(key):
+            with self._lock:
+                entry = self._clients.get(key)
+                if entry:
+                    entry.leases += 1  # Another thread connected while we waited
+                    return entry
+            client = paramiko.SSHClient()
+            client.load_system_host_keys()
+            client.set_missing_host_key_policy(paramiko.RejectPolicy())
+            client.connect(host, port=port, username=username, timeout=CONNECT_TIMEOUT_SEC)
+            client.get_transport().set_keepalive(self.keepalive)
+            entry = _Entry(client)
+            entry.leases = 1
+            closing = []
+            with self._lock:
+                self.handshakes += 1
+                self._clients[key] = entry
+                # Evict least-recently-used clients; busy ones close when released
+                while len(self._clients) > self.max_size:
+                    self._retire(self._clients.popitem(last=False)[1], closing)
+        for old in closing:
+            old.close()
+        return entry
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            close = entry.retired and entry.leases == 0
+        if close:
+            entry.client.close()
+
+    @contextmanager
+    def lease(self, host: str, port: int, username: str) -> Iterator[object]:
+        """Connected client for (host, port, user), reused if cached; kept open while leased."""
+        entry = self._acquire(host, port, username)
+        try:
+            yield entry.client
+        finally:
+            self._release(entry)
+
+    def discard(self, host: str, port: int, username: str, client: object = None) -> None:
+        """Drop a cached connection (e.g. after a transport error); closed once unused."""
+        closing: List[object] = []
+        with self._lock:
+            entry = self._clients.get((host, port, username))
+            if entry and (client is None or entry.client is client):
+                self._retire(self._clients.pop((host, port, username)), closing)
+        for old in closing:
+            old.close()
+
+    @staticmethod
+    def _open_channel(client, timeout: int):
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            raise paramiko.SSHException("SSH transport is closed")
+        return transport.open_session(timeout=timeout)
+
+    @staticmethod
+    def _exec_channel(channel, command: str, timeout: int) -> Tuple[int, str, str]:
+        with channel:
+            channel.settimeout(timeout)
+            channel.exec_command(command)
+            output = channel.makefile("rb").read().decode(errors="replace")
+            error = channel.makefile_stderr("rb").read().decode(errors="replace")
+            return channel.recv_exit_status(), output, error
+
+    def exec(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        command: str,
+        timeout: int = COMMAND_TIMEOUT_SEC,
+    ) -> Tuple[int, str, str]:
+        """
+        Run one command on its own channel.
+
+        Reconnects once if the cached transport died before the channel
+        could be opened; once the command has been sent it is never
+        re-run (it may not be idempotent).
+        """
+        for attempt in (1, 2):
+            with self.lease(host, port, username) as client:
+                try:
+                    channel = self._open_channel(client, timeout)
+                except paramiko.SSHException:
+                    self.discard(host, port, username, client)
+                    if attempt == 2:
+                        raise
+                    continue
+                return self._exec_channel(channel, command, timeout)
+        raise AssertionError("unreachable")
+
+    def close_all(self) -> None:
+        """Close every cached connection (busy ones when their command finishes)."""
+        closing: List[object] = []
+        with self._lock:
+            for entry in self._clients.values():
+                self._retire(entry, closing)
+            self._clients.clear()
+        for client in closing:
+            client.close()
+
+
+_cache: Optional[ConnectionCache] = None
+
+
+def get_connection_cache() -> ConnectionCache:
+    """Get or create the module-level connection cache."""
+    global _cache
+    if _cache is None:
+        _cache = ConnectionCache()
+        atexit.register(_cache.close_all)
+    return _cache
+
+
+# ═══════════════════════════════════════════════════════════════
+# EXECUTION
+# ═══════════════════════════════════════════════════════════════
+
+def _subprocess_exec(host: str, port: int, username: str, command: str) -> Tuple[int, str, str]:
+    """Run a command with the ssh binary (no paramiko)."""
+    import subprocess
+    ssh_cmd = [
+        "ssh",
+        "-o", "LogLevel=ERROR",
+        "-o", "BatchMode=yes",
+        "-p", str(port),
+        f"{username}@{host}",
+        command
+    ]
+    result = subprocess.run(
+        ssh_cmd,
+        capture_output=True,
+        text=True,
+        timeout=COMMAND_TIMEOUT_SEC
+    )
+    return result.returncode, result.stdout, result.stderr
+
+
+def _run_validated(host: str, port: int, username: str, command: str) -> Tuple[int, str, str]:
+    """Execute an already-validated command (cached paramiko connection if available)."""
+    if paramiko is None:
+        return _subprocess_exec(host, port, username, command)
+    try:
+        return get_connection_cache().exec(host, port, username, command)
+    except Exception as e:
+        return 1, "", str(e)
+
+
 def safe_ssh_exec(
     host: str,
     port: int,
@@ -90,45 +836,32 @@ def safe_ssh_exec(
         return 1, "", msg
 
     log_action(f"Executing: {command}", log_file)
+    return _run_validated(host, port, username, command)
 
-    try:
-        import paramiko
-    except ImportError:
-        # Fallback to subprocess if paramiko not available
-        import subprocess
-        ssh_cmd = [
-            "ssh",
-            "-o", "StrictHostKeyChecking=no",
-            "-o", "UserKnownHostsFile=/dev/null",
-            "-o", "LogLevel=ERROR",
-            "-o", "BatchMode=yes",
-            "-p", str(port),
-            f"{username}@{host}",
-            command
-        ]
-        result = subprocess.run(
-            ssh_cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        return result.returncode, result.stdout, result.stderr
-
-    # Use paramiko
-    try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(host, port=port, username=username, timeout=30)
 
-        stdin, stdout, stderr = ssh.exec_command(command)
-        exit_code = stdout.channel.recv_exit_status()
-        output = stdout.read().decode()
-        error = stderr.read().decode()
+def safe_ssh_exec_many(
+    host: str,
+    port: int,
+    username: str,
+    commands: List[str],
+    log_file: Optional[str] = None,
+    max_parallel: int = MAX_PARALLEL_CHANNELS,
+) -> List[Tuple[int, str, str]]:
+    """
+    Execute several commands concurrently over one cached connection.
 
-        ssh.close()
-        return exit_code, output, error
-    except Exception as e:
-        return 1, "", str(e)
+    Each command is validated and runs on its own channel; blocked
+    commands get (1, "", reason) without affecting the others.
+
+    Returns:
+        One (exit_code, stdout, stderr) per command, in input order.
+    """
+    def run(command: str) -> Tuple[int, str, str]:
+        return safe_ssh_exec(host, port, username, command, log_file)
+
+    workers = max(1, min(max_parallel, len(commands)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, commands))
 
 
 def main() -> None:
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+SSH Session Pool — multiplexed connections per SSH config alias.
+
+Opens one OpenSSH ControlMaster connection per alias and reuses it for
+every command in a check cycle, so only the first command pays the
+TCP + key exchange + auth cost. Idle masters shut themselves down
+after CONTROL_PERSIST_SEC (ControlPersist), or explicitly via close().
+
+Callers use `result.handshake` to count only real new connections
+toward their rate limiter. run_batch() goes one step further and sends
+several commands as a single delimiter-framed script (one round trip);
+popen() streams over the same connection (e.g. tar pipes for deploys).
+
+Windows OpenSSH has no ControlMaster support — there every command
+opens its own connection and is reported as a handshake.
+
+Usage:
+    from ssh_session import get_pool
+
+    pool = get_pool()
+    result = pool.run("s62pa", "uptime", timeout=15)
+    print(result.stdout, result.handshake)
+    outputs = pool.run_batch("s62pa", {"load": "cat /proc/loadavg", "disk": "df -h /"})
+    pool.close_all()
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+CONTROL_DIR = Path(os.environ.get(
+    "SSH_CONTROL_DIR",
+    Path(tempfile.gettempdir()) / f"ssh-cm-{os.getenv('USER', os.getenv('USERNAME', 'agent'))}"
+))
+CONTROL_PERSIST_SEC = 60        # Idle master connections exit after this
+MULTIPLEX_SUPPORTED = sys.platform != "win32"
+
+
+@dataclass
+class SSHResult:
+    """Outcome of one command run through the pool."""
+    alias: str
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+    handshake: bool  # True if a new SSH connection had to be established
+
+
+def build_batch_script(commands: Dict[str, str]) -> Tuple[str, str]:
+    """
+    Combine commands into one remote script framed by unique markers.
+
+    Each command runs in its own subshell with stderr discarded, so one
+    failing command can't swallow the next one's output.
+    Returns (script, token) — the token is needed to split the output.
+    """
+    token = uuid.uuid4().hex
+    parts = []
+    for key, cmd in commands.items():
+        marker = shlex.quote(f"__BATCH_{token}_{key}__")
+        parts.append(f"printf '\\n%s\\n' {marker}; ( {cmd} ) 2>/dev/null")
+    parts.append(f"printf '\\n%s\\n' {shlex.quote(f'__BATCH_{token}_END__')}")
+    return "; ".join(parts), token
+
+
+def split_batch_output(output: str, token: str, keys: List[str]) -> Dict[str, str]:
+    """
+    Split framed batch output back into per-command results.
+
+    Keys whose marker never arrived (script cut short) are missing
+    from the returned dict.
+    """
+    prefix = f"__BATCH_{token}_"
+    results: Dict[str, str] = {}
+    current: Optional[str] = None
+    buffer: List[str] = []
+
+    for line in output.splitlines():
+        if line.startswith(prefix) and line.endswith("__"):
+            if current is not None:
+                results[current] = "\n".join(buffer).strip()
+            name = line[len(prefix):-2]
+            current = name if name in keys else None
+            buffer = []
+        elif current is not None:
+            buffer.append(line)
+
+    return results
+
+
+class SSHSessionPool:
+    """Pool of multiplexed SSH connections, one master per alias."""
+
+    def __init__(
+        self,
+        control_dir: Path = CONTROL_DIR,
+        persist_sec: int = CONTROL_PERSIST_SEC,
+        multiplex: bool = MULTIPLEX_SUPPORTED,
+    ):
+        self.control_dir = Path(control_dir)
+        self.persist_sec = persist_sec
+        self.multiplex = multiplex
+        self.handshakes = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        if self.multiplex:
+            self.control_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                os.chmod(self.control_dir, 0o700)
+            except OSError:
+                pass
+
+    def _lock(self, alias: str) -> threading.Lock:
+        """Per-alias lock so concurrent callers don't race to open two masters."""
+        with self._guard:
+            return self._locks.setdefault(alias, threading.Lock())
+
+    def _mux_options(self) -> List[str]:
+        """ssh options that attach to an existing master connection."""
+        if not self.multiplex:
+            return []
+        return [
+            "-o", "ControlMaster=no",
+            "-o", f"ControlPath={self.control_dir / '%C'}",
+        ]
+
+    def is_alive(self, alias: str) -> bool:
+        """Check whether a master connection for this alias is running (no network I/O)."""
+        if not self.multiplex:
+            return False
+        try:
+            result = subprocess.run(
+                ["ssh", *self._mux_options(), "-O", "check", alias],
+                capture_output=True, text=True, timeout=5
+            )
+            return result.returncode == 0
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return False
+
+    def needs_handshake(self, alias: str) -> bool:
+        """True if the next command on this alias will open a new connection."""
+        return not self.is_alive(alias)
+
+    def _open_master(self, alias: str, connect_timeout: int, timeout: int) -> SSHResult:
+        """
+        Start a backgrounded master (ssh -fN) for this alias.
+
+        stderr goes to a temp file rather than a pipe: the forked master
+        keeps it open for its whole lifetime, which would block a pipe reader.
+        """
+        start = time.time()
+        with tempfile.TemporaryFile(mode="w+") as err:
+            result = subprocess.run(
+                ["ssh", "-f", "-N",
+                 "-o", "ControlMaster=yes",
+                 "-o", f"ControlPath={self.control_dir / '%C'}",
+                 "-o", f"ControlPersist={self.persist_sec}s",
+                 "-o", f"ConnectTimeout={connect_timeout}", "-o", "BatchMode=yes",
+                 alias],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=err,
+                timeout=timeout
+            )
+            err.seek(0)
+            stderr = err.read()
+        return SSHResult(
+            alias=alias,
+            returncode=result.returncode,
+            stdout="",
+            stderr=stderr,
+            duration=time.time() - start,
+            handshake=True,
+        )
+
+    def run(
+        self,
+        alias: str,
+        command: str,
+        timeout: int = 30,
+        connect_timeout: int = 10,
+    ) -> SSHResult:
+        """
+        Run a command over the alias' shared connection.
+
+        Opens the master first if none is running. Raises
+        subprocess.TimeoutExpired and FileNotFoundError like
+        subprocess.run, so callers keep their existing error handling.
+        """
+        cmd = [
+            "ssh", *self._mux_options(),
+            "-o", f"ConnectTimeout={connect_timeout}", "-o", "BatchMode=yes",
+            alias, command,
+        ]
+        if not self.multiplex:
+            with self._guard:
+                self.handshakes += 1
+            return self._exec(alias, cmd, timeout, handshake=True)
+
+        start = time.time()
+        handshake, failed = self._ensure_master(alias, connect_timeout, timeout)
+        if failed is not None:
+            return failed
+
+        result = self._exec(alias, cmd, timeout, handshake=handshake)
+        result.duration = time.time() - start
+        return result
+
+    def _ensure_master(
+        self,
+        alias: str,
+        connect_timeout: int,
+        timeout: int,
+    ) -> Tuple[bool, Optional[SSHResult]]:
+        """Open the master if none is running. Returns (handshake, failed master result)."""
+        if self.is_alive(alias):
+            return False, None
+        # Serialize so concurrent callers don't open two masters
+        with self._lock(alias):
+            if self.is_alive(alias):
+                return False, None
+            with self._guard:
+                self.handshakes += 1
+            master = self._open_master(alias, connect_timeout, timeout)
+            return True, (master if master.returncode != 0 else None)
+
+    def popen(
+        self,
+        alias: str,
+        command: str,
+        connect_timeout: int = 10,
+        **popen_kwargs,
+    ) -> subprocess.Popen:
+        """
+        Start a command over the shared connection without waiting for it.
+
+        For streaming transfers (e.g. `tar xzf -` fed from stdin). Raises
+        subprocess.CalledProcessError if the connection can't be opened.
+        """
+        if self.multiplex:
+            _, failed = self._ensure_master(alias, connect_timeout, connect_timeout + 5)
+            if failed is not None:
+                raise subprocess.CalledProcessError(
+                    failed.returncode, ["ssh", alias], stderr=failed.stderr)
+        else:
+            with self._guard:
+                self.handshakes += 1
+        cmd = [
+            "ssh", *self._mux_options(),
+            "-o", f"ConnectTimeout={connect_timeout}", "-o", "BatchMode=yes",
+            alias, command,
+        ]
+        return subprocess.Popen(cmd, **popen_kwargs)
+
+    def run_batch(
+        self,
+        alias: str,
+        commands: Dict[str, str],
+        timeout: int = 30,
+        connect_timeout: int = 10,
+    ) -> Tuple[Dict[str, str], SSHResult]:
+        """
+        Run several commands in one remote execution.
+
+        Returns ({key: output}, result) — `result` carries the handshake
+        flag and timing of the single round trip.
+        """
+        script, token = build_batch_script(commands)
+        result = self.run(alias, script, timeout=timeout, connect_timeout=connect_timeout)
+        return split_batch_output(result.stdout, token, list(commands)), result
+
+    def _exec(self, alias: str, cmd: List[str], timeout: int, handshake: bool) -> SSHResult:
+        """Execute the prepared ssh command line."""
+        start = time.time()
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=timeout,
+            stdin=subprocess.DEVNULL
+        )
+        return SSHResult(
+            alias=alias,
+            returncode=result.returncode,
+            stdout=result.stdout,
+            stderr=result.stderr,
+            duration=time.time() - start,
+            handshake=handshake,
+        )
+
+    def close(self, alias: str) -> None:
+        """Tear down the master connection for one alias."""
+        if not self.multiplex:
+            return
+        try:
+            subprocess.run(
+                ["ssh", *self._mux_options(), "-O", "exit", alias],
+                capture_output=True, text=True, timeout=5
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+
+    def close_all(self) -> None:
+        """Tear down every master connection this pool has opened."""
+        for alias in list(self._locks):
+            self.close(alias)
+
+
+# Global pool instance
+_pool: Optional[SSHSessionPool] = None
+
+
+def get_pool() -> SSHSessionPool:
+    """Get or create the global session pool."""
+    global _pool
+    if _pool is None:
+        _pool = SSHSessionPool()
+    return _pool
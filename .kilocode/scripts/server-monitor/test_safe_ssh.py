@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the safe_ssh command policy.
+
+Usage:
+    python3 -m pytest -q .kilocode/scripts/server-monitor/test_safe_ssh.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from safe_ssh import validate_command  # noqa: E402
+
+
+# Commands the monitoring scripts actually send (health_monitor, server_ops,
+# collect_evidence) plus read-only commands that mention forbidden words
+ALLOWED = [
+    "uptime",
+    "uptime -p",
+    "df -h / | tail -1",
+    "free -h | grep Mem",
+    "cat /proc/loadavg",
+    "systemctl --failed --no-pager --no-legend 2>/dev/null | head -5",
+    "docker ps --format '{{.Names}}|{{.Status}}' 2>/dev/null || echo 'no docker'",
+    "ss -tlnp | grep LISTEN | head -20",
+    "hostname -f && uname -a && cat /etc/os-release && uptime && free -h && df -h",
+    "dpkg -l 2>/dev/null | head -200 || echo 'dpkg not found'",
+    "systemctl list-units --type=service --state=running --no-pager 2>/dev/null || echo 'systemctl not found'",
+    "ip addr && ip route && ss -tulpn 2>/dev/null || echo 'network tools not found'",
+    "cat /etc/passwd | grep -v nologin | grep -v '/bin/false'",
+    "ps auxf --sort=-%mem | head -30",
+    "docker ps -a --format 'table {{.Names}}\t{{.Status}}\t{{.Ports}}' 2>/dev/null || echo 'docker not available'",
+    "crontab -l 2>/dev/null; for u in $(cut -d: -f1 /etc/passwd); do echo \"--- $u ---\"; "
+    "sudo crontab -u $u -l 2>/dev/null; done",
+    "df -h && echo '---' && du -sh /var/www/*/ /home/*/ /opt/*/ 2>/dev/null | sort -rh | head -15",
+    "ls -la /etc/nginx/sites-enabled/ 2>/dev/null && nginx -T 2>/dev/null | head -100 || echo 'no nginx'",
+    "systemctl list-timers --no-pager 2>/dev/null || echo 'no timers'",
+    "echo 'rm -rf /'",
+    "grep -r shutdown /var/log/syslog",
+    "sh -c 'uptime && df -h'",
+    "bash -lc 'free -h'",
+    "timeout 5 uptime",
+    "env LANG=C df -h",
+    "nice -n 10 du -sh /var/log",
+    "awk '{print $1}' /proc/loadavg",
+    "docker -H unix:///var/run/docker.sock ps",
+    "watch -n1 'uptime'",
+    "find /var/log -name '*.gz' -exec ls -la {} \\;",
+    "journalctl -u nginx --since '1 hour ago' --no-pager | tail -50",
+    "ip -br addr show dev eth0",
+    "docker container ls -a",
+    "uptime 2>&1 | head -1",
+]
+
+REJECTED = [
+    # Shell / interpreter fed from a pipe or here-string
+    'echo "rm -rf /" | sh',
+    'echo "rm -rf /" | bash -s',
+    'bash <<< "rm -rf /"',
+    "sh < /tmp/script.sh",
+    "echo reboot | python3",
+    "echo x | awk '{print}'",
+    # -c hidden in an option cluster
+    'bash -lc "rm -rf /"',
+    'sh -ec "rm -rf /"',
+    'bash -x -e -c "reboot"',
+    "bash script.sh",
+    # Multiplexers and global options
+    "busybox rm -rf /",
+    "busybox sh -c 'reboot'",
+    "docker -H unix:///x rm web",
+    "docker --context=prod rmi nginx",
+    "docker --bogus ps",
+    # Wrapper options
+    "xargs --max-args 1 rm",
+    "xargs --max-args=1 rm -f",
+    "xargs -0r rm",
+    'env -S "rm -rf /"',
+    'env --split-string="reboot"',
+    "env --bogus rm -rf /",
+    "timeout --signal=KILL 5 reboot",
+    # Interpreter code
+    "awk 'BEGIN{system(\"rm -rf /tmp/x\")}'",
+    "awk '{print | \"sh\"}' /etc/hosts",
+    "python3 -c 'import os; os.system(\"reboot\")'",
+    "perl -e 'unlink \"/etc/hosts\"'",
+    # Allow rule must match the whole command
+    "sudo crontab -u root -l -r",
+    "sudo crontab -u -r -l",
+    "crontab -r",
+    "crontab /tmp/evil",
+    # Programs that take a shell string of their own
+    "watch 'rm -rf /tmp'",
+    "watch -n1 'r\"\"m -rf /tmp/x'",
+    "ssh other reboot",
+    "ssh localhost 'r\"\"m -rf /'",
+    "flock /tmp/l -c 'r\"\"m -rf /'",
+    "script -qc 'r\"\"m -rf /' /dev/null",
+    "sed -n '1e r\"\"m -rf /tmp' /etc/hostname",
+    "tar --checkpoint-action=exec='r\"\"m -rf /tmp/x' -cf /dev/null /etc",
+    "tar --to-command=sh -xf /tmp/a.tar",
+    # Not read-only, hence not on the allowlist
+    "cp /dev/null /etc/passwd",
+    "mv /etc/passwd /tmp/",
+    "truncate -s0 /var/log/syslog",
+    "ln -sf /dev/null /etc/passwd",
+    "kill -9 1",
+    "iptables -F",
+    "ufw disable",
+    "systemctl restart nginx",
+    "mount -o remount,ro /",
+    "ip addr add 10.0.0.1/24 dev eth0",
+    "ip route flush all",
+    "docker exec web sh",
+    "docker container stop web",
+    "sort -o /etc/hosts /tmp/x",
+    "date -s '2020-01-01'",
+    "hostname evil",
+    "journalctl --vacuum-time=1s",
+    "find / -name '*.log' -fprint /etc/x",
+    "echo x > /tmp/out",
+    "echo x >& /etc/hosts",
+    "time -o /etc/hosts uptime",
+    # Pre-existing rules
+    "rm -rf /",
+    "echo ok && r''m -rf /tmp",
+    "df -h; $(reboot)",
+    "systemctl stop nginx",
+    "echo x > /etc/hosts",
+]
+
+
+@pytest.mark.parametrize("command", ALLOWED)
+def test_allowed(command):
+    ok, reason = validate_command(command)
+    assert ok, reason
+
+
+@pytest.mark.parametrize("command", REJECTED)
+def test_rejected(command):
+    ok, reason = validate_command(command)
+    assert not ok, f"accepted: {command}"
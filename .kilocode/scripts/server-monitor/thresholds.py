@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Alert Thresholds — one config, one alert vocabulary.
+
+Reads thresholds.yaml and turns a parsed EvidenceSample (parsers.py)
+into alerts, so health_monitor, server_ops and collect_evidence can't
+drift apart on what "disk full" means.
+
+Usage:
+    from parsers import parse_sample
+    from thresholds import sample_alerts
+
+    for alert in sample_alerts("s62", parse_sample(evidence)):
+        print(alert)
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from parsers import EvidenceSample
+
+
+THRESHOLDS_FILE = Path(os.environ.get(
+    "ALERT_THRESHOLDS",
+    Path(__file__).resolve().parent / "thresholds.yaml"
+))
+LEVELS = ("critical", "warning")        # Checked in this order
+ICONS = {"critical": "🔴", "warning": "⚠️"}
+
+Thresholds = Dict[str, Dict[str, float]]
+
+_loaded: Dict[Path, Thresholds] = {}
+
+
+def load_thresholds(path: Path = THRESHOLDS_FILE) -> Thresholds:
+    """Load thresholds.yaml once per process."""
+    path = Path(path)
+    if path not in _loaded:
+        import yaml
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        _loaded[path] = {
+            metric: {level: float(value) for level, value in (levels or {}).items()}
+            for metric, levels in data.items()
+        }
+    return _loaded[path]
+
+
+def threshold_constants(thresholds: Optional[Thresholds] = None) -> Dict[str, float]:
+    """Flattened {"disk_pct.warning": 80, ...} for rule placeholders."""
+    thresholds = thresholds if thresholds is not None else load_thresholds()
+    return {f"{metric}.{level}": value
+            for metric, levels in thresholds.items() for level, value in levels.items()}
+
+
+def level(metric: str, value: float, thresholds: Optional[Thresholds] = None) -> Optional[str]:
+    """'critical' / 'warning' if `value` is above that threshold, else None."""
+    limits = (thresholds if thresholds is not None else load_thresholds()).get(metric, {})
+    for name in LEVELS:
+        if name in limits and value > limits[name]:
+            return name
+    return None
+
+
+def sample_alerts(
+    server: str,
+    sample: EvidenceSample,
+    thresholds: Optional[Thresholds] = None,
+) -> List[str]:
+    """All threshold alerts for one parsed evidence sample."""
+    thresholds = thresholds if thresholds is not None else load_thresholds()
+    alerts = []
+
+    for disk in sample.disks:
+        hit = level("disk_pct", disk.use_pct, thresholds)
+        if hit:
+            alerts.append(f"{ICONS[hit]} {server} disk {hit.upper()}: "
+                          f"{disk.use_pct:.0f}% ({disk.mount})")
+
+    if sample.memory:
+        pct = sample.memory.used_pct
+        hit = level("memory_pct", pct, thresholds)
+        if hit:
+            alerts.append(f"{ICONS[hit]} {server} memory {hit.upper()}: {pct:.0f}% used")
+
+    if sample.load:
+        hit = level("load_1m", sample.load.load_1m, thresholds)
+        if hit:
+            alerts.append(f"{ICONS[hit]} {server} high load: {sample.load.load_1m}")
+
+    hit = level("failed_units", len(sample.failed), thresholds)
+    if hit:
+        units = ", ".join(u.unit for u in sample.failed)
+        alerts.append(f"{ICONS[hit]} {server} failed services: {units}")
+
+    return alerts
@@ -15,22 +15,81 @@ Usage:
 
     # Research task
     result = research_task("marketing agencies Czech Republic")
+
+    # Streaming (tokens as they arrive, TTFT / tokens-per-second afterwards)
+    stream = stream_groq("Summarise ...")
+    for token in stream:
+        print(token, end="", flush=True)
+    print(stream.response.ttft_ms, stream.response.tokens_per_sec)
+
+    # From async code
+    result = await get_async_client().aask("...", model="fast")
+    results = await batch_parallel_async([{"prompt": "..."}] * 20)
+
+Connections to the LiteLLM proxy are pooled: the shared client keeps up to
+LITELLM_POOL_SIZE keep-alive connections (one urllib3 pool shared by
+per-thread requests.Sessions, so it is safe to use from thread pools) and
+retries connection errors / 429 / 5xx up to LITELLM_MAX_RETRIES times with
+backoff.
+
+AsyncLiteLLMClient is the asyncio counterpart (httpx, one pool per event
+loop, at most LITELLM_MAX_CONCURRENCY requests in flight). The blocking
+helpers (ask_groq, batch_parallel, ...) are thin wrappers that run it on
+one background event loop, so a 100-prompt batch is 100 coroutines, not
+100 threads. Without httpx it runs the requests client in worker threads.
+
+Completions are cached by request hash (response_cache.py: in-process LRU
+plus Redis/SQLite, with a TTL). Deterministic requests (temperature 0) are
+cached automatically; sampled ones only with `cache=True` (analyze_code
+opts in). Hits come back with `cached=True` and the original latency in
+`cached_duration_ms`.
 """
 
+import asyncio
 import json
 import os
 import subprocess
 import sys
+import threading
+import time
+import weakref
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+try:
+    import httpx
+except ImportError:  # Optional — AsyncLiteLLMClient falls back to the pooled requests client
+    httpx = None
+
+from response_cache import ResponseCache, get_response_cache, request_key
 
 # Configuration
 LITELLM_URL = os.getenv("LITELLM_PROXY_URL", "http://localhost:4000")
 LITELLM_MASTER_KEY = os.getenv("LITELLM_MASTER_KEY", "sk-local-dev-1234")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
+# HTTP connection pool
+POOL_SIZE = int(os.getenv("LITELLM_POOL_SIZE", "10"))      # Max open connections per host
+MAX_RETRIES = int(os.getenv("LITELLM_MAX_RETRIES", "3"))   # Connect errors, 429 and 5xx
+RETRY_BACKOFF = 0.5                                         # 0.5s, 1s, 2s, ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CONNECT_TIMEOUT = 5
+REQUEST_TIMEOUT = 120
+
+# Batch concurrency
+PROXY_CONFIG = Path(os.getenv(
+    "LITELLM_CONFIG",
+    Path(__file__).resolve().parent.parent / "litellm" / "proxy_config.yaml",
+))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+ASSUMED_CALL_SEC = 6             # Typical completion time, turns rpm into in-flight calls
+DEFAULT_MODEL_CONCURRENCY = 4    # Models without an rpm limit in the proxy config
+ASYNC_MAX_CONCURRENCY = int(os.getenv("LITELLM_MAX_CONCURRENCY", "64"))  # In-flight async requests
+
+T = TypeVar("T")
+
 # Model routing
 MODELS = {
     "fast": "groq/llama-3.1-8b-instant",
@@ -52,14 +111,288 @@ class AgentResponse:
     tokens_used: int
     duration_ms: int
     error: Optional[str] = None
+    ttft_ms: Optional[int] = None             # Streaming only: time to first token
+    tokens_per_sec: Optional[float] = None    # Streaming only: generation rate after the first token
+    cached: bool = False                      # Served from the response cache (no provider call)
+    cached_duration_ms: Optional[int] = None  # Cache hits: latency of the original call
+
+
+def _chat_payload(
+    prompt: str,
+    model: str,
+    system_prompt: Optional[str],
+    temperature: float,
+    max_tokens: int,
+) -> Dict[str, Any]:
+    """OpenAI-style chat completion request body."""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+
+def _completion_response(data: Dict[str, Any], model: str, start_time: float) -> AgentResponse:
+    """AgentResponse from a chat completion response body."""
+    return AgentResponse(
+        success=True,
+        content=data["choices"][0]["message"]["content"],
+        model=data.get("model", model),
+        tokens_used=data.get("usage", {}).get("total_tokens", 0),
+        duration_ms=int((time.time() - start_time) * 1000),
+    )
+
+
+def _error_response(error: Exception, model: str, start_time: float) -> AgentResponse:
+    """AgentResponse for a failed request."""
+    return AgentResponse(
+        success=False,
+        content="",
+        model=model,
+        tokens_used=0,
+        duration_ms=int((time.time() - start_time) * 1000),
+        error=str(error),
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# Streaming
+# ═══════════════════════════════════════════════════════════════
+
+_STREAM_DONE = object()
+
+
+class _StreamState:
+    """Accumulates SSE chunks of one streamed completion into an AgentResponse"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.start_time = time.time()
+        self.first_token_at: Optional[float] = None
+        self.parts: List[str] = []
+        self.chunks = 0
+        self.total_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def feed(self, line: str) -> Any:
+        """Text delta of one SSE line, "" if it carries none, _STREAM_DONE at the end"""
+        if not line or not line.startswith("data:"):
+            return ""  # Blank separators, comments, keep-alives
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return _STREAM_DONE
+        chunk = json.loads(data)
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"].get("message", chunk["error"]))
+        self.model = chunk.get("model") or self.model
+        usage = chunk.get("usage") or {}
+        if usage:
+            self.total_tokens = usage.get("total_tokens", self.total_tokens)
+            self.completion_tokens = usage.get("completion_tokens", self.completion_tokens)
+        choices = chunk.get("choices") or [{}]
+        token = (choices[0].get("delta") or {}).get("content") or ""
+        if token:
+            if self.first_token_at is None:
+                self.first_token_at = time.time()
+            self.parts.append(token)
+            self.chunks += 1
+        return token
+
+    def finish(self, error: Optional[Exception] = None) -> AgentResponse:
+        """Final response (partial content is kept if the stream broke off)"""
+        end = time.time()
+        generated = self.completion_tokens or self.chunks
+        ttft_ms = tokens_per_sec = None
+        if self.first_token_at is not None:
+            ttft_ms = int((self.first_token_at - self.start_time) * 1000)
+            elapsed = end - self.first_token_at
+            if generated > 1 and elapsed > 0:
+                tokens_per_sec = round((generated - 1) / elapsed, 1)
+        return AgentResponse(
+            success=error is None,
+            content="".join(self.parts),
+            model=self.model,
+            tokens_used=self.total_tokens or generated,
+            duration_ms=int((end - self.start_time) * 1000),
+            error=str(error) if error else None,
+            ttft_ms=ttft_ms,
+            tokens_per_sec=tokens_per_sec,
+        )
+
+
+class TokenStream:
+    """Iterate to get text deltas as they arrive; `.response` is set once the stream ends"""
+
+    def __init__(self, lines: Callable[[], Iterable[str]], model: str):
+        self._lines = lines
+        self._model = model
+        self.response: Optional[AgentResponse] = None
+
+    def __iter__(self) -> Iterator[str]:
+        state = _StreamState(self._model)
+        try:
+            for line in self._lines():
+                token = state.feed(line)
+                if token is _STREAM_DONE:
+                    break
+                if token:
+                    yield token
+        except Exception as e:
+            self.response = state.finish(e)
+            return
+        self.response = state.finish()
+
+    def text(self) -> str:
+        """Consume the whole stream and return the content"""
+        for _ in self:
+            pass
+        return self.response.content
+
+
+class AsyncTokenStream:
+    """Async counterpart of TokenStream (`async for token in stream`)"""
+
+    def __init__(self, lines: Callable[[], AsyncIterator[str]], model: str):
+        self._lines = lines
+        self._model = model
+        self.response: Optional[AgentResponse] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        state = _StreamState(self._model)
+        try:
+            async for line in self._lines():
+                token = state.feed(line)
+                if token is _STREAM_DONE:
+                    break
+                if token:
+                    yield token
+        except Exception as e:
+            self.response = state.finish(e)
+            return
+        self.response = state.finish()
+
+    async def text(self) -> str:
+        """Consume the whole stream and return the content"""
+        async for _ in self:
+            pass
+        return self.response.content
+
+
+def _stream_payload(*args: Any) -> Dict[str, Any]:
+    """Chat payload asking for SSE chunks (plus a final usage chunk)"""
+    payload = _chat_payload(*args)
+    payload["stream"] = True
+    payload["stream_options"] = {"include_usage": True}
+    return payload
+
+
+# ═══════════════════════════════════════════════════════════════
+# Response cache
+# ═══════════════════════════════════════════════════════════════
+
+def _cache_for(temperature: float, cache: Optional[bool]) -> Optional[ResponseCache]:
+    """The response cache if this request may use it (None = auto: only temperature 0)."""
+    if cache is False or (cache is None and temperature > 0):
+        return None
+    return get_response_cache()
+
+
+def _from_cache(entry: Dict[str, Any], start_time: float) -> AgentResponse:
+    """AgentResponse for a cache hit (tokens_used = tokens the hit saved)."""
+    return AgentResponse(
+        success=True,
+        content=entry["content"],
+        model=entry["model"],
+        tokens_used=entry.get("tokens_used", 0),
+        duration_ms=int((time.time() - start_time) * 1000),
+        cached=True,
+        cached_duration_ms=entry.get("duration_ms"),
+    )
+
+
+def _cache_entry(response: AgentResponse) -> Dict[str, Any]:
+    return {
+        "content": response.content,
+        "model": response.model,
+        "tokens_used": response.tokens_used,
+        "duration_ms": response.duration_ms,
+    }
 
 
 class LiteLLMClient:
-    """Client for LiteLLM proxy"""
+    """Client for LiteLLM proxy (thread-safe, pooled keep-alive connections)"""
 
-    def __init__(self, base_url: str = LITELLM_URL, api_key: str = LITELLM_MASTER_KEY):
+    def __init__(
+        self,
+        base_url: str = LITELLM_URL,
+        api_key: str = LITELLM_MASTER_KEY,
+        pool_size: int = POOL_SIZE,
+        max_retries: int = MAX_RETRIES,
+        timeout: int = REQUEST_TIMEOUT,
+    ):
         self.base_url = base_url
         self.api_key = api_key
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._adapter = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _get_adapter(self):
+        """One HTTPAdapter (urllib3 pool + retry policy) shared by every thread."""
+        with self._lock:
+            if self._adapter is None:
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset({"GET", "POST"}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                # pool_block: callers wait for a free connection instead of
+                # opening extras, so file descriptors stay bounded
+                self._adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=self.pool_size,
+                    max_retries=retry,
+                    pool_block=True,
+                )
+            return self._adapter
+
+    @property
+    def session(self):
+        """This thread's requests.Session (connections come from the shared pool)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = self._get_adapter()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Content-Type"] = "application/json"
+            if self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self._local.session = session
+        return session
+
+    def close(self) -> None:
+        """Close all pooled connections (sessions reconnect lazily if used again)."""
+        with self._lock:
+            if self._adapter is not None:
+                self._adapter.close()
+                self._adapter = None
+        self._local = threading.local()
 
     def complete(
         self,
@@ -68,73 +401,309 @@ class LiteLLMClient:
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 4096,
+        cache: Optional[bool] = None,
     ) -> AgentResponse:
-        """Make a completion request"""
-        import time
-
-        import requests
-
+        """Make a completion request (cache: None = only if temperature is 0)"""
         start_time = time.time()
-
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-        }
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        store = _cache_for(temperature, cache)
+        if store is not None:
+            key = request_key(model, system_prompt, prompt, temperature, max_tokens)
+            entry = store.get(key)
+            if entry is not None:
+                return _from_cache(entry, start_time)
+        result = self._complete(prompt, model, system_prompt, temperature, max_tokens)
+        if store is not None and result.success:
+            store.put(key, _cache_entry(result))
+        return result
+
+    def _complete(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+    ) -> AgentResponse:
+        """Uncached completion request"""
+        start_time = time.time()
+        payload = _chat_payload(prompt, model, system_prompt, temperature, max_tokens)
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/v1/chat/completions",
                 json=payload,
-                headers=headers,
-                timeout=120,
+                timeout=(CONNECT_TIMEOUT, self.timeout),
             )
             response.raise_for_status()
-            data = response.json()
-
-            duration_ms = int((time.time() - start_time) * 1000)
-
-            return AgentResponse(
-                success=True,
-                content=data["choices"][0]["message"]["content"],
-                model=data.get("model", model),
-                tokens_used=data.get("usage", {}).get("total_tokens", 0),
-                duration_ms=duration_ms,
-            )
+            return _completion_response(response.json(), model, start_time)
         except Exception as e:
-            duration_ms = int((time.time() - start_time) * 1000)
-            return AgentResponse(
-                success=False,
-                content="",
-                model=model,
-                tokens_used=0,
-                duration_ms=duration_ms,
-                error=str(e),
-            )
+            return _error_response(e, model, start_time)
+
+    def stream(
+        self,
+        prompt: str,
+        model: str = "groq/llama-3.3-70b-versatile",
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> TokenStream:
+        """Make a streaming completion request (nothing is sent until iterated)"""
+        payload = _stream_payload(prompt, model, system_prompt, temperature, max_tokens)
+        return TokenStream(lambda: self._sse_lines(payload), model)
+
+    def _sse_lines(self, payload: Dict[str, Any]) -> Iterator[str]:
+        """Raw SSE lines of a streaming completion"""
+        with self.session.post(
+            f"{self.base_url}/v1/chat/completions",
+            json=payload,
+            stream=True,
+            timeout=(CONNECT_TIMEOUT, self.timeout),  # read timeout applies per chunk
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_lines(decode_unicode=True)
 
 
 # Global client instance
 _client: Optional[LiteLLMClient] = None
+_client_lock = threading.Lock()
 
 
 def get_client() -> LiteLLMClient:
     """Get or create the global client"""
     global _client
-    if _client is None:
-        _client = LiteLLMClient()
-    return _client
+    with _client_lock:
+        if _client is None:
+            _client = LiteLLMClient()
+        return _client
+
+
+# ═══════════════════════════════════════════════════════════════
+# Async client
+# ═══════════════════════════════════════════════════════════════
+
+class AsyncLiteLLMClient:
+    """asyncio client for LiteLLM proxy (use one instance per event loop)"""
+
+    def __init__(
+        self,
+        base_url: str = LITELLM_URL,
+        api_key: str = LITELLM_MASTER_KEY,
+        pool_size: int = POOL_SIZE,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        timeout: int = REQUEST_TIMEOUT,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._model_limits: Dict[str, asyncio.Semaphore] = {}
+        self._http = None
+        self._fallback: Optional[LiteLLMClient] = None
+
+    def _client(self):
+        """Shared httpx connection pool (created on first use, inside the loop)."""
+        if self._http is None:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT),
+                transport=httpx.AsyncHTTPTransport(retries=self.max_retries),
+            )
+        return self._http
+
+    async def _post(self, path: str, payload: Dict[str, Any]):
+        """POST with backoff on 429 / 5xx (connect errors are retried by the transport)."""
+        for attempt in range(self.max_retries + 1):
+            response = await self._client().post(path, json=payload)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * 2 ** attempt
+            await asyncio.sleep(delay)
+        return response
+
+    async def acomplete(
+        self,
+        prompt: str,
+        model: str = "groq/llama-3.3-70b-versatile",
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        cache: Optional[bool] = None,
+    ) -> AgentResponse:
+        """Make a completion request (cache: None = only if temperature is 0)"""
+        start_time = time.time()
+        store = _cache_for(temperature, cache)
+        if store is not None:
+            key = request_key(model, system_prompt, prompt, temperature, max_tokens)
+            entry = await asyncio.to_thread(store.get, key)
+            if entry is not None:
+                return _from_cache(entry, start_time)
+        result = await self._acomplete(prompt, model, system_prompt, temperature, max_tokens)
+        if store is not None and result.success:
+            await asyncio.to_thread(store.put, key, _cache_entry(result))
+        return result
+
+    async def _acomplete(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+    ) -> AgentResponse:
+        """Uncached completion request"""
+        async with self._limit:
+            if httpx is None:
+                if self._fallback is None:
+                    self._fallback = LiteLLMClient(self.base_url, self.api_key, self.pool_size,
+                                                   self.max_retries, self.timeout)
+                return await asyncio.to_thread(self._fallback._complete, prompt, model,
+                                               system_prompt, temperature, max_tokens)
+            start_time = time.time()
+            payload = _chat_payload(prompt, model, system_prompt, temperature, max_tokens)
+            try:
+                response = await self._post("/v1/chat/completions", payload)
+                response.raise_for_status()
+                return _completion_response(response.json(), model, start_time)
+            except Exception as e:
+                return _error_response(e, model, start_time)
+
+    def astream(
+        self,
+        prompt: str,
+        model: str = "groq/llama-3.3-70b-versatile",
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+    ) -> AsyncTokenStream:
+        """Make a streaming completion request (`async for token in client.astream(...)`)"""
+        payload = _stream_payload(prompt, model, system_prompt, temperature, max_tokens)
+
+        async def lines() -> AsyncIterator[str]:
+            async with self._limit:
+                if httpx is None:
+                    if self._fallback is None:
+                        self._fallback = LiteLLMClient(self.base_url, self.api_key, self.pool_size,
+                                                       self.max_retries, self.timeout)
+                    sync_lines = self._fallback._sse_lines(payload)
+                    try:
+                        while True:
+                            line = await asyncio.to_thread(next, sync_lines, None)
+                            if line is None:
+                                return
+                            yield line
+                    finally:
+                        try:
+                            sync_lines.close()
+                        except ValueError:
+                            pass  # Cancelled mid-read; the worker thread still owns it
+                async with self._client().stream("POST", "/v1/chat/completions", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        yield line
+
+        return AsyncTokenStream(lines, model)
+
+    async def aask(
+        self,
+        prompt: str,
+        model: str = "smart",
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        cache: Optional[bool] = None,
+    ) -> AgentResponse:
+        """ask_groq for async callers (model is a MODELS alias)"""
+        return await self.acomplete(
+            prompt=prompt,
+            model=MODELS.get(model, MODELS["smart"]),
+            system_prompt=system_prompt,
+            temperature=temperature,
+            cache=cache,
+        )
+
+    async def abatch(
+        self,
+        tasks: List[Dict[str, str]],
+        model: str = "fast",
+        max_workers: int = BATCH_MAX_WORKERS,
+        cache: Optional[bool] = None,
+    ) -> List[AgentResponse]:
+        """batch_parallel for async callers — same caps, results in input order"""
+        batch_limit = asyncio.Semaphore(max(1, max_workers))
+
+        async def run(task: Dict[str, str]) -> AgentResponse:
+            alias = task.get("model", model)
+            actual = MODELS.get(alias, MODELS["smart"])
+            if actual not in self._model_limits:
+                self._model_limits[actual] = asyncio.Semaphore(model_concurrency(actual))
+            # Model cap first: a task waiting on a saturated model must not
+            # hold a batch slot that another model's task could use
+            async with self._model_limits[actual], batch_limit:
+                return await self.aask(task.get("prompt", ""), model=alias,
+                                       system_prompt=task.get("system"), cache=cache)
+
+        return list(await asyncio.gather(*(run(task) for task in tasks)))
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._fallback is not None:
+            self._fallback.close()
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncLiteLLMClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncLiteLLMClient:
+    """Get or create the async client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncLiteLLMClient()
+    return client
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread that serves every blocking wrapper"""
+    global _background_loop
+    with _loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="agent-tools-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the background loop and wait for its result (any thread)"""
+    loop = _get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync() called from the agent_tools loop — await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def _background_call(method: str, *args: Any, **kwargs: Any) -> Any:
+    """Call an AsyncLiteLLMClient method with the background loop's client"""
+    return await getattr(get_async_client(), method)(*args, **kwargs)
 
 
 def ask_groq(
@@ -142,6 +711,7 @@ def ask_groq(
     model: str = "smart",
     temperature: float = 0.7,
     system_prompt: Optional[str] = None,
+    cache: Optional[bool] = None,
 ) -> AgentResponse:
     """
     Simple interface to Groq via LiteLLM.
@@ -151,17 +721,28 @@ def ask_groq(
         model: "fast", "balanced", "smart", or "reasoning"
         temperature: Sampling temperature (0-2)
         system_prompt: Optional system prompt
+        cache: Reuse cached responses — None: only at temperature 0,
+            True: always, False: never
 
     Returns:
         AgentResponse with content and metadata
     """
-    actual_model = MODELS.get(model, MODELS["smart"])
-    client = get_client()
-    return client.complete(
-        prompt=prompt,
-        model=actual_model,
-        system_prompt=system_prompt,
-        temperature=temperature,
+    return run_sync(_background_call(
+        "aask", prompt, model=model, temperature=temperature, system_prompt=system_prompt,
+        cache=cache,
+    ))
+
+
+async def ask_groq_async(
+    prompt: str,
+    model: str = "smart",
+    temperature: float = 0.7,
+    system_prompt: Optional[str] = None,
+    cache: Optional[bool] = None,
+) -> AgentResponse:
+    """Awaitable ask_groq (uses the running loop's AsyncLiteLLMClient)."""
+    return await get_async_client().aask(
+        prompt, model=model, temperature=temperature, system_prompt=system_prompt, cache=cache,
     )
 
 
@@ -169,6 +750,7 @@ def analyze_code(
     code: str,
     task: str = "review",
     language: str = "python",
+    cache: bool = True,
 ) -> AgentResponse:
     """
     Analyze code for review, refactor, or explain.
@@ -177,6 +759,7 @@ def analyze_code(
         code: Code to analyze
         task: "review", "refactor", "explain", "test"
         language: Programming language
+        cache: Reuse the previous answer for unchanged code
 
     Returns:
         AgentResponse with analysis
@@ -192,7 +775,7 @@ def analyze_code(
 
     system_prompt = f"You are a {language} expert. Provide clear, actionable feedback."
 
-    return ask_groq(prompt, model="smart", system_prompt=system_prompt)
+    return ask_groq(prompt, model="smart", system_prompt=system_prompt, cache=cache)
 
 
 def research_task(
@@ -211,7 +794,12 @@ def research_task(
     Returns:
         AgentResponse with research findings
     """
-    prompt = f"""Research: {topic}
+    return ask_groq(research_prompt(topic, format, max_items), model="balanced")
+
+
+def research_prompt(topic: str, format: str = "markdown", max_items: int = 10) -> str:
+    """Prompt used by research_task (exposed for streaming callers)."""
+    return f"""Research: {topic}
 
 Provide {max_items} key findings in {format} format.
 Include:
@@ -220,32 +808,114 @@ Include:
 - Sources
 - Recommendations"""
 
-    return ask_groq(prompt, model="balanced")
+
+def stream_groq(
+    prompt: str,
+    model: str = "smart",
+    temperature: float = 0.7,
+    system_prompt: Optional[str] = None,
+) -> TokenStream:
+    """
+    Streaming ask_groq: iterate for tokens as they arrive.
+
+    After iteration, `.response` holds the full AgentResponse including
+    ttft_ms and tokens_per_sec.
+    """
+    return get_client().stream(
+        prompt=prompt,
+        model=MODELS.get(model, MODELS["smart"]),
+        system_prompt=system_prompt,
+        temperature=temperature,
+    )
+
+
+def stream_groq_async(
+    prompt: str,
+    model: str = "smart",
+    temperature: float = 0.7,
+    system_prompt: Optional[str] = None,
+) -> AsyncTokenStream:
+    """Async stream_groq (`async for token in stream_groq_async(...)`)."""
+    return get_async_client().astream(
+        prompt=prompt,
+        model=MODELS.get(model, MODELS["smart"]),
+        system_prompt=system_prompt,
+        temperature=temperature,
+    )
+
+
+_model_rpm: Optional[Dict[str, int]] = None
+
+
+def load_model_rpm(path: Path = PROXY_CONFIG) -> Dict[str, int]:
+    """
+    rpm limits from the LiteLLM proxy config, keyed by both the proxy
+    model_name ("gemini-flash") and the provider model ("groq/llama-3.1-8b-instant").
+    Missing config or PyYAML → {} (every model gets the default cap).
+    """
+    try:
+        import yaml
+
+        config = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except (ImportError, OSError, ValueError):
+        return {}
+    limits = {}
+    for entry in config.get("model_list") or []:
+        params = entry.get("litellm_params") or {}
+        rpm = params.get("rpm")
+        if not rpm:
+            continue
+        for name in (entry.get("model_name"), params.get("model")):
+            if name:
+                limits[name] = min(int(rpm), limits.get(name, int(rpm)))
+    return limits
+
+
+def model_concurrency(model: str) -> int:
+    """Max in-flight calls for a model: rpm spread over ASSUMED_CALL_SEC-long calls."""
+    global _model_rpm
+    if _model_rpm is None:
+        _model_rpm = load_model_rpm()
+    rpm = _model_rpm.get(model)
+    if rpm is None:
+        return DEFAULT_MODEL_CONCURRENCY
+    return max(1, rpm * ASSUMED_CALL_SEC // 60)
 
 
 def batch_parallel(
     tasks: List[Dict[str, str]],
     model: str = "fast",
+    max_workers: int = BATCH_MAX_WORKERS,
+    cache: Optional[bool] = None,
 ) -> List[AgentResponse]:
     """
-    Run multiple tasks in parallel (simulated).
+    Run multiple tasks in parallel.
+
+    At most `max_workers` calls are in flight, and never more per model
+    than its rpm in litellm/proxy_config.yaml allows (see model_concurrency).
 
     Args:
-        tasks: List of {"prompt": "...", "system": "..."} dicts
+        tasks: List of {"prompt": "...", "system": "...", "model": "..."} dicts
+            ("model" is optional and overrides `model` for that task)
         model: Model to use
+        max_workers: Upper bound on concurrent calls
+        cache: Response cache policy, as in ask_groq
 
     Returns:
-        List of AgentResponses
+        List of AgentResponses, in the same order as `tasks`
     """
-    results = []
-    for task in tasks:
-        result = ask_groq(
-            prompt=task.get("prompt", ""),
-            model=model,
-            system_prompt=task.get("system"),
-        )
-        results.append(result)
-    return results
+    return run_sync(_background_call("abatch", tasks, model=model, max_workers=max_workers,
+                                     cache=cache))
+
+
+async def batch_parallel_async(
+    tasks: List[Dict[str, str]],
+    model: str = "fast",
+    max_workers: int = BATCH_MAX_WORKERS,
+    cache: Optional[bool] = None,
+) -> List[AgentResponse]:
+    """Awaitable batch_parallel for callers already inside an event loop."""
+    return await get_async_client().abatch(tasks, model=model, max_workers=max_workers, cache=cache)
 
 
 def health_check() -> Dict[str, Any]:
@@ -295,9 +965,21 @@ if __name__ == "__main__":
     parser.add_argument("command", choices=["ask", "analyze", "research", "health"])
     parser.add_argument("--prompt", "-p", help="Prompt or topic")
     parser.add_argument("--model", "-m", default="smart", choices=list(MODELS.keys()))
+    parser.add_argument("--stream", "-s", action="store_true",
+                        help="Print tokens as they arrive (ask, research)")
 
     args = parser.parse_args()
 
+    def print_stream(stream: TokenStream) -> None:
+        for token in stream:
+            print(token, end="", flush=True)
+        result = stream.response
+        if not result.success:
+            print(f"\nError: {result.error}")
+            sys.exit(1)
+        print(f"\n\n⏱️  TTFT {result.ttft_ms} ms, {result.tokens_per_sec} tok/s, "
+              f"{result.duration_ms} ms total", file=sys.stderr)
+
     if args.command == "health":
         result = health_check()
         print(json.dumps(result, indent=2))
@@ -305,11 +987,17 @@ if __name__ == "__main__":
         if not args.prompt:
             print("Error: --prompt required")
             sys.exit(1)
+        if args.stream:
+            print_stream(stream_groq(args.prompt, model=args.model))
+            sys.exit(0)
         result = ask_groq(args.prompt, model=args.model)
         print(result.content if result.success else f"Error: {result.error}")
     elif args.command == "research":
         if not args.prompt:
             print("Error: --prompt required")
             sys.exit(1)
+        if args.stream:
+            print_stream(stream_groq(research_prompt(args.prompt), model="balanced"))
+            sys.exit(0)
         result = research_task(args.prompt)
         print(result.content if result.success else f"Error: {result.error}")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Response Cache - content-addressed cache for LLM completions.
+
+Identical requests (model, system prompt, prompt, temperature, max_tokens)
+are answered from cache instead of the provider. Two tiers:
+
+- in-process LRU (LLM_CACHE_LRU_SIZE entries) for repeats within a run;
+- a persistent tier shared between runs: Redis under the project
+  namespace (marketing_tvoje_info:llm:*) when reachable, otherwise a
+  SQLite file in ~/.cache/marketing_tvoje_info/.
+
+Entries expire after LLM_CACHE_TTL_SEC. The persistent tier is also
+size-bounded: Redis keeps the newest LLM_CACHE_MAX_ENTRIES, SQLite evicts
+least-recently-used rows beyond LLM_CACHE_MAX_BYTES.
+
+Sampling with temperature > 0 is not cached unless the caller opts in
+(agent_tools: `cache=True`). Set LLM_CACHE=off to disable everything.
+
+Usage:
+    from response_cache import get_response_cache, request_key
+
+    cache = get_response_cache()
+    key = request_key(model, system_prompt, prompt, temperature, max_tokens)
+    hit = cache.get(key)                  # dict or None
+    cache.put(key, {"content": "...", "model": "...", "tokens_used": 42, "duration_ms": 900})
+    print(cache.stats)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+except ImportError:  # Optional — SQLite tier below
+    redis = None
+
+
+CACHE_MODE = os.getenv("LLM_CACHE", "auto")          # auto | redis | sqlite | memory | off
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+NAMESPACE = "marketing_tvoje_info"
+CACHE_DB = Path(os.getenv(
+    "LLM_CACHE_DB",
+    Path.home() / ".cache" / NAMESPACE / "llm-responses.sqlite",
+))
+TTL_SEC = int(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 86400)))
+LRU_SIZE = int(os.getenv("LLM_CACHE_LRU_SIZE", "256"))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))          # Redis tier
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # SQLite tier
+KEY_VERSION = 1                  # Bump to invalidate every cached response
+
+
+def request_key(
+    model: str,
+    system_prompt: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """Stable sha256 of a completion request."""
+    blob = json.dumps(
+        [KEY_VERSION, model, system_prompt or "", prompt, float(temperature), int(max_tokens)],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Persistent tiers
+# ═══════════════════════════════════════════════════════════════
+
+class RedisTier:
+    """{ns}:llm:{key} strings with TTL, plus a zset index trimmed to MAX_ENTRIES."""
+
+    def __init__(self, client: Any, namespace: str = NAMESPACE,
+                 ttl: int = TTL_SEC, max_entries: int = MAX_ENTRIES):
+        self.client = client
+        self.prefix = f"{namespace}:llm:"
+        self.index = f"{namespace}:llm-index"
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def put(self, key: str, value: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value, ex=self.ttl)
+        pipe.zadd(self.index, {key: time.time()})
+        pipe.execute()
+        overflow = self.client.zcard(self.index) - self.max_entries
+        if overflow > 0:
+            oldest = self.client.zrange(self.index, 0, overflow - 1)
+            if oldest:
+                self.client.delete(*(self.prefix + k.decode("utf-8") for k in oldest))
+                self.client.zrem(self.index, *oldest)
+
+    def delete(self, key: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self.prefix + key)
+        pipe.zrem(self.index, key)
+        pipe.execute()
+
+
+class SqliteTier:
+    """One-table SQLite cache with TTL and LRU eviction by total size."""
+
+    def __init__(self, path: Path = CACHE_DB, ttl: int = TTL_SEC, max_bytes: int = MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False, timeout=5)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,
+            created REAL NOT NULL, accessed REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                            (key, value, size, now, now))
+            self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Drop least-recently-used rows until under the cap
+                excess = total - self.max_bytes
+                for old_key, old_size in self.db.execute(
+                        "SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if excess <= 0:
+                        break
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    excess -= old_size
+            self.db.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.db.commit()
+
+
+# ═══════════════════════════════════════════════════════════════
+# Cache
+# ═══════════════════════════════════════════════════════════════
+
+class ResponseCache:
+    """In-process LRU in front of an optional persistent tier."""
+
+    def __init__(self, persistent: Any = None, lru_size: int = LRU_SIZE, ttl: int = TTL_SEC):
+        self.persistent = persistent
+        self.lru_size = lru_size
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "saved_ms": 0, "saved_tokens": 0}
+
+    def _remember(self, key: str, entry: Dict[str, Any], stored_at: float) -> None:
+        with self._lock:
+            self._lru[key] = (stored_at, entry)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        try:
+            self.persistent.delete(key)
+        except Exception:
+            pass
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response fields, or None (counts hits/misses and what a hit saved)."""
+        now = time.time()
+        with self._lock:
+            local = self._lru.get(key)
+            if local and now - local[0] <= self.ttl:
+                self._lru.move_to_end(key)
+                entry = local[1]
+            else:
+                entry = None
+        if entry is None and self.persistent is not None:
+            try:
+                raw = self.persistent.get(key)
+                entry = json.loads(raw) if raw is not None else None
+                if entry is not None and not isinstance(entry, dict):
+                    raise ValueError(f"not an object: {type(entry).__name__}")
+            except ValueError:
+                entry = None  # Corrupt value: a miss, and drop it
+                self._forget(key)
+            except Exception:
+                entry = None  # Cache is an optimisation only
+            if entry is not None:
+                # Promote with the original store time so the TTL isn't restarted
+                stored_at = entry.pop("stored_at", now)
+                if now - stored_at <= self.ttl:
+                    self._remember(key, entry, stored_at)
+                else:
+                    entry = None
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["saved_ms"] += entry.get("duration_ms", 0)
+            self.stats["saved_tokens"] += entry.get("tokens_used", 0)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store a successful response in both tiers."""
+        now = time.time()
+        self._remember(key, entry, now)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, json.dumps({**entry, "stored_at": now}, ensure_ascii=False))
+            except Exception:
+                pass
+
+
+def _persistent_tier(mode: str) -> Any:
+    """Redis if requested/reachable, else SQLite (None for memory-only)."""
+    if mode == "memory":
+        return None
+    if mode in ("auto", "redis") and redis is not None:
+        try:
+            client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=2)
+            client.ping()
+            return RedisTier(client)
+        except redis.RedisError:
+            pass
+    try:
+        return SqliteTier()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or create the process-wide cache (None if LLM_CACHE=off)."""
+    global _cache
+    if CACHE_MODE == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(_persistent_tier(CACHE_MODE))
+        return _cache
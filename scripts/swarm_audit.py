@@ -21,7 +21,7 @@ def task_flash(prompt):
     except Exception as e:
         print(f"Warning: Could not read mcp.json: {e}")
 
-    res = ask_groq(prompt, model="flash")
+    res = ask_groq(prompt, model="flash", cache=True)  # Unchanged mcp.json → cached answer
     return {"agent": "Analyst (Flash)", "output": res.content, "success": res.success}
 
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for agent_tools batching (no proxy needed — calls are faked).
+
+Usage:
+    python3 -m pytest -q scripts/test_agent_tools.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import agent_tools  # noqa: E402
+from agent_tools import AgentResponse, AsyncLiteLLMClient, MODELS  # noqa: E402
+
+CALL_SEC = 0.1
+
+
+def run_batch(monkeypatch, tasks, caps, max_workers):
+    """Run abatch with a fake CALL_SEC call; returns (results, per-task finish times, peaks)."""
+    monkeypatch.setattr(agent_tools, "model_concurrency", lambda model: caps.get(model, 8))
+    in_flight = {"total": 0}
+    peaks = {"total": 0}
+    finished = {}
+
+    async def fake_aask(self, prompt, model="smart", temperature=0.7, system_prompt=None, cache=None):
+        for key in ("total", model):
+            in_flight[key] = in_flight.get(key, 0) + 1
+            peaks[key] = max(peaks.get(key, 0), in_flight[key])
+        await asyncio.sleep(CALL_SEC)
+        for key in ("total", model):
+            in_flight[key] -= 1
+        finished[prompt] = time.perf_counter() - start
+        return AgentResponse(success=True, content=prompt, model=MODELS[model],
+                             tokens_used=0, duration_ms=int(CALL_SEC * 1000))
+
+    monkeypatch.setattr(AsyncLiteLLMClient, "aask", fake_aask)
+    start = time.perf_counter()
+    results = asyncio.run(AsyncLiteLLMClient().abatch(tasks, max_workers=max_workers))
+    return results, finished, peaks
+
+
+def test_abatch_keeps_input_order(monkeypatch):
+    tasks = [{"prompt": f"t{i}", "model": "fast" if i % 2 else "pro"} for i in range(10)]
+    results, _, _ = run_batch(monkeypatch, tasks, {MODELS["pro"]: 2}, max_workers=4)
+    assert [r.content for r in results] == [t["prompt"] for t in tasks]
+
+
+def test_abatch_respects_caps(monkeypatch):
+    tasks = [{"prompt": f"p{i}", "model": "pro"} for i in range(4)]
+    tasks += [{"prompt": f"f{i}", "model": "fast"} for i in range(8)]
+    _, _, peaks = run_batch(monkeypatch, tasks, {MODELS["pro"]: 1, MODELS["fast"]: 3}, max_workers=4)
+    assert peaks["pro"] == 1
+    assert peaks["fast"] <= 3
+    assert peaks["total"] <= 4
+
+
+def test_capped_model_does_not_starve_others(monkeypatch):
+    # 8 tasks for a model capped at 1, then 7 uncapped ones: one pro call
+    # holds a batch slot, the other 7 slots must go to the fast tasks rather
+    # than to pro tasks waiting on their model cap
+    tasks = [{"prompt": f"p{i}", "model": "pro"} for i in range(8)]
+    tasks += [{"prompt": f"f{i}", "model": "fast"} for i in range(7)]
+    _, finished, _ = run_batch(monkeypatch, tasks, {MODELS["pro"]: 1, MODELS["fast"]: 8}, max_workers=8)
+    fast_done = max(finished[f"f{i}"] for i in range(7))
+    assert fast_done < 1.5 * CALL_SEC